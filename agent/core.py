@@ -1,6 +1,8 @@
 from agent.interfaces import LLMPlugin, KGPlugin, VectorStorePlugin, MetricsPlugin
 from agent.prompt_builder import PromptBuilder
 import re
+import time
+from typing import Callable, Generator, Optional
 
 def sanitize_task_input(task: str) -> str:
     # Remove dangerous characters, excessive whitespace, and limit length
@@ -16,7 +18,18 @@ class ReasoningAgent:
         self.metrics = metrics
         self.prompt_builder = prompt_builder
 
-    def handle_task(self, task: str):
+    def handle_task(self, task: str, on_token: Optional[Callable[[str], None]] = None):
+        # Drains stream_task, forwarding each partial token; returns the full answer.
+        stream = self.stream_task(task)
+        while True:
+            try:
+                token = next(stream)
+            except StopIteration as stop:
+                return stop.value
+            if on_token:
+                on_token(token)
+
+    def stream_task(self, task: str) -> Generator[str, None, str]:
         task = sanitize_task_input(task)
         # 1. Query KG for context
         context = self.kg.query(task)
@@ -24,8 +37,15 @@ class ReasoningAgent:
         similar = self.vector_store.query([0.1, 0.2, 0.3], top_k=3)  # Example vector
         # 3. Build prompt
         prompt = self.prompt_builder.build(str(context), task)
-        # 4. Call LLM
-        answer = self.llm.call(prompt)
+        # 4. Stream LLM tokens
+        started = time.time()
+        parts = []
+        for token in self.llm.stream(prompt):
+            if not parts:
+                self.metrics.emit("time_to_first_token_seconds", time.time() - started, tags={"task": task})
+            parts.append(token)
+            yield token
+        answer = "".join(parts)
         # 5. Store answer in KG
         self.kg.store({"id": task, "type": "answer", "data": answer})
         # 6. Emit metrics
@@ -1,10 +1,15 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 class LLMPlugin(ABC):
     @abstractmethod
     def call(self, prompt: str, **kwargs) -> str:
         pass
 
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        # Plugins without native streaming emit the whole answer as one chunk.
+        yield self.call(prompt, **kwargs)
+
 class KGPlugin(ABC):
     @abstractmethod
     def query(self, query: str) -> dict:
@@ -14,4 +14,17 @@ class OpenAILLM(LLMPlugin):
             timeout=30,
             **kwargs
         )
-        return response['choices'][0]['message']['content']
\ No newline at end of file
+        return response['choices'][0]['message']['content']
+
+    def stream(self, prompt: str, **kwargs):
+        response = openai.ChatCompletion.create(
+            model=kwargs.pop("model", "gpt-3.5-turbo"),
+            messages=[{"role": "user", "content": prompt}],
+            timeout=30,
+            stream=True,
+            **kwargs
+        )
+        for chunk in response:
+            delta = chunk['choices'][0].get('delta', {}).get('content')
+            if delta:
+                yield delta
\ No newline at end of file
@@ -2,4 +2,9 @@ from agent.interfaces import LLMPlugin
 
 class MockLLM(LLMPlugin):
     def call(self, prompt: str, **kwargs) -> str:
-        return f"MOCKED LLM RESPONSE for prompt: {prompt[:30]}..."
\ No newline at end of file
+        return f"MOCKED LLM RESPONSE for prompt: {prompt[:30]}..."
+
+    def stream(self, prompt: str, **kwargs):
+        words = self.call(prompt, **kwargs).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == 0 else " " + word
\ No newline at end of file
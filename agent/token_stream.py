@@ -0,0 +1,108 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+import redis
+
+logger = logging.getLogger("TokenPublisher")
+
+REDIS_URL = os.getenv("REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+STREAM_TTL_SECONDS = int(os.getenv("TOKEN_STREAM_TTL", "3600"))
+STREAM_MAXLEN = int(os.getenv("TOKEN_STREAM_MAXLEN", "10000"))
+# Longest a reader waits on one task's stream before giving up on it.
+STREAM_TIMEOUT_SECONDS = float(os.getenv("TOKEN_STREAM_TIMEOUT", "900"))
+
+
+def stream_key(task_id: str) -> str:
+    return f"task:{task_id}:tokens"
+
+
+class TokenPublisher:
+    """Publishes one task's tokens and final result to its Redis stream (worker side).
+
+    Publishing never fails the task: Redis errors are logged, and after the first
+    one the remaining tokens are dropped. Readers then end the stream with the
+    task's final state instead.
+    """
+
+    def __init__(self, task_id: str, client=None):
+        self.key = stream_key(task_id)
+        self.client = client or redis.Redis.from_url(REDIS_URL)
+        self.started_at = time.time()
+        self.first_token_at = None
+        self.publish_failed = False
+
+    def token(self, text: str):
+        if self.first_token_at is None:
+            self.first_token_at = time.time()
+        if not self.publish_failed:
+            self._publish(lambda: self.client.xadd(self.key, {"type": "token", "data": text},
+                                                   maxlen=STREAM_MAXLEN, approximate=True))
+
+    def done(self, status: str, result):
+        # Attempted even after a failed token: the connection may be back.
+        def publish():
+            self.client.xadd(self.key, {"type": "done", "data": json.dumps({"status": status, "result": result}, default=str)})
+            self.client.expire(self.key, STREAM_TTL_SECONDS)
+        self._publish(publish)
+
+    def _publish(self, write):
+        try:
+            write()
+        except redis.RedisError as e:
+            logger.error(f"Publishing to {self.key} failed: {e}")
+            self.publish_failed = True
+
+    @property
+    def time_to_first_token(self):
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+
+async def iter_task_events(client, task_id: str, last_id: str = "0", block_ms: int = 15000,
+                           timeout: float = STREAM_TIMEOUT_SECONDS, final_state=None):
+    """Yields decoded stream events for a task until its "done" event (API side).
+
+    ``client`` is a ``redis.asyncio`` client. Starting from ``last_id="0"`` replays
+    tokens published before the reader connected, so late subscribers miss nothing.
+
+    The stream always ends with a "done" event. ``final_state`` is a blocking
+    callable polled after every idle read: it returns ``None`` while the task runs
+    and ``{"status", "result"}`` once it has finished. A finished task whose stream
+    has no "done" event (expired, or the worker died before publishing) ends with
+    that state. Once ``timeout`` seconds have passed, the next idle read ends the
+    stream as failed.
+    """
+    key = stream_key(task_id)
+    deadline = time.monotonic() + timeout if timeout else None
+    finished = None
+    while True:
+        # Once the task is known to be finished, drain what is left without blocking.
+        response = await client.xread({key: last_id}, block=None if finished else block_ms, count=100)
+        if not response:
+            if finished:
+                yield {"type": "done", **finished}
+                return
+            if deadline is not None and time.monotonic() >= deadline:
+                yield {"type": "done", "status": "failed", "result": f"No result for task {task_id} within {timeout:g}s"}
+                return
+            yield {"type": "heartbeat"}
+            if final_state is not None:
+                finished = await asyncio.get_running_loop().run_in_executor(None, final_state)
+            continue
+        for _, entries in response:
+            for entry_id, fields in entries:
+                last_id = entry_id
+                event_type = _decode(fields.get(b"type", fields.get("type")))
+                data = _decode(fields.get(b"data", fields.get("data")))
+                if event_type == "done":
+                    yield {"type": "done", **json.loads(data)}
+                    return
+                yield {"type": event_type, "data": data, "id": _decode(entry_id)}
+
+
+def _decode(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
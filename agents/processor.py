@@ -1,5 +1,6 @@
 import logging
 from utils.retry import retry
+from utils.llm_cache import get_default_cache
 from plugins.plugin_manager import PluginManager
 
 class ProcessorAgent:
@@ -7,10 +8,17 @@ class ProcessorAgent:
         self.storage = storage
         self.plugin_manager = plugin_manager
         self.llm_config = llm_config
+        self.llm_cache = get_default_cache() if llm_config.get('cache', True) else None
         self.running = True
 
-    @retry
     def call_llm(self, prompt):
+        if self.llm_cache is None:
+            return self._call_llm(prompt)
+        params = {'provider': self.llm_config['provider'], 'model': self.llm_config.get('model')}
+        return self.llm_cache.cached_call(prompt, self._call_llm, params)
+
+    @retry
+    def _call_llm(self, prompt):
         if self.llm_config['provider'] == 'openai':
             import openai
             openai.api_key = self.llm_config['api_key']
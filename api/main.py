@@ -1,5 +1,5 @@
 from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from api.schemas import TaskRequest, TaskResult
 from api.auth import get_current_user, authenticate_user, create_access_token
@@ -14,6 +14,11 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import traceback
+import json
+import time
+import redis.asyncio as aioredis
+from prometheus_client import Histogram
+from agent.token_stream import REDIS_URL, iter_task_events
 
 # OpenTelemetry tracing
 if os.getenv("OTEL_ENABLED", "0") == "1":
@@ -53,6 +58,13 @@ if os.getenv("OTEL_ENABLED", "0") == "1":
 
 tasks = {}
 ws_connections = {}
+redis_client = aioredis.from_url(REDIS_URL)
+
+time_to_first_token = Histogram(
+    "task_time_to_first_token_seconds",
+    "Seconds from task submission until its first token is forwarded to a client",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
 
 llm, kg, vector_store, metrics, prompt_builder = load_plugins()
 
@@ -70,7 +82,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 @limiter.limit("5/minute")
 async def submit_task(request: Request, task: TaskRequest, user=Depends(get_current_user)):
     task_id = str(uuid4())
-    tasks[task_id] = {"status": "pending", "result": None, "celery_id": None}
+    tasks[task_id] = {"status": "pending", "result": None, "celery_id": None, "submitted_at": time.time(), "first_token_seen": False}
     celery_result = process_task_celery.apply_async(args=[task_id, task.input])
     tasks[task_id]["celery_id"] = celery_result.id
     return TaskResult(id=task_id, status=tasks[task_id]["status"], result=tasks[task_id]["result"])
@@ -96,38 +108,74 @@ async def get_task(request: Request, task_id: str, user=Depends(get_current_user
             tasks[task_id]["result"] = str(e)
     return TaskResult(id=task_id, status=tasks[task_id]["status"], result=tasks[task_id]["result"])
 
+def celery_final_state(task_id: str):
+    """Returns the task's final {"status", "result"} from Celery, or None while it is still running."""
+    result = AsyncResult(tasks[task_id]["celery_id"], app=celery_app)
+    if not result.ready():
+        return None
+    if result.successful() and isinstance(result.result, dict):
+        return {"status": result.result.get("status", "completed"), "result": result.result.get("result")}
+    return {"status": "failed", "result": str(result.result)}
+
+async def task_stream_events(task_id: str):
+    """Yields token and final-result events for a task as the worker publishes them."""
+    async for event in iter_task_events(redis_client, task_id, final_state=lambda: celery_final_state(task_id)):
+        if event["type"] == "token":
+            task = tasks.get(task_id)
+            if task and not task["first_token_seen"]:
+                task["first_token_seen"] = True
+                time_to_first_token.observe(time.time() - task["submitted_at"])
+        elif event["type"] == "done" and task_id in tasks:
+            tasks[task_id]["status"] = event["status"]
+            tasks[task_id]["result"] = event["result"]
+        yield event
+
 @app.websocket("/ws/tasks/{task_id}")
 async def websocket_task_updates(websocket: WebSocket, task_id: str):
     await websocket.accept()
+    if task_id not in tasks:
+        await websocket.send_json({"error": "Task not found"})
+        await websocket.close()
+        return
     ws_connections.setdefault(task_id, []).append(websocket)
     try:
-        # Send initial status
-        if task_id in tasks:
-            await websocket.send_json({"status": tasks[task_id]["status"], "result": tasks[task_id]["result"]})
-        celery_id = tasks[task_id]["celery_id"]
-        result = AsyncResult(celery_id, app=celery_app)
-        while not result.ready():
-            try:
-                await websocket.receive_text()  # Keep connection open
-            except Exception as e:
-                logger.error(f"WebSocket receive error: {e}")
-                await websocket.send_json({"error": f"WebSocket error: {str(e)}"})
-                await websocket.close()
-                return
-        try:
-            output = result.get()
-            if output.get("status") == "failed":
-                tasks[task_id]["status"] = "failed"
-                tasks[task_id]["result"] = output["result"]
-                await websocket.send_json({"status": "failed", "result": output["result"]})
-            else:
-                tasks[task_id]["status"] = "completed"
-                tasks[task_id]["result"] = output["result"]
-                await websocket.send_json({"status": "completed", "result": output["result"]})
-        except Exception as e:
-            logger.error(f"WebSocket result error: {e}")
-            await websocket.send_json({"error": f"Result error: {str(e)}"})
+        # Send initial status, then forward tokens as they arrive
+        await websocket.send_json({"status": tasks[task_id]["status"], "result": tasks[task_id]["result"]})
+        if tasks[task_id]["status"] in ("completed", "failed"):
             await websocket.close()
+            return
+        async for event in task_stream_events(task_id):
+            if event["type"] == "heartbeat":
+                # Writing to a client that has gone away raises, which ends the stream.
+                await websocket.send_json({"status": "heartbeat"})
+            elif event["type"] == "token":
+                await websocket.send_json({"status": "streaming", "token": event["data"]})
+            elif event["type"] == "done":
+                await websocket.send_json({"status": event["status"], "result": event["result"]})
+        await websocket.close()
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for task {task_id}")
-        ws_connections[task_id].remove(websocket)
\ No newline at end of file
+    except Exception as e:
+        logger.error(f"WebSocket stream error: {e}")
+        await websocket.send_json({"error": f"Stream error: {str(e)}"})
+        await websocket.close()
+    finally:
+        ws_connections[task_id].remove(websocket)
+
+@app.get("/tasks/{task_id}/stream")
+async def sse_task_updates(request: Request, task_id: str, user=Depends(get_current_user)):
+    if task_id not in tasks:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    async def event_source():
+        async for event in task_stream_events(task_id):
+            if await request.is_disconnected():
+                return
+            if event["type"] == "heartbeat":
+                yield ": keep-alive\n\n"
+            elif event["type"] == "token":
+                yield f"id: {event['id']}\nevent: token\ndata: {json.dumps(event['data'])}\n\n"
+            else:
+                yield f"event: done\ndata: {json.dumps({'status': event['status'], 'result': event['result']})}\n\n"
+
+    return StreamingResponse(event_source(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -1,8 +1,12 @@
 import logging
+import weakref
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable, List, Optional
+import numpy as np
 from faiss_vector_store import FAISSVectorStore
+from utils.llm_cache import LLMResponseCache, get_default_cache
+from hybrid_scoring import CandidateBatch, fuse_results, top_k_indices
 
 # Import embedding and LLM generator from llm_agent.py
 try:
@@ -33,13 +37,22 @@ class EmbeddingPipeline:
 
 # --- LLM Generator (same as llm_agent.py) ---
 class LLMGenerator:
-    def __init__(self, model_name="gpt2"):
+    def __init__(self, model_name="gpt2", cache: Optional[LLMResponseCache] = None, use_cache: bool = True):
         if not HF_AVAILABLE:
             raise ImportError("HuggingFace Transformers is required for LLM generation.")
+        self.model_name = model_name
         self.generator = pipeline("text-generation", model=model_name)
+        self.cache = (cache or get_default_cache()) if use_cache else None
 
     def generate(self, prompt, max_length=100):
-        return self.generator(prompt, max_length=max_length)[0]['generated_text']
+        # Only the continuation is cached: a semantic hit comes from a similar, not identical, prompt.
+        if self.cache is None:
+            return prompt + self._generate(prompt, max_length)
+        params = {"model": self.model_name, "max_length": max_length, "return_full_text": False}
+        return prompt + self.cache.cached_call(prompt, lambda p: self._generate(p, max_length), params)
+
+    def _generate(self, prompt, max_length):
+        return self.generator(prompt, max_length=max_length, return_full_text=False)[0]['generated_text']
 
 # --- LLMAgent (sync base) ---
 class LLMAgent:
@@ -48,6 +61,9 @@ class LLMAgent:
         self.vector_store = vector_store
         self.embedding_pipeline = embedding_pipeline
         self.llm_generator = llm_generator
+        self._retrieval_executor = ThreadPoolExecutor(max_workers=2)
+        # Shuts the retrieval threads down even if close() is never called.
+        self._finalizer = weakref.finalize(self, self._retrieval_executor.shutdown, wait=False)
         logger.info(f"LLMAgent '{self.name}' initialized.")
 
     def add_text_memory(self, text: str, memory_type: str = "fact", uid: Optional[str] = None, extra: Optional[dict] = None):
@@ -69,26 +85,55 @@ class LLMAgent:
         logger.info(f"Search returned {len(results)} results.")
         return results
 
-    def hybrid_search(self, query_text: str, keyword: Optional[str] = None, top_k: int = 5, memory_type: Optional[str] = None):
+    def hybrid_search(self, query_text: str, keyword: Optional[str] = None, top_k: int = 5, memory_type: Optional[str] = None, fusion: str = "rrf"):
         query_vector = self.embedding_pipeline.embed(query_text)
-        results = self.vector_store.search(query_vector, top_k=top_k*2, return_scores=True)
-        filtered = []
-        for meta, score, uid in results:
-            if memory_type and (not meta or meta.get("type") != memory_type):
-                continue
-            if keyword and keyword.lower() not in meta.get('text', '').lower():
-                continue
-            filtered.append((meta, score, uid))
-            if len(filtered) >= top_k:
-                break
+        if not hasattr(self.vector_store, "keyword_search"):
+            results = self.vector_store.search(query_vector, top_k=top_k*2, return_scores=True)
+            filtered = self._rank_hybrid(results, keyword, top_k, memory_type)
+        else:
+            # Vector and BM25 retrievers run side by side, then get fused.
+            vector_future = self._retrieval_executor.submit(self.vector_store.search, query_vector, top_k*2, True)
+            keyword_future = self._retrieval_executor.submit(self.vector_store.keyword_search, keyword or query_text, top_k*2, True)
+            filtered = self._fuse_hybrid(vector_future.result(), keyword_future.result(), keyword, top_k, memory_type, fusion)
         logger.info(f"Hybrid search returned {len(filtered)} results.")
         return filtered
 
+    @staticmethod
+    def _hybrid_mask(batch: CandidateBatch, keyword: Optional[str], memory_type: Optional[str]) -> np.ndarray:
+        # Keyword and memory type are hard filters on every hybrid path.
+        mask = np.ones(len(batch), dtype=bool)
+        if memory_type:
+            mask &= batch.equals("type", memory_type)
+        if keyword:
+            mask &= batch.keyword_hits(keyword).astype(bool)
+        return mask
+
+    def _fuse_hybrid(self, vector_results, keyword_results, keyword: Optional[str], top_k: int, memory_type: Optional[str], fusion: str):
+        # Fused results come back best first; the filters only drop entries, so order is kept.
+        batch = CandidateBatch(fuse_results(vector_results, keyword_results, method=fusion))
+        indices = np.flatnonzero(self._hybrid_mask(batch, keyword, memory_type))[:top_k]
+        return batch.take(indices, batch.distances)
+
+    def _rank_hybrid(self, results, keyword: Optional[str], top_k: int, memory_type: Optional[str]):
+        # Stores without a keyword index: survivors of the filters are ranked by vector distance.
+        batch = CandidateBatch(results)
+        indices = top_k_indices(-batch.distances, top_k, np.flatnonzero(self._hybrid_mask(batch, keyword, memory_type)))
+        return batch.take(indices, batch.distances)
+
+    def close(self):
+        """Stops the retrieval thread pool."""
+        self._finalizer()
+
 # --- AsyncLLMAgent ---
 class AsyncLLMAgent(LLMAgent):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._executor = ThreadPoolExecutor()
+        self._async_finalizer = weakref.finalize(self, self._executor.shutdown, wait=False)
+
+    def close(self):
+        super().close()
+        self._async_finalizer()
 
     async def aembed(self, text):
         loop = asyncio.get_event_loop()
@@ -115,21 +160,20 @@ class AsyncLLMAgent(LLMAgent):
             self._executor, self.vector_store.search_with_filter, query_vector, top_k, combined_filter, return_scores
         )
 
-    async def ahybrid_search(self, query_text, keyword=None, top_k=5, memory_type=None):
+    async def ahybrid_search(self, query_text, keyword=None, top_k=5, memory_type=None, fusion="rrf"):
         query_vector = await self.aembed(query_text)
         loop = asyncio.get_event_loop()
-        results = await loop.run_in_executor(
-            self._executor, self.vector_store.search, query_vector, top_k*2, True
-        )
-        filtered = []
-        for meta, score, uid in results:
-            if memory_type and (not meta or meta.get("type") != memory_type):
-                continue
-            if keyword and keyword.lower() not in meta.get('text', '').lower():
-                continue
-            filtered.append((meta, score, uid))
-            if len(filtered) >= top_k:
-                break
+        if not hasattr(self.vector_store, "keyword_search"):
+            results = await loop.run_in_executor(
+                self._executor, self.vector_store.search, query_vector, top_k*2, True
+            )
+            filtered = self._rank_hybrid(results, keyword, top_k, memory_type)
+        else:
+            vector_results, keyword_results = await asyncio.gather(
+                loop.run_in_executor(self._executor, self.vector_store.search, query_vector, top_k*2, True),
+                loop.run_in_executor(self._executor, self.vector_store.keyword_search, keyword or query_text, top_k*2, True),
+            )
+            filtered = self._fuse_hybrid(vector_results, keyword_results, keyword, top_k, memory_type, fusion)
         logger.info(f"[Async] Hybrid search returned {len(filtered)} results.")
         return filtered
 
@@ -1,11 +1,12 @@
-import networkx as nx
 import sqlite3
 from typing import Dict
 
+from multi_agent_framework.core.graph_store import CompactGraph
+
 class IntelligentCodebaseGraph:
     """Sophisticated graph-based codebase representation with AI orchestration capabilities."""
     def __init__(self, db_path: str = "architecture_graph.db"):
-        self.graph = nx.DiGraph()
+        self.graph = CompactGraph(multigraph=False)
         self.conn = sqlite3.connect(db_path)
         self.entities: Dict = {}
         self.relationships: Dict = {}
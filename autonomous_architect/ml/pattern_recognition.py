@@ -6,13 +6,17 @@ class PatternRecognizer:
         self.patterns = {}
     def mine_patterns(self, graph: nx.DiGraph):
         # Example: find all triangles (motifs) in the graph
+        if hasattr(graph, 'to_networkx'):
+            # Cycle enumeration needs a real networkx graph; compact stores convert on demand.
+            graph = graph.to_networkx()
         triangles = [cycle for cycle in nx.simple_cycles(graph) if len(cycle) == 3]
         self.patterns['triangles'] = triangles
         return triangles
     def detect_anomalies(self, graph: nx.DiGraph):
         # Example: nodes with high degree or isolated nodes
+        degrees = list(graph.degree())
         anomalies = {
-            'high_degree': [n for n, d in graph.degree() if d > 5],
-            'isolated': list(nx.isolates(graph))
+            'high_degree': [n for n, d in degrees if d > 5],
+            'isolated': [n for n, d in degrees if d == 0]
         }
         return anomalies
\ No newline at end of file
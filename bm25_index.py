@@ -0,0 +1,91 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+class BM25Index:
+    """Incremental Okapi BM25 inverted index.
+
+    Documents are keyed by any hashable id (the vector store uses its row index).
+    Postings, document lengths and the running total length are updated in place
+    on add/remove, so there is never a rebuild step; idf is derived from posting
+    list sizes at query time.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.lock = threading.Lock()
+        self.postings: Dict[str, Dict[Hashable, int]] = defaultdict(dict)
+        self.doc_len: Dict[Hashable, int] = {}
+        self.doc_terms: Dict[Hashable, Tuple[str, ...]] = {}
+        self.total_len = 0
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def add(self, doc_id: Hashable, text: Optional[str]):
+        tokens = tokenize(text or "")
+        with self.lock:
+            self._remove(doc_id)
+            counts = Counter(tokens)
+            for term, tf in counts.items():
+                self.postings[term][doc_id] = tf
+            self.doc_terms[doc_id] = tuple(counts)
+            self.doc_len[doc_id] = len(tokens)
+            self.total_len += len(tokens)
+
+    def add_batch(self, items):
+        for doc_id, text in items:
+            self.add(doc_id, text)
+
+    def remove(self, doc_id: Hashable):
+        with self.lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: Hashable):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_len -= self.doc_len.pop(doc_id, 0)
+
+    def clear(self):
+        with self.lock:
+            self.postings.clear()
+            self.doc_len.clear()
+            self.doc_terms.clear()
+            self.total_len = 0
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[Hashable, float]]:
+        terms = set(tokenize(query))
+        with self.lock:
+            n_docs = len(self.doc_len)
+            if not terms or not n_docs:
+                return []
+            avgdl = self.total_len / n_docs or 1.0
+            scores: Dict[Hashable, float] = defaultdict(float)
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                df = len(posting)
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in posting.items():
+                    norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[doc_id] / avgdl)
+                    scores[doc_id] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
@@ -2,6 +2,7 @@ import os
 from celery import Celery
 from agent.plugin_loader import load_plugins
 from agent.core import ReasoningAgent
+from agent.token_stream import TokenPublisher
 import logging
 import traceback
 
@@ -29,9 +30,12 @@ agent = ReasoningAgent(llm, kg, vector_store, metrics, prompt_builder)
 
 @celery_app.task
 def process_task_celery(task_id, task_input):
+    publisher = TokenPublisher(task_id)
     try:
-        result = agent.handle_task(task_input)
+        result = agent.handle_task(task_input, on_token=publisher.token)
+        publisher.done("completed", result)
         return {"task_id": task_id, "result": result, "status": "completed"}
     except Exception as e:
         logging.error(f"Celery task failed: {e}\n{traceback.format_exc()}")
+        publisher.done("failed", str(e))
         return {"task_id": task_id, "result": str(e), "status": "failed"}
\ No newline at end of file
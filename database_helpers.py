@@ -1,17 +1,77 @@
-
 import sqlite3
+import heapq
 import json
-from typing import Dict, Any, List, Optional
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+# --- Connection pool ---
+# One connection per (thread, db_path), reused across calls; sqlite3 connections
+# must not be shared between threads. Note that ":memory:" therefore gives each
+# thread its own database.
+_local = threading.local()
+_pool_lock = threading.Lock()
+_all_connections: List[sqlite3.Connection] = []
+_pool_generation = 0  # bumped by close_all_connections so threads drop their closed connections
+
 def get_db_connection(db_path: str):
-    """Create and return a database connection."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row # Allows accessing columns by name
+    """Return this thread's pooled connection to ``db_path`` (WAL mode, rows by column name)."""
+    connections = getattr(_local, "connections", None)
+    if connections is None or _local.generation != _pool_generation:
+        connections = _local.connections = {}
+        _local.generation = _pool_generation
+    conn = connections.get(db_path)
+    if conn is None:
+        # check_same_thread=False only so close_all_connections can close it at shutdown;
+        # the connection is still used by its owning thread alone.
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row # Allows accessing columns by name
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        connections[db_path] = conn
+        with _pool_lock:
+            _all_connections.append(conn)
     return conn
 
+@contextmanager
+def transaction(db_path: str):
+    """Yield the pooled connection; commit on success, roll back on error."""
+    conn = get_db_connection(db_path)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def close_connections(db_path: Optional[str] = None):
+    """Close the calling thread's pooled connections (all of them, or only ``db_path``)."""
+    connections = getattr(_local, "connections", None)
+    if connections is None or _local.generation != _pool_generation:
+        # Already closed by close_all_connections; just forget them.
+        _local.connections = {}
+        _local.generation = _pool_generation
+        return
+    for path in [db_path] if db_path else list(connections):
+        conn = connections.pop(path, None)
+        if conn is not None:
+            conn.close()
+            with _pool_lock:
+                if conn in _all_connections:
+                    _all_connections.remove(conn)
+
+def close_all_connections():
+    """Close every pooled connection, from any thread (e.g. at shutdown)."""
+    global _pool_generation
+    with _pool_lock:
+        connections, _all_connections[:] = list(_all_connections), []
+        _pool_generation += 1
+    for conn in connections:
+        conn.close()
+
 def init_knowledge_graph_db(db_path: str):
-    """Initialize the Knowledge Graph database tables."""
+    """Initialize the Knowledge Graph database tables and indexes."""
     conn = get_db_connection(db_path)
     cursor = conn.cursor()
 
@@ -82,21 +142,25 @@ def init_knowledge_graph_db(db_path: str):
         )
     ''')
 
+    # Indexes: relationship lookups by either endpoint (optionally narrowed by type) are
+    # answered from the index alone, including the strength used for weighted traversal.
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_relationships_source ON relationships (source_id, relationship_type, target_id, strength)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_relationships_target ON relationships (target_id, relationship_type, source_id, strength)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_relationships_type ON relationships (relationship_type)')
+    for table in ('outcomes', 'expectations', 'context'):
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_entity ON {table} (entity_id, timestamp)')
+
     conn.commit()
-    conn.close()
 
 def insert_or_replace_entity(db_path: str, entity_id: str, entity_type: str, name: str, properties: Dict, created_at: str, updated_at: str) -> bool:
     """Insert or replace an entity in the database."""
     try:
-        conn = get_db_connection(db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO entities (id, type, name, properties, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (entity_id, entity_type, name, json.dumps(properties),
-              created_at, updated_at))
-        conn.commit()
-        conn.close()
+        with transaction(db_path) as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO entities (id, type, name, properties, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (entity_id, entity_type, name, json.dumps(properties),
+                  created_at, updated_at))
         return True
     except Exception as e:
         print(f"Error inserting/replacing entity: {e}")
@@ -105,15 +169,12 @@ def insert_or_replace_entity(db_path: str, entity_id: str, entity_type: str, nam
 def insert_relationship(db_path: str, source_id: str, target_id: str, relationship_type: str, properties: Dict, strength: float, created_at: str) -> bool:
     """Insert a relationship into the database."""
     try:
-        conn = get_db_connection(db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO relationships (source_id, target_id, relationship_type, properties, strength, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (source_id, target_id, relationship_type,
-              json.dumps(properties), strength, created_at))
-        conn.commit()
-        conn.close()
+        with transaction(db_path) as conn:
+            conn.execute('''
+                INSERT INTO relationships (source_id, target_id, relationship_type, properties, strength, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (source_id, target_id, relationship_type,
+                  json.dumps(properties), strength, created_at))
         return True
     except Exception as e:
         print(f"Error inserting relationship: {e}")
@@ -126,7 +187,6 @@ def get_entity(db_path: str, entity_id: str) -> Optional[Dict]:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM entities WHERE id = ?", (entity_id,))
         row = cursor.fetchone()
-        conn.close()
         if row:
             # Return as a dictionary, including json-parsed properties
             entity_dict = dict(row)
@@ -137,36 +197,166 @@ def get_entity(db_path: str, entity_id: str) -> Optional[Dict]:
         print(f"Error retrieving entity {entity_id}: {e}")
         return None
 
-def get_relationships(db_path: str, source_id: Optional[str] = None, target_id: Optional[str] = None, relationship_type: Optional[str] = None) -> List[Dict]:
-    """Retrieve relationships based on criteria."""
+def get_relationships(db_path: str, source_id: Optional[str] = None, target_id: Optional[str] = None, relationship_type: Optional[str] = None) -> Iterator[Dict]:
+    """Stream relationships matching the criteria (a generator; wrap in list() to materialize)."""
+    query = "SELECT * FROM relationships WHERE 1=1"
+    params = []
+    if source_id:
+        query += " AND source_id = ?"
+        params.append(source_id)
+    if target_id:
+        query += " AND target_id = ?"
+        params.append(target_id)
+    if relationship_type:
+        query += " AND relationship_type = ?"
+        params.append(relationship_type)
     try:
-        conn = get_db_connection(db_path)
-        cursor = conn.cursor()
-        query = "SELECT * FROM relationships WHERE 1=1"
-        params = []
-        if source_id:
-            query += " AND source_id = ?"
-            params.append(source_id)
-        if target_id:
-            query += " AND target_id = ?"
-            params.append(target_id)
-        if relationship_type:
-            query += " AND relationship_type = ?"
-            params.append(relationship_type)
-
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
-
-        relationships_list = []
-        for row in rows:
+        cursor = get_db_connection(db_path).execute(query, params)
+        for row in cursor:
             rel_dict = dict(row)
             rel_dict['properties'] = json.loads(rel_dict['properties'])
-            relationships_list.append(rel_dict)
-        return relationships_list
+            yield rel_dict
     except Exception as e:
         print(f"Error retrieving relationships: {e}")
-        return []
+
+# --- Graph traversal ---
+# k-hop expansion and reachability run as one WITH RECURSIVE query instead of one
+# query per hop from Python. Depth is always bounded by ``max_depth`` and UNION
+# dedupes (node, depth) pairs. direction="both" needs SQLite >= 3.34 (two recursive
+# SELECTs). Weighted paths need a best cost per node, which a recursive CTE cannot
+# keep, so they run Dijkstra in Python over the same indexed edge lookups.
+
+def _hop_steps(direction: str, relationship_type: Optional[str], max_depth: int, columns: str,
+               condition: str = "") -> Tuple[List[str], List]:
+    """The recursive SELECT(s) following one edge out of ``hops``; ``{next}`` names the far endpoint."""
+    if direction not in ("out", "in", "both"):
+        raise ValueError(f"direction must be 'out', 'in' or 'both', not {direction!r}")
+    ends = {"out": [("source_id", "target_id")], "in": [("target_id", "source_id")]}
+    ends["both"] = ends["out"] + ends["in"]
+    steps, params = [], []
+    for near, far in ends[direction]:
+        step = (f"SELECT {columns.format(next=f'r.{far}')} FROM hops h "
+                f"JOIN relationships r ON r.{near} = h.id WHERE h.depth < ?")
+        params.append(max_depth)
+        if condition:
+            step += " AND " + condition.format(next=f"r.{far}")
+        if relationship_type:
+            step += " AND r.relationship_type = ?"
+            params.append(relationship_type)
+        steps.append(step)
+    return steps, params
+
+def traverse_k_hop(db_path: str, entity_id: str, max_depth: int = 2, relationship_type: Optional[str] = None,
+                   direction: str = "out") -> Iterator[Tuple[str, int]]:
+    """Stream (entity_id, depth) for every entity within ``max_depth`` hops, nearest first."""
+    steps, params = _hop_steps(direction, relationship_type, max_depth, "{next}, h.depth + 1")
+    query = f'''
+        WITH RECURSIVE hops(id, depth) AS (
+            SELECT ?, 0
+            UNION
+            {" UNION ".join(steps)}
+        )
+        SELECT id, MIN(depth) AS depth FROM hops WHERE id != ? GROUP BY id ORDER BY depth
+    '''
+    for row in get_db_connection(db_path).execute(query, [entity_id, *params, entity_id]):
+        yield row["id"], row["depth"]
+
+def reachable(db_path: str, source_id: str, target_id: str, max_depth: int = 6,
+              relationship_type: Optional[str] = None, direction: str = "out") -> Optional[int]:
+    """Hop count of the shortest route from source to target, or None if not reachable within ``max_depth``."""
+    steps, params = _hop_steps(direction, relationship_type, max_depth, "{next}, h.depth + 1")
+    query = f'''
+        WITH RECURSIVE hops(id, depth) AS (
+            SELECT ?, 0
+            UNION
+            {" UNION ".join(steps)}
+        )
+        SELECT MIN(depth) AS depth FROM hops WHERE id = ?
+    '''
+    row = get_db_connection(db_path).execute(query, [source_id, *params, target_id]).fetchone()
+    return row["depth"]
+
+def weighted_shortest_path(db_path: str, source_id: str, target_id: str, max_depth: int = 6,
+                           relationship_type: Optional[str] = None,
+                           direction: str = "out") -> Optional[Tuple[List[str], float]]:
+    """Cheapest path by ``strength`` (each edge costs 1 / strength), as (entity ids, cost).
+
+    Dijkstra over the indexed edge lookups: paths are popped cheapest-first, and
+    one reaching a node with no fewer hops than a cheaper path already popped
+    there is dropped, so each node is expanded at most ``max_depth`` + 1 times.
+    Edges with strength <= 0 are skipped. Returns None if no path of at most
+    ``max_depth`` edges exists.
+    """
+    if direction not in ("out", "in", "both"):
+        raise ValueError(f"direction must be 'out', 'in' or 'both', not {direction!r}")
+    ends = {"out": [("source_id", "target_id")], "in": [("target_id", "source_id")]}
+    ends["both"] = ends["out"] + ends["in"]
+    queries = [f"SELECT {far} AS id, strength FROM relationships WHERE {near} = ? AND strength > 0"
+               + (" AND relationship_type = ?" if relationship_type else "")
+               for near, far in ends[direction]]
+    conn = get_db_connection(db_path)
+    neighbours: Dict[str, List[Tuple[str, float]]] = {}
+    fewest_hops: Dict[str, int] = {}  # node -> fewest hops among the cheaper paths popped there
+    heap = [(0.0, 0, source_id, (source_id,))]
+    while heap:
+        cost, depth, node, path = heapq.heappop(heap)
+        if node == target_id:
+            return list(path), cost
+        if fewest_hops.get(node, max_depth + 1) <= depth:
+            continue
+        fewest_hops[node] = depth
+        if depth == max_depth:
+            continue
+        if node not in neighbours:
+            params = [node, relationship_type] if relationship_type else [node]
+            neighbours[node] = [(row["id"], row["strength"]) for query in queries
+                                for row in conn.execute(query, params)]
+        for nxt, strength in neighbours[node]:
+            if nxt not in path:
+                heapq.heappush(heap, (cost + 1.0 / strength, depth + 1, nxt, path + (nxt,)))
+    return None
+
+# --- Bulk writes ---
+def insert_or_replace_entities(db_path: str, entities: Iterable[Tuple[str, str, str, Dict, str, str]]) -> int:
+    """Insert or replace many entities in one transaction.
+
+    ``entities`` yields (entity_id, entity_type, name, properties, created_at, updated_at).
+    Returns the number of rows written.
+    """
+    rows = ((entity_id, entity_type, name, json.dumps(properties), created_at, updated_at)
+            for entity_id, entity_type, name, properties, created_at, updated_at in entities)
+    with transaction(db_path) as conn:
+        return conn.executemany('''
+            INSERT OR REPLACE INTO entities (id, type, name, properties, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows).rowcount
+
+def upsert_entities(db_path: str, entities: Iterable[Tuple[str, str, str, Dict, str, str]]) -> int:
+    """Like insert_or_replace_entities, but existing rows keep created_at and access_count."""
+    rows = ((entity_id, entity_type, name, json.dumps(properties), created_at, updated_at)
+            for entity_id, entity_type, name, properties, created_at, updated_at in entities)
+    with transaction(db_path) as conn:
+        return conn.executemany('''
+            INSERT INTO entities (id, type, name, properties, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                type = excluded.type, name = excluded.name,
+                properties = excluded.properties, updated_at = excluded.updated_at
+        ''', rows).rowcount
+
+def insert_relationships(db_path: str, relationships: Iterable[Tuple[str, str, str, Dict, float, str]]) -> int:
+    """Insert many relationships in one transaction.
+
+    ``relationships`` yields (source_id, target_id, relationship_type, properties, strength, created_at).
+    Returns the number of rows written.
+    """
+    rows = ((source_id, target_id, relationship_type, json.dumps(properties), strength, created_at)
+            for source_id, target_id, relationship_type, properties, strength, created_at in relationships)
+    with transaction(db_path) as conn:
+        return conn.executemany('''
+            INSERT INTO relationships (source_id, target_id, relationship_type, properties, strength, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows).rowcount
 
 # Add more helper functions for other tables (outcomes, expectations, context)
 # and for deletion, updates, etc.
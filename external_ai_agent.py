@@ -3,6 +3,7 @@ import openai
 import httpx
 import pinecone
 from abc import ABC, abstractmethod
+from utils.llm_cache import get_default_cache
 
 class ExternalAIToolAdapter(ABC):
     @abstractmethod
@@ -10,17 +11,24 @@ class ExternalAIToolAdapter(ABC):
         pass
 
 class OpenAIAdapter(ExternalAIToolAdapter):
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache=None, use_cache: bool = True):
         openai.api_key = api_key
+        self.cache = (cache or get_default_cache()) if use_cache else None
 
     async def call(self, data, parameters: dict) -> dict:
         prompt = parameters.get('prompt', data)
         model = parameters.get('model', 'gpt-3.5-turbo')
-        resp = await openai.ChatCompletion.acreate(
-            model=model,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return {"result": resp['choices'][0]['message']['content']}
+
+        async def _complete(p):
+            resp = await openai.ChatCompletion.acreate(
+                model=model,
+                messages=[{"role": "user", "content": p}]
+            )
+            return {"result": resp['choices'][0]['message']['content']}
+
+        if self.cache is None or parameters.get('no_cache'):
+            return await _complete(prompt)
+        return await self.cache.acached_call(prompt, _complete, {"provider": "openai", "model": model})
 
 class HuggingFaceAdapter(ExternalAIToolAdapter):
     def __init__(self, api_key: str, model_url: str):
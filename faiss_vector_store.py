@@ -5,6 +5,7 @@ import threading
 import logging
 from abc import ABC, abstractmethod
 from typing import Any, Callable, List, Optional, Dict, Tuple
+from bm25_index import BM25Index
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("FAISSVectorStore")
@@ -43,7 +44,7 @@ class VectorStore(ABC):
         pass
 
 class FAISSVectorStore(VectorStore):
-    def __init__(self, dim: int, index_type: str = 'flat', nlist: int = 100, hnsw_m: int = 32):
+    def __init__(self, dim: int, index_type: str = 'flat', nlist: int = 100, hnsw_m: int = 32, text_key: str = 'text'):
         self.dim = dim
         self.lock = threading.Lock()
         self.index_type = index_type
@@ -53,6 +54,9 @@ class FAISSVectorStore(VectorStore):
         self.metadata: List[Any] = []
         self.id_to_idx: Dict[Any, int] = {}
         self.idx_to_id: Dict[int, Any] = {}
+        # Lexical side of hybrid retrieval, keyed by the same row index as the FAISS index.
+        self.text_key = text_key
+        self.keyword_index = BM25Index()
         logger.info(f"Initialized FAISSVectorStore with index_type={index_type}, dim={dim}")
 
     def _init_index(self):
@@ -81,6 +85,7 @@ class FAISSVectorStore(VectorStore):
             self.index.add(vector)
             idx = len(self.metadata)
             self.metadata.append(metadata)
+            self._index_text(idx, metadata)
             if uid is not None:
                 self.id_to_idx[uid] = idx
                 self.idx_to_id[idx] = uid
@@ -98,6 +103,8 @@ class FAISSVectorStore(VectorStore):
                 self.metadata.extend(metadatas)
             else:
                 self.metadata.extend([None] * n)
+            for i in range(n):
+                self._index_text(start_idx + i, self.metadata[start_idx + i])
             if uids:
                 for i, uid in enumerate(uids):
                     idx = start_idx + i
@@ -111,13 +118,35 @@ class FAISSVectorStore(VectorStore):
             D, I = self.index.search(query_vector, top_k)
             results = []
             for dist, idx in zip(D[0], I[0]):
-                if idx < len(self.metadata):
+                if 0 <= idx < len(self.metadata):
                     if return_scores:
                         results.append((self.metadata[idx], float(dist), self.idx_to_id.get(idx)))
                     else:
                         results.append(self.metadata[idx])
             return results
 
+    def _index_text(self, idx, metadata):
+        if isinstance(metadata, dict) and metadata.get(self.text_key):
+            self.keyword_index.add(idx, str(metadata[self.text_key]))
+
+    def _rebuild_keyword_index(self):
+        self.keyword_index.clear()
+        for idx, metadata in enumerate(self.metadata):
+            self._index_text(idx, metadata)
+
+    def keyword_search(self, query_text: str, top_k=5, return_scores=False):
+        # BM25 scoring runs under the keyword index's own lock so it can overlap a FAISS search.
+        hits = self.keyword_index.search(query_text, top_k)
+        with self.lock:
+            results = []
+            for idx, score in hits:
+                if idx < len(self.metadata) and self.metadata[idx] is not None:
+                    if return_scores:
+                        results.append((self.metadata[idx], float(score), self.idx_to_id.get(idx)))
+                    else:
+                        results.append(self.metadata[idx])
+            return results
+
     def search_batch(self, query_vectors, top_k=5, return_scores=False):
         with self.lock:
             query_vectors = np.array(query_vectors).astype('float32')
@@ -126,7 +155,7 @@ class FAISSVectorStore(VectorStore):
             for dists, indices in zip(D, I):
                 batch_result = []
                 for dist, idx in zip(dists, indices):
-                    if idx < len(self.metadata):
+                    if 0 <= idx < len(self.metadata):
                         if return_scores:
                             batch_result.append((self.metadata[idx], float(dist), self.idx_to_id.get(idx)))
                         else:
@@ -180,6 +209,7 @@ class FAISSVectorStore(VectorStore):
                 self.index_type = data['index_type']
                 self.nlist = data['nlist']
                 self.hnsw_m = data['hnsw_m']
+            self._rebuild_keyword_index()
             logger.info(f"Loaded index from {index_path} and metadata from {meta_path}")
 
     # FAISS does not support true deletion; this is a workaround
@@ -188,6 +218,7 @@ class FAISSVectorStore(VectorStore):
             idx = self.id_to_idx.get(uid)
             if idx is not None and idx < len(self.metadata):
                 self.metadata[idx] = None
+                self.keyword_index.remove(idx)
                 logger.info(f"Marked uid={uid} as deleted.")
 
     def update(self, uid, new_vector, new_metadata=None):
@@ -0,0 +1,363 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, List, Optional
+
+try:
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    HF_AVAILABLE = True
+except ImportError:
+    HF_AVAILABLE = False
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("GenerationServer")
+
+_DONE = object()
+
+
+@dataclass
+class GenerationRequest:
+    prompt: str
+    max_new_tokens: int
+    temperature: float
+    loop: asyncio.AbstractEventLoop
+    out: asyncio.Queue
+    input_ids: List[int] = field(default_factory=list)
+    generated: List[int] = field(default_factory=list)
+    emitted_text: str = ""
+    # Per-sequence legacy KV cache, only held between prefill and joining the batch.
+    past: Any = None
+    cancelled: bool = False
+    submitted_at: float = field(default_factory=time.time)
+
+    @property
+    def cached_len(self):
+        # The last sampled token has not been fed through the model yet.
+        return len(self.input_ids) + len(self.generated) - 1
+
+
+def _to_legacy(past_key_values):
+    if hasattr(past_key_values, "to_legacy_cache"):
+        return past_key_values.to_legacy_cache()
+    return past_key_values
+
+
+def _to_model_cache(legacy):
+    try:
+        from transformers import DynamicCache
+        if hasattr(DynamicCache, "from_legacy_cache"):
+            return DynamicCache.from_legacy_cache(legacy)
+    except ImportError:
+        pass
+    return legacy
+
+
+def _model_device(model):
+    device = getattr(model, "device", None)
+    if device is None:
+        parameter = next(model.parameters(), None)
+        device = parameter.device if parameter is not None else "cpu"
+    return torch.device(device)
+
+
+class BatchScheduler:
+    """Admission, streaming and the server thread of a continuous-batching generator.
+
+    A single background thread owns the model. Requests are admitted between
+    decoding steps up to ``max_concurrency``; each decoding step advances every
+    active sequence by one token, and finished ones leave without waiting for
+    the rest. Subclasses supply the model: ``_prefill_tokens(req)`` runs a newly
+    admitted prompt and returns its first token, ``_decode(batch)`` returns the
+    next token of every sequence in ``batch``. A failed prefill fails only its
+    own request; a failed decoding step fails the whole batch.
+    """
+
+    def __init__(self, tokenizer, max_concurrency: int = 8, max_queue: int = 0):
+        self.tokenizer = tokenizer
+        self.max_concurrency = max_concurrency
+        self.eos_token_id = tokenizer.eos_token_id
+        self._incoming: "queue.Queue[GenerationRequest]" = queue.Queue(maxsize=max_queue)
+        self._active: List[GenerationRequest] = []
+        self._membership_changed = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"requests": 0, "tokens": 0, "steps": 0, "batched_rows": 0}
+
+    # --- Lifecycle ---
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="generation-server", daemon=True)
+            self._thread.start()
+            logger.info(f"Generation server started (max_concurrency={self.max_concurrency})")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # --- Client API ---
+    async def stream(self, prompt: str, max_new_tokens: int = 50, temperature: float = 0.0) -> AsyncIterator[str]:
+        self.start()
+        loop = asyncio.get_running_loop()
+        req = GenerationRequest(prompt, max_new_tokens, temperature, loop, asyncio.Queue())
+        # A full queue blocks here (off the event loop) rather than growing without bound.
+        await loop.run_in_executor(None, self._incoming.put, req)
+        try:
+            while True:
+                item = await req.out.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            req.cancelled = True
+
+    async def generate(self, prompt: str, max_new_tokens: int = 50, temperature: float = 0.0) -> str:
+        # Mirrors pipeline("text-generation"): the prompt is part of generated_text.
+        pieces = [piece async for piece in self.stream(prompt, max_new_tokens, temperature)]
+        return prompt + "".join(pieces)
+
+    # --- Server loop ---
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._tick()
+            except Exception as e:
+                logger.exception("Generation step failed")
+                for req in self._active:
+                    self._emit(req, e)
+                self._active = []
+                self._reset_batch()
+
+    def _tick(self):
+        self._admit(block=not self._active)
+        if self._active:
+            self._step()
+
+    def _admit(self, block: bool):
+        while len(self._active) < self.max_concurrency:
+            try:
+                req = self._incoming.get(timeout=0.05) if block else self._incoming.get_nowait()
+            except queue.Empty:
+                return
+            block = False
+            if req.cancelled:
+                continue
+            try:
+                self._prefill(req)
+            except Exception as e:
+                # The request is not in the batch yet, so only its own stream hears about it.
+                logger.exception("Prefill failed")
+                self._emit(req, e)
+
+    def _prefill(self, req: GenerationRequest):
+        token = self._prefill_tokens(req)
+        self.stats["requests"] += 1
+        if not self._accept(req, token):
+            self._active.append(req)
+            self._membership_changed = True
+
+    def _step(self):
+        if self._membership_changed:
+            self._repack()
+        batch = self._active
+        if not batch:
+            return
+        tokens = self._decode(batch)
+        self.stats["steps"] += 1
+        self.stats["batched_rows"] += len(batch)
+        for req, token in zip(batch, tokens):
+            if self._accept(req, token):
+                self._membership_changed = True
+
+    def _repack(self):
+        """Drops finished and cancelled sequences once membership has changed."""
+        self._active = [req for req in self._active if not (req.cancelled or self._is_finished(req))]
+        self._membership_changed = False
+
+    def _reset_batch(self):
+        pass
+
+    def _prefill_tokens(self, req: GenerationRequest) -> int:
+        raise NotImplementedError
+
+    def _decode(self, batch: List[GenerationRequest]) -> List[int]:
+        raise NotImplementedError
+
+    def _is_finished(self, req: GenerationRequest) -> bool:
+        if not req.generated:
+            return False
+        return len(req.generated) >= req.max_new_tokens or req.generated[-1] == self.eos_token_id
+
+    def _accept(self, req: GenerationRequest, token: int) -> bool:
+        """Records a sampled token, streams its text delta and returns True when the request is done."""
+        req.generated.append(token)
+        self.stats["tokens"] += 1
+        text = self.tokenizer.decode(req.generated, skip_special_tokens=True)
+        delta, req.emitted_text = text[len(req.emitted_text):], text
+        if delta:
+            self._emit(req, delta)
+        if req.cancelled or self._is_finished(req):
+            self._emit(req, _DONE)
+            return True
+        return False
+
+    @staticmethod
+    def _emit(req: GenerationRequest, item):
+        req.loop.call_soon_threadsafe(req.out.put_nowait, item)
+
+
+class ContinuousBatchingServer(BatchScheduler):
+    """Continuous-batching text generation over a HuggingFace causal LM.
+
+    The model is used on the device it already lives on (it may be shared with
+    a pipeline); only an explicit ``device`` moves it. Every decoding step runs
+    one batched forward pass over all active sequences. The batched KV cache is
+    reused as-is while membership is unchanged and only re-packed (left-padded)
+    when sequences join or leave.
+    """
+
+    def __init__(self, model, tokenizer, max_concurrency: int = 8, max_queue: int = 0, device: Optional[str] = None):
+        if not HF_AVAILABLE:
+            raise ImportError("HuggingFace Transformers and torch are required for the generation server.")
+        super().__init__(tokenizer, max_concurrency, max_queue)
+        self.model = model
+        if device is None:
+            self.device = _model_device(model)
+        else:
+            self.device = torch.device(device)
+            self.model.to(self.device)
+        self.model.eval()
+        self._batch_cache = None
+        self._batch_mask = None
+
+    @classmethod
+    def from_pretrained(cls, model_name: str = "gpt2", **kwargs):
+        if not HF_AVAILABLE:
+            raise ImportError("HuggingFace Transformers and torch are required for the generation server.")
+        kwargs.setdefault("device", "cuda" if torch.cuda.is_available() else "cpu")
+        return cls(AutoModelForCausalLM.from_pretrained(model_name), AutoTokenizer.from_pretrained(model_name), **kwargs)
+
+    # --- Model ---
+    def _tick(self):
+        with torch.no_grad():
+            super()._tick()
+
+    def _reset_batch(self):
+        self._batch_cache = None
+
+    def _prefill_tokens(self, req: GenerationRequest) -> int:
+        req.input_ids = self.tokenizer(req.prompt, return_tensors="pt")["input_ids"][0].tolist()
+        input_ids = torch.tensor([req.input_ids], device=self.device)
+        out = self.model(input_ids=input_ids, use_cache=True)
+        req.past = _to_legacy(out.past_key_values)
+        return self._sample(out.logits[:, -1, :], [req.temperature])[0]
+
+    def _decode(self, batch: List[GenerationRequest]) -> List[int]:
+        input_ids = torch.tensor([[req.generated[-1]] for req in batch], device=self.device)
+        position_ids = torch.tensor([[req.cached_len] for req in batch], device=self.device)
+        mask = torch.cat([self._batch_mask, torch.ones((len(batch), 1), dtype=self._batch_mask.dtype, device=self.device)], dim=1)
+        out = self.model(
+            input_ids=input_ids,
+            past_key_values=_to_model_cache(self._batch_cache),
+            attention_mask=mask,
+            position_ids=position_ids,
+            use_cache=True,
+        )
+        self._batch_cache = _to_legacy(out.past_key_values)
+        self._batch_mask = mask
+        return self._sample(out.logits[:, -1, :], [req.temperature for req in batch])
+
+    def _repack(self):
+        """Rebuilds the left-padded batch cache from the surviving and newly admitted sequences."""
+        survivors, caches = [], []
+        for row, req in enumerate(self._active):
+            if req.cancelled or self._is_finished(req):
+                continue
+            if req.past is None:
+                # Already in the batch: slice its row and drop left padding.
+                n = req.cached_len
+                req.past = tuple((k[row:row + 1, :, -n:, :], v[row:row + 1, :, -n:, :]) for k, v in self._batch_cache)
+            survivors.append(req)
+            caches.append(req.past)
+        self._active = survivors
+        self._membership_changed = False
+        if not survivors:
+            self._batch_cache = None
+            return
+        lengths = [req.cached_len for req in survivors]
+        max_len = max(lengths)
+        layers = []
+        for layer in range(len(caches[0])):
+            keys, values = [], []
+            for cache, n in zip(caches, lengths):
+                k, v = cache[layer]
+                pad = max_len - n
+                if pad:
+                    k = torch.nn.functional.pad(k, (0, 0, pad, 0))
+                    v = torch.nn.functional.pad(v, (0, 0, pad, 0))
+                keys.append(k)
+                values.append(v)
+            layers.append((torch.cat(keys, dim=0), torch.cat(values, dim=0)))
+        self._batch_cache = tuple(layers)
+        mask = torch.zeros((len(survivors), max_len), dtype=torch.long, device=self.device)
+        for i, n in enumerate(lengths):
+            mask[i, max_len - n:] = 1
+        self._batch_mask = mask
+        for req in survivors:
+            req.past = None
+
+    def _sample(self, logits, temperatures):
+        tokens = []
+        for row, temperature in enumerate(temperatures):
+            if temperature and temperature > 0:
+                probs = torch.softmax(logits[row] / temperature, dim=-1)
+                tokens.append(int(torch.multinomial(probs, 1)))
+            else:
+                tokens.append(int(torch.argmax(logits[row])))
+        return tokens
+
+
+# --- LOAD TEST ---
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare AsyncLLMWrapper against continuous batching.")
+    parser.add_argument("--model", default="gpt2")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    if not HF_AVAILABLE:
+        print("HuggingFace Transformers and torch are required for this load test.")
+    else:
+        from super_advanced_agents import AsyncLLMWrapper, LLMGenerator
+
+        prompts = [f"Request {i}: the most interesting fact about the number {i} is" for i in range(args.requests)]
+
+        async def run(label, call):
+            start = time.perf_counter()
+            outputs = await asyncio.gather(*(call(p) for p in prompts))
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {len(outputs)} requests in {elapsed:.2f}s ({len(outputs) / elapsed:.2f} req/s)")
+
+        async def main():
+            llm = LLMGenerator(args.model, use_cache=False)
+            wrapper = AsyncLLMWrapper(llm, max_workers=args.concurrency)
+            tokenizer = llm.generator.tokenizer
+            await run("AsyncLLMWrapper", lambda p: wrapper.agenerate(p, max_length=len(tokenizer(p)["input_ids"]) + args.max_new_tokens))
+            server = llm.serve(max_concurrency=args.concurrency)
+            await run("ContinuousBatchingServer", lambda p: server.generate(p, max_new_tokens=args.max_new_tokens))
+            stats = server.stats
+            print(f"Average batch size: {stats['batched_rows'] / max(stats['steps'], 1):.2f}")
+            server.stop()
+
+        asyncio.run(main())
@@ -0,0 +1,229 @@
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# --- Column Registry ---
+# A column function maps a CandidateBatch (plus the per-query context) to one
+# float array of length len(batch). Registering a new column is all it takes to
+# make it available as a weighted feature in HybridScorer.
+ColumnFn = Callable[["CandidateBatch", Dict[str, Any]], np.ndarray]
+SCORING_COLUMNS: Dict[str, ColumnFn] = {}
+
+
+def register_column(name: str):
+    def decorator(func: ColumnFn) -> ColumnFn:
+        SCORING_COLUMNS[name] = func
+        return func
+    return decorator
+
+
+# --- Candidate Batch ---
+class CandidateBatch:
+    """Columnar view over (metadata, distance, uid) search results.
+
+    Deleted entries (``metadata is None``) are dropped on construction. Derived
+    columns such as lower-cased text or timestamps are built once and cached.
+    """
+
+    def __init__(self, results: Sequence[Tuple[Any, float, Any]]):
+        live = [r for r in results if r[0]]
+        self.metas: List[dict] = [r[0] for r in live]
+        self.uids: List[Any] = [r[2] for r in live]
+        self.distances = np.fromiter((r[1] for r in live), dtype=np.float32, count=len(live))
+        self._cache: Dict[str, np.ndarray] = {}
+
+    def __len__(self):
+        return len(self.metas)
+
+    def field(self, key: str, default: Any = 0.0, dtype=np.float64) -> np.ndarray:
+        cache_key = f"field:{key}"
+        if cache_key not in self._cache:
+            self._cache[cache_key] = np.fromiter(
+                (m.get(key, default) for m in self.metas), dtype=dtype, count=len(self.metas)
+            )
+        return self._cache[cache_key]
+
+    def lower_text(self) -> np.ndarray:
+        if "lower_text" not in self._cache:
+            self._cache["lower_text"] = np.char.lower(
+                np.array([m.get("text", "") for m in self.metas], dtype=str)
+            )
+        return self._cache["lower_text"]
+
+    def keyword_hits(self, keyword: Optional[str]) -> np.ndarray:
+        if not keyword or not len(self):
+            return np.zeros(len(self), dtype=np.float64)
+        return (np.char.find(self.lower_text(), keyword.lower()) >= 0).astype(np.float64)
+
+    def equals(self, key: str, value: Any) -> np.ndarray:
+        return np.fromiter((m.get(key) == value for m in self.metas), dtype=bool, count=len(self.metas))
+
+    def take(self, indices: np.ndarray, scores: np.ndarray) -> List[Tuple[dict, float, Any]]:
+        return [(self.metas[i], float(scores[i]), self.uids[i]) for i in indices]
+
+
+# --- Built-in Columns ---
+@register_column("vector")
+def vector_column(batch: CandidateBatch, context: Dict[str, Any]) -> np.ndarray:
+    return 1.0 / (1.0 + batch.distances.astype(np.float64))
+
+
+@register_column("keyword")
+def keyword_column(batch: CandidateBatch, context: Dict[str, Any]) -> np.ndarray:
+    return batch.keyword_hits(context.get("keyword"))
+
+
+@register_column("recency")
+def recency_column(batch: CandidateBatch, context: Dict[str, Any]) -> np.ndarray:
+    now = context.get("now", time.time())
+    timestamps = batch.field("timestamp", default=now)
+    return 1.0 / (1.0 + (now - timestamps))
+
+
+@register_column("priority")
+def priority_column(batch: CandidateBatch, context: Dict[str, Any]) -> np.ndarray:
+    priorities = batch.field("priority", default=1.0)
+    peak = priorities.max() if len(priorities) else 0.0
+    return priorities / peak if peak > 0 else priorities
+
+
+@register_column("llm")
+def llm_column(batch: CandidateBatch, context: Dict[str, Any]) -> np.ndarray:
+    llm_generator = context.get("llm_generator")
+    scores = np.zeros(len(batch), dtype=np.float64)
+    if llm_generator is None:
+        return scores
+    query_text = context.get("query_text", "")
+    for i, meta in enumerate(batch.metas):
+        prompt = f"How relevant is the following memory to the query '{query_text}'? Memory: {meta['text']}\nScore 1-10:"
+        llm_out = llm_generator.generate(prompt, max_length=20)
+        try:
+            scores[i] = float(''.join(filter(str.isdigit, llm_out))) / 10.0
+        except Exception:
+            scores[i] = 0.0
+    return scores
+
+
+# --- Scorer ---
+class HybridScorer:
+    """Weights registered feature columns with a single matrix-vector product."""
+
+    def __init__(self, weights: Dict[str, float], columns: Optional[Dict[str, ColumnFn]] = None):
+        self.columns = dict(SCORING_COLUMNS)
+        if columns:
+            self.columns.update(columns)
+        unknown = [name for name in weights if name not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown scoring columns: {unknown}")
+        # Zero-weight columns are never computed (some, like LLM relevance, are costly).
+        self.names = [name for name, w in weights.items() if w]
+        self.weight_vector = np.array([weights[name] for name in self.names], dtype=np.float64)
+
+    def feature_matrix(self, batch: CandidateBatch, context: Dict[str, Any]) -> np.ndarray:
+        matrix = np.empty((len(batch), len(self.names)), dtype=np.float64)
+        for j, name in enumerate(self.names):
+            matrix[:, j] = self.columns[name](batch, context)
+        return matrix
+
+    def score(self, batch: CandidateBatch, context: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        if not len(batch) or not self.names:
+            return np.zeros(len(batch), dtype=np.float64)
+        return self.feature_matrix(batch, context or {}) @ self.weight_vector
+
+    def rank(self, batch: CandidateBatch, top_k: int, context: Optional[Dict[str, Any]] = None,
+             mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (indices, scores) of the best ``top_k`` candidates, highest first."""
+        scores = self.score(batch, context)
+        candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(batch))
+        return top_k_indices(scores, top_k, candidates), scores
+
+
+def top_k_indices(scores: np.ndarray, top_k: int, candidates: Optional[np.ndarray] = None) -> np.ndarray:
+    if candidates is None:
+        candidates = np.arange(len(scores))
+    if top_k <= 0 or not len(candidates):
+        return candidates[:0]
+    subset = scores[candidates]
+    if top_k < len(candidates):
+        part = np.sort(np.argpartition(-subset, top_k - 1)[:top_k])
+    else:
+        part = np.arange(len(candidates))
+    # Only the selected slice is fully sorted; stable so equal scores keep search order.
+    order = part[np.argsort(-subset[part], kind="stable")]
+    return candidates[order]
+
+
+
+# --- Result Fusion ---
+def _result_key(result):
+    meta, _, uid = result
+    return uid if uid is not None else id(meta)
+
+
+def reciprocal_rank_fusion(ranked_lists: Sequence[Sequence[Tuple[Any, float, Any]]], k: int = 60,
+                           weights: Optional[Sequence[float]] = None) -> List[Tuple[Any, float, Any]]:
+    """Merges ranked (metadata, score, uid) lists by sum of weight / (k + rank)."""
+    weights = weights or [1.0] * len(ranked_lists)
+    fused: Dict[Any, List[Any]] = {}
+    for weight, results in zip(weights, ranked_lists):
+        for rank, result in enumerate(results, start=1):
+            if not result[0]:
+                continue
+            entry = fused.setdefault(_result_key(result), [result[0], 0.0, result[2]])
+            entry[1] += weight / (k + rank)
+    return sorted((tuple(entry) for entry in fused.values()), key=lambda r: -r[1])
+
+
+def weighted_fusion(vector_results: Sequence[Tuple[Any, float, Any]], keyword_results: Sequence[Tuple[Any, float, Any]],
+                    weights: Optional[Dict[str, float]] = None) -> List[Tuple[Any, float, Any]]:
+    """Merges vector (L2 distance) and keyword (BM25) results on normalised scores."""
+    weights = weights or {"vector": 0.5, "keyword": 0.5}
+    fused: Dict[Any, List[Any]] = {}
+    vector_batch = CandidateBatch(vector_results)
+    for meta, score, uid in zip(vector_batch.metas, vector_column(vector_batch, {}), vector_batch.uids):
+        entry = fused.setdefault(_result_key((meta, 0.0, uid)), [meta, 0.0, uid])
+        entry[1] += weights.get("vector", 0.0) * float(score)
+    keyword_batch = CandidateBatch(keyword_results)
+    if len(keyword_batch):
+        bm25 = keyword_batch.distances.astype(np.float64)
+        peak = bm25.max()
+        bm25 = bm25 / peak if peak > 0 else bm25
+        for meta, score, uid in zip(keyword_batch.metas, bm25, keyword_batch.uids):
+            entry = fused.setdefault(_result_key((meta, 0.0, uid)), [meta, 0.0, uid])
+            entry[1] += weights.get("keyword", 0.0) * float(score)
+    return sorted((tuple(entry) for entry in fused.values()), key=lambda r: -r[1])
+
+
+def fuse_results(vector_results, keyword_results, method: str = "rrf", weights: Optional[Dict[str, float]] = None):
+    if method == "rrf":
+        weights = weights or {}
+        return reciprocal_rank_fusion(
+            [vector_results, keyword_results],
+            weights=[weights.get("vector", 1.0), weights.get("keyword", 1.0)],
+        )
+    if method == "weighted":
+        return weighted_fusion(vector_results, keyword_results, weights)
+    raise ValueError(f"Unknown fusion method: {method}")
+
+# --- DEMO / BENCHMARK ---
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    now = time.time()
+    n = 1000
+    candidates = [
+        ({"text": f"memory {i} {'louvre' if i % 7 == 0 else 'museum'}",
+          "timestamp": now - rng.uniform(0, 3600), "priority": int(rng.integers(1, 4))},
+         float(rng.uniform(0, 2)), f"id{i}")
+        for i in range(n)
+    ]
+    scorer = HybridScorer({"vector": 0.5, "keyword": 0.2, "recency": 0.2, "priority": 0.1})
+    runs = 100
+    start = time.perf_counter()
+    for _ in range(runs):
+        batch = CandidateBatch(candidates)
+        indices, scores = scorer.rank(batch, 10, {"keyword": "Louvre", "now": now})
+    elapsed_ms = (time.perf_counter() - start) * 1000 / runs
+    print(f"Re-ranked {n} candidates in {elapsed_ms:.2f} ms/query")
+    for meta, score, uid in batch.take(indices[:3], scores):
+        print(f"UID: {uid}, Score: {score:.4f}, Text: {meta['text']}")
@@ -1,8 +1,10 @@
 import os
 import logging
 import asyncio
-from fastapi import FastAPI, HTTPException, Depends, Request
-from fastapi.responses import JSONResponse
+import io
+import json
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -10,7 +12,7 @@ from slowapi.errors import RateLimitExceeded
 from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
-from kg_engine_async import AsyncKnowledgeGraphEngine, EntityType, RelationshipType, Entity, Relationship
+from kg_engine_async import AsyncKnowledgeGraphEngine, EntityType, RelationshipType, Entity, Relationship, EXPORT_TABLES, row_to_record
 from api.auth import get_current_user, authenticate_user, create_access_token
 
 app = FastAPI()
@@ -21,6 +23,23 @@ Instrumentator().instrument(app).expose(app)
 
 kg = AsyncKnowledgeGraphEngine()
 
+@app.on_event("startup")
+async def startup():
+    await kg._connection()
+    # Loads ids, types and edges only; entity bodies are hydrated on first access.
+    await kg.warm_start()
+
+@app.middleware("http")
+async def record_first_request(request: Request, call_next):
+    response = await call_next(request)
+    if response.status_code < 500:
+        kg.mark_request_served()
+    return response
+
+@app.on_event("shutdown")
+async def shutdown():
+    await kg.close()
+
 class EntityIn(BaseModel):
     type: EntityType
     name: str
@@ -57,8 +76,9 @@ async def add_entity(request: Request, entity: EntityIn, user=Depends(get_curren
 
 @app.get('/entities/{entity_id}')
 @limiter.limit("30/minute")
-async def get_entity(request: Request, entity_id: str, user=Depends(get_current_user)):
-    ent = await kg.get_entity(entity_id)
+async def get_entity(request: Request, response: Response, entity_id: str, user=Depends(get_current_user)):
+    ent, version = await kg.read(lambda view: view.entity(entity_id))
+    response.headers["X-Graph-Version"] = str(version)
     if not ent:
         raise HTTPException(404, "Entity not found")
     return ent
@@ -78,18 +98,83 @@ async def get_relationship(request: Request, rel_id: str, user=Depends(get_curre
         raise HTTPException(404, "Relationship not found")
     return rel
 
+@app.delete('/relationships/{rel_id}')
+@limiter.limit("30/minute")
+async def delete_relationship(request: Request, rel_id: str, user=Depends(get_current_user)):
+    if not await kg.delete_relationship(rel_id):
+        raise HTTPException(404, "Relationship not found")
+    return {"deleted": rel_id}
+
+@app.get('/inferred')
+@limiter.limit("30/minute")
+async def inferred(request: Request, type: Optional[str] = None, source: Optional[str] = None, target: Optional[str] = None,
+                   user=Depends(get_current_user)):
+    # Materialized DatalogRule facts, kept current on every write.
+    return kg.inferred_facts(type, source, target)
+
 @app.get('/entities')
 @limiter.limit("30/minute")
-async def query_entities(request: Request, type: Optional[str] = None, name: Optional[str] = None, user=Depends(get_current_user)):
+async def query_entities(request: Request, response: Response, type: Optional[str] = None, name: Optional[str] = None,
+                         match: str = "substring", properties: bool = False, limit: int = 100, offset: int = 0,
+                         user=Depends(get_current_user)):
+    if match not in ("substring", "prefix", "fuzzy"):
+        raise HTTPException(400, "match must be substring, prefix or fuzzy")
     entity_type = EntityType(type) if type else None
-    results = await kg.query_entities(entity_type=entity_type, name_pattern=name)
-    return results
+    (page, total), version = await kg.read(lambda view: view.search_entities(
+        entity_type, name, match, properties, max(1, min(limit, 1000)), max(0, offset)))
+    response.headers["X-Total-Count"] = str(total)
+    response.headers["X-Graph-Version"] = str(version)
+    return page
+
+def _relationship_types(types: Optional[str]):
+    if not types:
+        return None
+    try:
+        return [RelationshipType(t) for t in types.split(",")]
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+@app.get('/entities/{entity_id}/neighbors')
+@limiter.limit("30/minute")
+async def entity_neighbors(request: Request, entity_id: str, direction: str = "out", types: Optional[str] = None, user=Depends(get_current_user)):
+    if direction not in ("out", "in", "both"):
+        raise HTTPException(400, "direction must be out, in or both")
+    return await kg.neighbors(entity_id, direction, _relationship_types(types))
+
+@app.get('/entities/{entity_id}/khop')
+@limiter.limit("30/minute")
+async def entity_k_hop(request: Request, entity_id: str, k: int = 2, direction: str = "out", types: Optional[str] = None, user=Depends(get_current_user)):
+    if direction not in ("out", "in", "both"):
+        raise HTTPException(400, "direction must be out, in or both")
+    k = max(1, min(k, 6))
+    return await kg.k_hop(entity_id, k, direction, _relationship_types(types))
+
+@app.get('/paths')
+@limiter.limit("30/minute")
+async def shortest_path(request: Request, source: str, target: str, direction: str = "out", max_depth: int = 6, types: Optional[str] = None, user=Depends(get_current_user)):
+    if direction not in ("out", "in", "both"):
+        raise HTTPException(400, "direction must be out, in or both")
+    path = await kg.shortest_path(source, target, direction, _relationship_types(types), max(1, min(max_depth, 12)))
+    if path is None:
+        raise HTTPException(404, "No path found")
+    return path
+
+@app.get('/subgraph')
+@limiter.limit("10/minute")
+async def subgraph(request: Request, seed: str, k: int = 1, direction: str = "both", types: Optional[str] = None, user=Depends(get_current_user)):
+    if direction not in ("out", "in", "both"):
+        raise HTTPException(400, "direction must be out, in or both")
+    return await kg.extract_subgraph(seed, max(1, min(k, 4)), direction, _relationship_types(types))
 
 @app.get('/reasoning')
 @limiter.limit("10/minute")
-async def reasoning(request: Request, query: str, user=Depends(get_current_user)):
-    # Example: pass query to engine's reasoning method
-    result = await kg.execute_reasoning(query)
+async def reasoning(request: Request, query: str, entity_id: Optional[str] = None, target_id: Optional[str] = None,
+                    max_depth: Optional[int] = None, rules: Optional[str] = None, trace: bool = False, user=Depends(get_current_user)):
+    # Rules such as dependency_closure only apply when the context names an entity.
+    context = {"entity_id": entity_id, "target_id": target_id, "max_depth": max_depth}
+    context = {key: value for key, value in context.items() if value is not None}
+    selected = [name.strip() for name in rules.split(",") if name.strip()] if rules else None
+    result = await kg.execute_reasoning(query, context=context, rules=selected, trace=trace)
     return result
 
 @app.get('/health', tags=["Admin"])
@@ -102,10 +187,7 @@ async def version():
 
 @app.get('/stats', tags=["Admin"])
 async def stats():
-    return {
-        "entity_count": len(kg.entities),
-        "relationship_count": len(kg.relationships)
-    }
+    return kg.stats()
 
 @app.post('/admin/reload', tags=["Admin"])
 async def admin_reload(user=Depends(get_current_user)):
@@ -115,19 +197,73 @@ async def admin_reload(user=Depends(get_current_user)):
     await kg.reload_rules_and_listeners()
     return {"status": "reloaded"}
 
+def _arrow_schema(kind: str):
+    import pyarrow as pa
+    numeric = {"access_count": pa.int64(), "version": pa.int64(), "validation_count": pa.int64(),
+               "confidence": pa.float64(), "weight": pa.float64()}
+    return pa.schema([(column, numeric.get(column, pa.string())) for column in EXPORT_TABLES[kind]])
+
+async def _export_ndjson(kinds, page_size: int):
+    for kind in kinds:
+        async for page in kg.iter_export(kind, page_size):
+            yield "".join(json.dumps(row_to_record(kind, row)) + "\n" for row in page)
+
+async def _export_arrow(kind: str, page_size: int):
+    import pyarrow as pa
+    schema = _arrow_schema(kind)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        async for page in kg.iter_export(kind, page_size):
+            columns = list(zip(*page))
+            writer.write_batch(pa.record_batch([pa.array(col, type=f.type) for col, f in zip(columns, schema)], schema=schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
 @app.get('/export', tags=["Admin"])
-async def export_graph(user=Depends(get_current_user)):
+async def export_graph(kind: str = "all", format: str = "ndjson", page_size: int = 1000, user=Depends(get_current_user)):
     if user["username"] != "admin":
         raise HTTPException(403, "Admin only")
-    # Placeholder: export as JSON
-    return {"entities": [e.__dict__ for e in kg.entities.values()], "relationships": [r.__dict__ for r in kg.relationships.values()]}
+    if kind != "all" and kind not in EXPORT_TABLES:
+        raise HTTPException(400, f"kind must be one of: all, {', '.join(EXPORT_TABLES)}")
+    page_size = max(1, min(page_size, 10000))
+    if format == "ndjson":
+        kinds = list(EXPORT_TABLES) if kind == "all" else [kind]
+        return StreamingResponse(_export_ndjson(kinds, page_size), media_type="application/x-ndjson")
+    if format == "arrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(501, "pyarrow is required for Arrow export")
+        if kind == "all":
+            raise HTTPException(400, "Arrow export needs kind=entities or kind=relationships")
+        return StreamingResponse(_export_arrow(kind, page_size), media_type="application/vnd.apache.arrow.stream")
+    raise HTTPException(400, "format must be ndjson or arrow")
+
+async def _ndjson_lines(request: Request):
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
 
 @app.post('/import', tags=["Admin"])
-async def import_graph(data: Dict[str, Any], user=Depends(get_current_user)):
+async def import_graph(request: Request, chunk_size: int = 1000, user=Depends(get_current_user)):
     if user["username"] != "admin":
         raise HTTPException(403, "Admin only")
-    # Placeholder: import entities/relationships
-    return {"status": "imported"}
+    # Body is NDJSON (one entity/relationship record per line); progress is streamed back per chunk.
+    chunk_size = max(1, min(chunk_size, 50000))
+
+    async def progress():
+        async for event in kg.import_records(_ndjson_lines(request), chunk_size=chunk_size):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
 
 @app.exception_handler(Exception)
 async def generic_exception_handler(request: Request, exc: Exception):
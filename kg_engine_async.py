@@ -1,26 +1,224 @@
 import aiosqlite
 import asyncio
 import logging
-from typing import Dict, Any, Optional, List, Set, Callable
+from typing import Dict, Any, Optional, List, Set, Callable, Tuple
 from datetime import datetime
 from collections import defaultdict
-from dataclasses import asdict
+from dataclasses import asdict, dataclass, field
+from enum import Enum
 import json
+import hashlib
 import importlib.util
 import os
+import time
+import uuid
+from collections import OrderedDict
 from abc import ABC, abstractmethod
+from kg_graph_index import AdjacencyIndex
+from kg_text_index import TrigramIndex
+from kg_inference import IncrementalReasoner
 
+try:
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("kg_engine_async")
+except ImportError:
+    _tracer = None
+from contextlib import nullcontext
+
+class EntityType(str, Enum):
+    CONCEPT = "CONCEPT"
+    PERSON = "PERSON"
+    ORGANIZATION = "ORGANIZATION"
+    LOCATION = "LOCATION"
+    EVENT = "EVENT"
+    DOCUMENT = "DOCUMENT"
+    AGENT = "AGENT"
+    TASK = "TASK"
+
+class RelationshipType(str, Enum):
+    RELATED_TO = "RELATED_TO"
+    DEPENDS_ON = "DEPENDS_ON"
+    PART_OF = "PART_OF"
+    IS_A = "IS_A"
+    CAUSES = "CAUSES"
+    LOCATED_IN = "LOCATED_IN"
+    CREATED_BY = "CREATED_BY"
+
+@dataclass
 class Entity:
-    pass
+    id: str
+    type: EntityType
+    name: str
+    properties: Dict[str, Any] = field(default_factory=dict)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    created_at: datetime = field(default_factory=datetime.now)
+    last_accessed: datetime = field(default_factory=datetime.now)
+    access_count: int = 0
+    confidence: float = 0.8
+    source_agent: Optional[str] = None
+    version: int = 1
+
+    def __post_init__(self):
+        if not self.id:
+            self.id = str(uuid.uuid4())
+
+@dataclass
 class Relationship:
-    pass
-class EntityType:
-    pass
-class RelationshipType:
-    pass
+    id: str
+    source_id: str
+    target_id: str
+    type: RelationshipType
+    weight: float = 1.0
+    confidence: float = 0.8
+    context: Dict[str, Any] = field(default_factory=dict)
+    temporal_validity: Optional[Tuple[datetime, datetime]] = None
+    conditions: List[Any] = field(default_factory=list)
+    evidence: List[Any] = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.now)
+    last_validated: datetime = field(default_factory=datetime.now)
+    validation_count: int = 0
+
+    def __post_init__(self):
+        if not self.id:
+            self.id = str(uuid.uuid4())
+
+RELATIONSHIP_TYPE_CODES = {rel_type: code for code, rel_type in enumerate(RelationshipType)}
+
+ENTITY_UPSERT_SQL = 'INSERT OR REPLACE INTO entities (id, type, name, properties, metadata, created_at, last_accessed, access_count, confidence, source_agent, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+RELATIONSHIP_DELETE_SQL = 'DELETE FROM relationships WHERE id = ?'
+RELATIONSHIP_UPSERT_SQL = 'INSERT OR REPLACE INTO relationships (id, source_id, target_id, type, weight, confidence, context, temporal_start, temporal_end, conditions, evidence, created_at, last_validated, validation_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+
+# Applied once to the engine's long-lived connection.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",     # durable at checkpoints; safe with WAL
+    "cache_size": -64000,        # negative = KiB, i.e. 64 MB page cache
+    "mmap_size": 268435456,      # 256 MB memory-mapped I/O
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+# Queue sentinel that stops the write-behind task after draining.
+_STOP_WRITER = object()
+
+# SQLite's default limit on bound parameters is 999.
+_HYDRATE_CHUNK = 500
+
+class LRUCache(OrderedDict):
+    """Size-bounded mapping that evicts the least recently used key; ``get`` counts as a use."""
+
+    def __init__(self, max_entries: int):
+        super().__init__()
+        self.max_entries = max_entries
+
+    def get(self, key, default=None):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        return default
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.max_entries:
+            self.popitem(last=False)
+
+def entity_row(entity: Entity) -> tuple:
+    return (
+        entity.id, entity.type.value, entity.name,
+        json.dumps(entity.properties), json.dumps(entity.metadata),
+        entity.created_at.isoformat(), entity.last_accessed.isoformat(),
+        entity.access_count, entity.confidence, entity.source_agent, entity.version
+    )
+
+def relationship_row(relationship: Relationship) -> tuple:
+    return (
+        relationship.id, relationship.source_id, relationship.target_id, relationship.type.value,
+        relationship.weight, relationship.confidence, json.dumps(relationship.context),
+        relationship.temporal_validity[0].isoformat() if relationship.temporal_validity else None,
+        relationship.temporal_validity[1].isoformat() if relationship.temporal_validity else None,
+        json.dumps(relationship.conditions), json.dumps(relationship.evidence),
+        relationship.created_at.isoformat(), relationship.last_validated.isoformat(), relationship.validation_count
+    )
+
+ENTITY_COLUMNS = ("id", "type", "name", "properties", "metadata", "created_at", "last_accessed", "access_count", "confidence", "source_agent", "version")
+RELATIONSHIP_COLUMNS = ("id", "source_id", "target_id", "type", "weight", "confidence", "context", "temporal_start", "temporal_end", "conditions", "evidence", "created_at", "last_validated", "validation_count")
+EXPORT_TABLES = {"entities": ENTITY_COLUMNS, "relationships": RELATIONSHIP_COLUMNS}
+_JSON_COLUMNS = {"properties", "metadata", "context", "conditions", "evidence"}
+
+def row_to_record(kind: str, row: tuple) -> Dict[str, Any]:
+    """Turns an exported SQLite row into the NDJSON record accepted by import_records."""
+    record = {"kind": "entity" if kind == "entities" else "relationship"}
+    for column, value in zip(EXPORT_TABLES[kind], row):
+        record[column] = json.loads(value) if column in _JSON_COLUMNS and value is not None else value
+    return record
+
+def _parse_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value) if value else datetime.now()
+
+def entity_from_record(record: Dict[str, Any]) -> Entity:
+    return Entity(
+        id=str(record.get("id") or ""), type=EntityType(record["type"]), name=str(record["name"]),
+        properties=dict(record.get("properties") or {}), metadata=dict(record.get("metadata") or {}),
+        created_at=_parse_datetime(record.get("created_at")), last_accessed=_parse_datetime(record.get("last_accessed")),
+        access_count=int(record.get("access_count") or 0), confidence=float(record.get("confidence", 0.8)),
+        source_agent=record.get("source_agent"), version=int(record.get("version") or 1)
+    )
+
+def relationship_from_record(record: Dict[str, Any]) -> Relationship:
+    temporal = None
+    if record.get("temporal_start") and record.get("temporal_end"):
+        temporal = (_parse_datetime(record["temporal_start"]), _parse_datetime(record["temporal_end"]))
+    return Relationship(
+        id=str(record.get("id") or ""), source_id=str(record["source_id"]), target_id=str(record["target_id"]),
+        type=RelationshipType(record["type"]), weight=float(record.get("weight", 1.0)),
+        confidence=float(record.get("confidence", 0.8)), context=dict(record.get("context") or {}),
+        temporal_validity=temporal, conditions=list(record.get("conditions") or []),
+        evidence=list(record.get("evidence") or []), created_at=_parse_datetime(record.get("created_at")),
+        last_validated=_parse_datetime(record.get("last_validated")),
+        validation_count=int(record.get("validation_count") or 0)
+    )
+
+def entity_search_text(entity: Entity) -> str:
+    """Name plus flattened scalar property values, as indexed for property search."""
+    return search_text(entity.name, entity.properties)
+
+def search_text(name: str, properties: Any) -> str:
+    parts = [name]
+    stack = [properties]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif value is not None and not isinstance(value, bool):
+            parts.append(str(value))
+    return " ".join(parts)
+
+def record_to_object(record):
+    if isinstance(record, (str, bytes)):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+    kind = record.get("kind") or ("relationship" if "source_id" in record else "entity")
+    if kind == "entity":
+        return entity_from_record(record)
+    if kind == "relationship":
+        return relationship_from_record(record)
+    raise ValueError(f"unknown record kind: {kind}")
 
 class ReasoningRule(ABC):
     name: str
+    # Fact kinds (e.g. relationship type names) the rule reads and infers. A rule
+    # that reads what another produces runs after it and sees its result in
+    # query_context["upstream"]; rules with no such link run concurrently.
+    reads: Tuple[str, ...] = ()
+    produces: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    cacheable: bool = True
     @abstractmethod
     def applies_to_context(self, query_context: Dict[str, Any]) -> bool:
         pass
@@ -28,19 +226,192 @@ class ReasoningRule(ABC):
     async def execute(self, engine: 'AsyncKnowledgeGraphEngine', query_context: Dict[str, Any]) -> Dict[str, Any]:
         pass
 
+class DatalogRule(ReasoningRule):
+    """Rule written as a Datalog pattern over relationship types, materialized incrementally.
+
+    ``head`` and ``body`` atoms are (relationship type, source, target) with
+    "?"-prefixed variables, e.g. head ("DEPENDS_ON", "?a", "?c") and body
+    [("DEPENDS_ON", "?a", "?b"), ("DEPENDS_ON", "?b", "?c")]. Once loaded, the
+    engine keeps the inferred facts up to date on every relationship write, so
+    executing the rule is only a lookup.
+    """
+    head: Tuple[str, str, str]
+    body: List[Tuple[str, str, str]] = []
+    cacheable = False
+
+    @property
+    def reads(self) -> Tuple[str, ...]:
+        return tuple(sorted({atom[0] for atom in self.body}))
+
+    @property
+    def produces(self) -> Tuple[str, ...]:
+        return (self.head[0],)
+
+    def applies_to_context(self, query_context: Dict[str, Any]) -> bool:
+        return True
+
+    async def execute(self, engine: 'AsyncKnowledgeGraphEngine', query_context: Dict[str, Any]) -> Dict[str, Any]:
+        facts = engine.reasoner.query(self.head[0], query_context.get("entity_id"), query_context.get("target_id"))
+        return {
+            "facts": [{"source_id": s, "target_id": t, "type": rel, "rule": self.name} for rel, s, t in facts],
+            "confidence": {},
+        }
+
+def _reachable(start: str, edges: Dict[str, Set[str]]) -> Set[str]:
+    """Nodes reachable from ``start`` along ``edges`` (excluding ``start`` unless on a cycle)."""
+    seen: Set[str] = set()
+    stack = list(edges[start])
+    while stack:
+        node = stack.pop()
+        if node not in seen:
+            seen.add(node)
+            stack.extend(edges[node])
+    return seen
+
+class GraphView:
+    """Synchronous, read-only view of the engine's in-memory state, used inside ``engine.read``.
+
+    Everything a view returns is assembled without awaiting, so on the single
+    event-loop thread it reflects exactly one ``graph_version``. Bodies that are
+    known but evicted from the LRU are recorded in ``missing_*``; ``read`` then
+    hydrates them and re-runs the function.
+    """
+
+    def __init__(self, engine: 'AsyncKnowledgeGraphEngine', hydrated: Dict[str, Dict[str, Any]]):
+        self.engine = engine
+        self.version = engine.graph_version
+        self.hydrated = hydrated
+        self.missing: Dict[str, Set[str]] = {"entities": set(), "relationships": set()}
+
+    def _bodies(self, kind: str, ids: List[str]) -> Dict[str, Any]:
+        engine = self.engine
+        cache, known = (engine.entities, engine.entity_types) if kind == "entities" else (engine.relationships, engine.relationship_types)
+        extra = self.hydrated[kind]
+        found = {}
+        for object_id in ids:
+            if object_id not in known:
+                continue
+            obj = cache.get(object_id)
+            if obj is None:
+                if object_id not in extra:
+                    self.missing[kind].add(object_id)
+                obj = extra.get(object_id)
+            if obj is not None:
+                found[object_id] = obj
+        return found
+
+    def entities(self, ids: List[str]) -> Dict[str, Entity]:
+        return self._bodies("entities", ids)
+
+    def relationships(self, ids: List[str]) -> Dict[str, Relationship]:
+        return self._bodies("relationships", ids)
+
+    def entity(self, entity_id: str) -> Optional[Entity]:
+        return self.entities([entity_id]).get(entity_id)
+
+    def relationship(self, rel_id: str) -> Optional[Relationship]:
+        return self.relationships([rel_id]).get(rel_id)
+
+    def search_entities(self, entity_type: Optional[EntityType] = None, name_pattern: Optional[str] = None,
+                        match: str = "substring", search_properties: bool = False,
+                        limit: Optional[int] = None, offset: int = 0, min_similarity: float = 0.3) -> Tuple[List[Entity], int]:
+        engine = self.engine
+        restrict = engine.entity_type_index.get(entity_type) if entity_type else None
+        if entity_type and not restrict:
+            return [], 0
+        if name_pattern:
+            index = engine.text_index if search_properties else engine.name_index
+            ids = [doc_id for doc_id, _ in index.search(name_pattern, match, restrict, min_similarity=min_similarity)]
+        else:
+            ids = engine.sorted_entity_ids(entity_type)
+        end = None if limit is None else offset + limit
+        page_ids = ids[offset:end]
+        bodies = self.entities(page_ids)
+        return [bodies[i] for i in page_ids if i in bodies], len(ids)
+
+    def neighbors(self, entity_id: str, direction: str = "out", type_codes=None) -> List[Dict[str, Any]]:
+        pairs = self.engine.adjacency.neighbors(entity_id, direction, type_codes)
+        return [{"entity_id": node, "relationship_id": edge} for node, edge in pairs]
+
+    def k_hop(self, entity_id: str, k: int = 2, direction: str = "out", type_codes=None, max_nodes: int = 10000) -> Dict[str, int]:
+        return self.engine.adjacency.k_hop(entity_id, k, direction, type_codes, max_nodes)
+
+    def shortest_path(self, source_id: str, target_id: str, direction: str = "out", type_codes=None,
+                      max_depth: int = 6) -> Optional[Dict[str, List[str]]]:
+        path = self.engine.adjacency.shortest_path(source_id, target_id, direction, type_codes, max_depth)
+        if path is None:
+            return None
+        return {"entities": path[0], "relationships": path[1]}
+
+    def subgraph(self, entity_id: str, k: int = 1, direction: str = "both", type_codes=None, max_nodes: int = 1000) -> Dict[str, Any]:
+        node_ids = list(self.k_hop(entity_id, k, direction, type_codes, max_nodes))
+        edge_ids = self.engine.adjacency.subgraph_edges(node_ids, type_codes)
+        entities = self.entities(node_ids)
+        relationships = self.relationships(edge_ids)
+        return {
+            "entities": [entities[n] for n in node_ids if n in entities],
+            "relationships": [relationships[e] for e in edge_ids if e in relationships],
+        }
+
 class AsyncKnowledgeGraphEngine:
-    def __init__(self, db_path: str = "knowledge_graph.db"):
+    def __init__(self, db_path: str = "knowledge_graph.db", pragmas: Optional[Dict[str, Any]] = None, cached_statements: int = 256,
+                 write_queue_size: int = 10000, write_batch_size: int = 500, flush_interval: float = 0.05,
+                 max_cached_entities: int = 100000, max_cached_relationships: int = 200000,
+                 max_rule_concurrency: int = 8, rule_timeout: float = 30.0, rule_cache_size: int = 1024):
         self.db_path = db_path
-        self.entities: Dict[str, Entity] = {}
-        self.relationships: Dict[str, Relationship] = {}
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.cached_statements = cached_statements
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._init_lock = asyncio.Lock()
+        # Write-behind pipeline: (sql, row, future) items, group-committed by one writer task.
+        self.write_batch_size = write_batch_size
+        self.flush_interval = flush_interval
+        self._write_queue: asyncio.Queue = asyncio.Queue(maxsize=write_queue_size)
+        self._writer_task: Optional[asyncio.Task] = None
+        self.write_stats = {"queued": 0, "committed": 0, "batches": 0, "failed": 0}
+        self.started_at = time.perf_counter()
+        # Every known id maps to its type; full bodies live in bounded LRUs and are
+        # hydrated from SQLite on a miss, so the graph can outgrow memory.
+        self.entity_types: Dict[str, EntityType] = {}
+        self.relationship_types: Dict[str, RelationshipType] = {}
+        # (type, source, target) per relationship id, for incremental inference bookkeeping.
+        self.relationship_facts: Dict[str, Tuple[str, str, str]] = {}
+        self.entities: LRUCache = LRUCache(max_cached_entities)
+        self.relationships: LRUCache = LRUCache(max_cached_relationships)
+        self.cache_stats = {"reads": 0, "retries": 0, "misses": 0, "hydrated": 0}
+        self.warm_stats: Dict[str, Any] = {}
         self.entity_type_index: Dict[EntityType, Set[str]] = defaultdict(set)
+        # Sorted ids for unfiltered search pages, per type (None = all types). New ids
+        # wait in a pending list and are merged in by the next page that needs them.
+        self._sorted_ids: Dict[Optional[EntityType], List[str]] = {}
+        self._pending_ids: Dict[Optional[EntityType], List[str]] = defaultdict(list)
         self.relationship_type_index: Dict[RelationshipType, Set[str]] = defaultdict(set)
+        # Forward/reverse adjacency (CSR + delta) keyed by entity id, edges keyed by relationship id.
+        self.adjacency = AdjacencyIndex()
+        # Trigram indexes for entity search: names only, and names plus property values.
+        self.name_index = TrigramIndex()
+        self.text_index = TrigramIndex()
         self.lock = asyncio.Lock()
         self.logger = logging.getLogger("AsyncKnowledgeGraphEngine")
         self.rules: Dict[str, ReasoningRule] = {}
+        self.max_rule_concurrency = max_rule_concurrency
+        self.rule_timeout = rule_timeout
+        # Memoized rule results keyed by (rule, context hash, graph_version).
+        self.rule_cache: LRUCache = LRUCache(rule_cache_size)
+        # Bumped on every in-memory mutation; invalidates memoized rule results.
+        self.graph_version = 0
+        # Materialized DatalogRule inferences; only maintained while such rules are loaded.
+        self.reasoner = IncrementalReasoner()
 
     async def _initialize_database(self):
-        async with aiosqlite.connect(self.db_path) as conn:
+        if self._conn is not None:
+            return
+        # One connection for the engine's lifetime; sqlite3 keeps compiled statements
+        # for the constant upsert SQL in its per-connection statement cache.
+        conn = await aiosqlite.connect(self.db_path, cached_statements=self.cached_statements)
+        try:
+            for pragma, value in self.pragmas.items():
+                await conn.execute(f"PRAGMA {pragma}={value}")
             await conn.execute('''CREATE TABLE IF NOT EXISTS entities (
                 id TEXT PRIMARY KEY,
                 type TEXT NOT NULL,
@@ -71,67 +442,428 @@ class AsyncKnowledgeGraphEngine:
                 validation_count INTEGER DEFAULT 0
             )''')
             await conn.commit()
+        except Exception:
+            await conn.close()
+            raise
+        self._conn = conn
         self.logger.info("Database initialized")
 
-    async def add_entity(self, entity: Entity) -> str:
-        async with self.lock:
-            self.entities[entity.id] = entity
-            self.entity_type_index[entity.type].add(entity.id)
-            async with aiosqlite.connect(self.db_path) as conn:
-                await conn.execute(
-                    'INSERT OR REPLACE INTO entities (id, type, name, properties, metadata, created_at, last_accessed, access_count, confidence, source_agent, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
-                    (
-                        entity.id, entity.type.value, entity.name,
-                        json.dumps(entity.properties), json.dumps(entity.metadata),
-                        entity.created_at.isoformat(), entity.last_accessed.isoformat(),
-                        entity.access_count, entity.confidence, entity.source_agent, entity.version
-                    )
-                )
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            async with self._init_lock:
+                await self._initialize_database()
+        return self._conn
+
+    async def close(self):
+        if self._writer_task is not None and not self._writer_task.done():
+            await self._write_queue.put(_STOP_WRITER)
+            await self._writer_task
+        self._writer_task = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    # --- Write-behind queue ---
+    def _ensure_writer(self):
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.get_running_loop().create_task(self._writer_loop())
+
+    async def _enqueue_write(self, sql: Optional[str], row: Optional[tuple], durable: bool = False) -> Optional[asyncio.Future]:
+        """Queues a mutation for the writer task; blocks (backpressure) while the queue is full."""
+        self._ensure_writer()
+        future = asyncio.get_running_loop().create_future() if durable else None
+        await self._write_queue.put((sql, row, future))
+        if sql is not None:
+            self.write_stats["queued"] += 1
+        return future
+
+    async def flush(self):
+        """Waits until every mutation queued so far has been committed."""
+        barrier = await self._enqueue_write(None, None, durable=True)
+        await barrier
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._write_queue.get()
+            if item is _STOP_WRITER:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            # Group commit: keep collecting until the batch is full or the flush interval elapses.
+            while len(batch) < self.write_batch_size:
+                try:
+                    item = self._write_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    # Durable callers are waiting: commit what is here instead of idling.
+                    if timeout <= 0 or any(future is not None for _, _, future in batch):
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._write_queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP_WRITER:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._commit_batch(batch)
+
+    async def _commit_batch(self, batch):
+        rows_by_sql: Dict[str, List[tuple]] = defaultdict(list)
+        for sql, row, _ in batch:
+            if sql is not None:
+                rows_by_sql[sql].append(row)
+        error: Optional[BaseException] = None
+        try:
+            if rows_by_sql:
+                conn = await self._connection()
+                for sql, rows in rows_by_sql.items():
+                    await conn.executemany(sql, rows)
                 await conn.commit()
-            self.logger.info(f"Entity added: {entity.id}")
-            return entity.id
+            self.write_stats["committed"] += sum(len(rows) for rows in rows_by_sql.values())
+            self.write_stats["batches"] += 1
+        except Exception as e:
+            error = e
+            self.write_stats["failed"] += sum(len(rows) for rows in rows_by_sql.values())
+            self.logger.error(f"Group commit of {len(batch)} writes failed: {e}")
+            if self._conn is not None:
+                await self._conn.rollback()
+        for _, _, future in batch:
+            if future is not None and not future.done():
+                if error is None:
+                    future.set_result(True)
+                else:
+                    future.set_exception(error)
+
+    def _index_entity(self, entity: Entity):
+        previous = self.entity_types.get(entity.id)
+        if previous is not None and previous != entity.type:
+            self.entity_type_index[previous].discard(entity.id)
+        self._track_entity_id(entity.id, entity.type, previous)
+        self.entity_types[entity.id] = entity.type
+        self.entities[entity.id] = entity
+        self.graph_version += 1
+        self.entity_type_index[entity.type].add(entity.id)
+        self.name_index.add(entity.id, entity.name)
+        self.text_index.add(entity.id, entity_search_text(entity))
+
+    def _track_entity_id(self, entity_id: str, entity_type: EntityType, previous: Optional[EntityType]):
+        if previous is None:
+            for key in (None, entity_type):
+                if key in self._sorted_ids:
+                    self._pending_ids[key].append(entity_id)
+        elif previous != entity_type:
+            # Retyped ids are rare; rebuild both per-type lists on their next use.
+            for key in (previous, entity_type):
+                self._sorted_ids.pop(key, None)
+                self._pending_ids.pop(key, None)
+
+    def sorted_entity_ids(self, entity_type: Optional[EntityType] = None) -> List[str]:
+        """All entity ids (of one type, if given) in id order; the list must not be mutated."""
+        ids = self._sorted_ids.get(entity_type)
+        if ids is None:
+            source = self.entity_type_index.get(entity_type, ()) if entity_type else self.entity_types
+            ids = self._sorted_ids[entity_type] = sorted(source)
+            self._pending_ids.pop(entity_type, None)
+        else:
+            pending = self._pending_ids.pop(entity_type, None)
+            if pending:
+                # Two sorted runs: timsort merges them in linear time.
+                ids.extend(sorted(pending))
+                ids.sort()
+        return ids
+
+    def _index_relationship(self, relationship: Relationship):
+        previous = self.relationship_types.get(relationship.id)
+        if previous is not None and previous != relationship.type:
+            self.relationship_type_index[previous].discard(relationship.id)
+        self.relationship_types[relationship.id] = relationship.type
+        self.relationships[relationship.id] = relationship
+        self._set_relationship_fact(relationship.id, (relationship.type.value, relationship.source_id, relationship.target_id))
+        self.graph_version += 1
+        self.relationship_type_index[relationship.type].add(relationship.id)
+        self.adjacency.add_edge(relationship.id, relationship.source_id, relationship.target_id,
+                                RELATIONSHIP_TYPE_CODES[relationship.type])
+
+    def _set_relationship_fact(self, rel_id: str, fact: Optional[Tuple[str, str, str]]):
+        previous = self.relationship_facts.pop(rel_id, None)
+        if fact is not None:
+            self.relationship_facts[rel_id] = fact
+        if self.reasoner.active and previous != fact:
+            if previous is not None:
+                self.reasoner.retract(previous)
+            if fact is not None:
+                self.reasoner.insert(fact)
+
+    def _unindex_relationship(self, rel_id: str) -> bool:
+        rel_type = self.relationship_types.pop(rel_id, None)
+        if rel_type is None:
+            return False
+        self.relationship_type_index[rel_type].discard(rel_id)
+        self.relationships.pop(rel_id, None)
+        self.adjacency.remove_edge(rel_id)
+        self._set_relationship_fact(rel_id, None)
+        self.graph_version += 1
+        return True
+
+    async def add_entity(self, entity: Entity, durable: bool = False) -> str:
+        async with self.lock:
+            self._index_entity(entity)
+            # Enqueued under the lock so the commit order matches the in-memory order.
+            pending = await self._enqueue_write(ENTITY_UPSERT_SQL, entity_row(entity), durable)
+        if pending is not None:
+            await pending
+        self.logger.debug(f"Entity added: {entity.id}")
+        return entity.id
 
     async def get_entity(self, entity_id: str) -> Optional[Entity]:
+        return (await self.read(lambda view: view.entity(entity_id)))[0]
+
+    async def get_entities(self, entity_ids: List[str]) -> Dict[str, Entity]:
+        return (await self.read(lambda view: view.entities(entity_ids)))[0]
+
+    async def add_relationship(self, relationship: Relationship, durable: bool = False) -> str:
         async with self.lock:
-            return self.entities.get(entity_id)
+            self._index_relationship(relationship)
+            pending = await self._enqueue_write(RELATIONSHIP_UPSERT_SQL, relationship_row(relationship), durable)
+        if pending is not None:
+            await pending
+        self.logger.debug(f"Relationship added: {relationship.id}")
+        return relationship.id
 
-    async def add_relationship(self, relationship: Relationship) -> str:
+    async def delete_relationship(self, rel_id: str, durable: bool = False) -> bool:
+        """Removes a relationship; facts inferred through it are retracted incrementally."""
         async with self.lock:
-            self.relationships[relationship.id] = relationship
-            self.relationship_type_index[relationship.type].add(relationship.id)
-            async with aiosqlite.connect(self.db_path) as conn:
-                await conn.execute(
-                    'INSERT OR REPLACE INTO relationships (id, source_id, target_id, type, weight, confidence, context, temporal_start, temporal_end, conditions, evidence, created_at, last_validated, validation_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
-                    (
-                        relationship.id, relationship.source_id, relationship.target_id, relationship.type.value,
-                        relationship.weight, relationship.confidence, json.dumps(relationship.context),
-                        relationship.temporal_validity[0].isoformat() if relationship.temporal_validity else None,
-                        relationship.temporal_validity[1].isoformat() if relationship.temporal_validity else None,
-                        json.dumps(relationship.conditions), json.dumps(relationship.evidence),
-                        relationship.created_at.isoformat(), relationship.last_validated.isoformat(), relationship.validation_count
-                    )
-                )
-                await conn.commit()
-            self.logger.info(f"Relationship added: {relationship.id}")
-            return relationship.id
+            if not self._unindex_relationship(rel_id):
+                return False
+            pending = await self._enqueue_write(RELATIONSHIP_DELETE_SQL, (rel_id,), durable)
+        if pending is not None:
+            await pending
+        self.logger.debug(f"Relationship deleted: {rel_id}")
+        return True
 
     async def get_relationship(self, rel_id: str) -> Optional[Relationship]:
-        async with self.lock:
-            return self.relationships.get(rel_id)
+        return (await self.read(lambda view: view.relationship(rel_id)))[0]
 
-    async def query_entities(self, entity_type: Optional[EntityType] = None, name_pattern: Optional[str] = None) -> List[Entity]:
-        async with self.lock:
-            if entity_type:
-                candidate_ids = self.entity_type_index[entity_type]
-            else:
-                candidate_ids = set(self.entities.keys())
-            results = []
-            for entity_id in candidate_ids:
-                entity = self.entities[entity_id]
-                if name_pattern and name_pattern.lower() not in entity.name.lower():
+    async def get_relationships(self, rel_ids: List[str]) -> Dict[str, Relationship]:
+        return (await self.read(lambda view: view.relationships(rel_ids)))[0]
+
+    # --- Lock-free reads ---
+    async def read(self, fn: Callable[[GraphView], Any], max_attempts: int = 4) -> Tuple[Any, int]:
+        """Runs ``fn`` against a consistent view and returns ``(result, graph_version)``.
+
+        Readers never take ``self.lock``. Writers apply each mutation to the
+        in-memory maps and indexes in one synchronous step, so a view assembled
+        without awaiting sees exactly one version. If ``fn`` touched bodies that
+        must be hydrated from SQLite, they are loaded (the only await) and ``fn``
+        runs again, reusing what was hydrated.
+        """
+        hydrated: Dict[str, Dict[str, Any]] = {"entities": {}, "relationships": {}}
+        for _ in range(max_attempts):
+            view = GraphView(self, hydrated)
+            result = fn(view)
+            if not any(view.missing.values()):
+                self.cache_stats["reads"] += 1
+                return result, view.version
+            self.cache_stats["retries"] += 1
+            for kind, ids in view.missing.items():
+                if ids:
+                    self.cache_stats["misses"] += len(ids)
+                    loaded = await self._hydrate(kind, sorted(ids))
+                    hydrated[kind].update(loaded)
+                    # Ids known in memory but absent from SQLite (e.g. a failed write) resolve to nothing.
+                    for gone in ids.difference(loaded):
+                        hydrated[kind][gone] = None
+        # Still missing after several attempts (constant eviction): answer from the last view.
+        return result, view.version
+
+    async def _hydrate(self, kind: str, ids: List[str]) -> Dict[str, Any]:
+        if self.write_stats["queued"] > self.write_stats["committed"] + self.write_stats["failed"]:
+            # An evicted body may still be waiting in the write-behind queue.
+            await self.flush()
+        cache = self.entities if kind == "entities" else self.relationships
+        columns = EXPORT_TABLES[kind]
+        conn = await self._connection()
+        loaded = {}
+        for start in range(0, len(ids), _HYDRATE_CHUNK):
+            chunk = ids[start:start + _HYDRATE_CHUNK]
+            sql = f"SELECT {', '.join(columns)} FROM {kind} WHERE id IN ({', '.join('?' * len(chunk))})"
+            async with conn.execute(sql, chunk) as cursor:
+                rows = await cursor.fetchall()
+            for row in rows:
+                obj = record_to_object(row_to_record(kind, row))
+                # A write that landed while we were reading is newer than the row.
+                current = cache.get(obj.id)
+                if current is None:
+                    cache[obj.id] = obj
+                    current = obj
+                loaded[obj.id] = current
+        self.cache_stats["hydrated"] += len(loaded)
+        return loaded
+
+    # --- Warm start ---
+    async def warm_start(self, batch_size: int = 5000) -> Dict[str, Any]:
+        """Streams ids, types, names and edges from SQLite into the in-memory indexes.
+
+        Entity and relationship bodies are not loaded; they are hydrated on first
+        access. Ids already written in this process are left untouched.
+        """
+        started = time.perf_counter()
+        entities = relationships = 0
+        async for rows in self._iter_rows("entities", ("id", "type", "name", "properties"), batch_size):
+            for entity_id, entity_type, name, properties in rows:
+                if entity_id in self.entity_types:
+                    continue
+                entity_type = EntityType(entity_type)
+                self._track_entity_id(entity_id, entity_type, None)
+                self.entity_types[entity_id] = entity_type
+                self.entity_type_index[entity_type].add(entity_id)
+                self.name_index.add(entity_id, name)
+                self.text_index.add(entity_id, search_text(name, json.loads(properties) if properties else {}))
+                entities += 1
+        async for rows in self._iter_rows("relationships", ("id", "source_id", "target_id", "type"), batch_size):
+            for rel_id, source_id, target_id, rel_type in rows:
+                if rel_id in self.relationship_types:
                     continue
-                results.append(entity)
-            return results
+                rel_type = RelationshipType(rel_type)
+                self.relationship_types[rel_id] = rel_type
+                self.relationship_type_index[rel_type].add(rel_id)
+                self.adjacency.add_edge(rel_id, source_id, target_id, RELATIONSHIP_TYPE_CODES[rel_type])
+                self._set_relationship_fact(rel_id, (rel_type.value, source_id, target_id))
+                relationships += 1
+        self.graph_version += 1
+        self.warm_stats.update(entities=entities, relationships=relationships,
+                               seconds=round(time.perf_counter() - started, 4))
+        self.logger.info(f"Warm start loaded {entities} entities and {relationships} relationships "
+                         f"in {self.warm_stats['seconds']}s")
+        return dict(self.warm_stats)
+
+    def mark_request_served(self):
+        """Records time from engine construction to the first served request (first call only)."""
+        if "time_to_first_request" not in self.warm_stats:
+            self.warm_stats["time_to_first_request"] = round(time.perf_counter() - self.started_at, 4)
+            self.logger.info(f"Time to first served request: {self.warm_stats['time_to_first_request']}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entity_count": len(self.entity_types),
+            "relationship_count": len(self.relationship_types),
+            "cached_entities": len(self.entities),
+            "cached_relationships": len(self.relationships),
+            **self.cache_stats,
+            "warm_start": dict(self.warm_stats),
+        }
+
+    async def query_entities(self, entity_type: Optional[EntityType] = None, name_pattern: Optional[str] = None,
+                             match: str = "substring", search_properties: bool = False,
+                             limit: Optional[int] = None, offset: int = 0) -> List[Entity]:
+        page, _ = await self.search_entities(entity_type, name_pattern, match, search_properties, limit, offset)
+        return page
+
+    async def search_entities(self, entity_type: Optional[EntityType] = None, name_pattern: Optional[str] = None,
+                              match: str = "substring", search_properties: bool = False,
+                              limit: Optional[int] = None, offset: int = 0,
+                              min_similarity: float = 0.3) -> Tuple[List[Entity], int]:
+        """Returns one page of matching entities and the total match count.
+
+        ``match`` is "substring", "prefix" or "fuzzy" (ranked by trigram similarity);
+        ``search_properties`` also matches property values. Lookups go through the
+        trigram indexes rather than scanning every entity name.
+        """
+        result, _ = await self.read(lambda view: view.search_entities(
+            entity_type, name_pattern, match, search_properties, limit, offset, min_similarity))
+        return result
+
+    # --- Graph traversal ---
+    @staticmethod
+    def _type_codes(relationship_types: Optional[List[RelationshipType]]):
+        if not relationship_types:
+            return None
+        return [RELATIONSHIP_TYPE_CODES[RelationshipType(t)] for t in relationship_types]
+
+    async def neighbors(self, entity_id: str, direction: str = "out",
+                        relationship_types: Optional[List[RelationshipType]] = None) -> List[Dict[str, Any]]:
+        type_codes = self._type_codes(relationship_types)
+        return (await self.read(lambda view: view.neighbors(entity_id, direction, type_codes)))[0]
+
+    async def k_hop(self, entity_id: str, k: int = 2, direction: str = "out",
+                    relationship_types: Optional[List[RelationshipType]] = None, max_nodes: int = 10000) -> Dict[str, int]:
+        """Entity ids reachable within ``k`` hops, mapped to their hop distance."""
+        type_codes = self._type_codes(relationship_types)
+        return (await self.read(lambda view: view.k_hop(entity_id, k, direction, type_codes, max_nodes)))[0]
+
+    async def shortest_path(self, source_id: str, target_id: str, direction: str = "out",
+                            relationship_types: Optional[List[RelationshipType]] = None, max_depth: int = 6) -> Optional[Dict[str, List[str]]]:
+        type_codes = self._type_codes(relationship_types)
+        return (await self.read(lambda view: view.shortest_path(source_id, target_id, direction, type_codes, max_depth)))[0]
+
+    async def extract_subgraph(self, entity_id: str, k: int = 1, direction: str = "both",
+                               relationship_types: Optional[List[RelationshipType]] = None, max_nodes: int = 1000) -> Dict[str, Any]:
+        """Entities within ``k`` hops of ``entity_id`` plus every relationship among them."""
+        type_codes = self._type_codes(relationship_types)
+        return (await self.read(lambda view: view.subgraph(entity_id, k, direction, type_codes, max_nodes)))[0]
+
+    # --- Bulk import / export ---
+    async def import_records(self, records, chunk_size: int = 1000):
+        """Imports entity/relationship records (dicts or NDJSON lines) from an async iterable.
+
+        Records are validated and applied in chunks; each chunk is group-committed
+        before a progress dict is yielded, so progress always reflects durable state.
+        """
+        progress = {"processed": 0, "entities": 0, "relationships": 0, "invalid": 0, "errors": []}
+        chunk = []
+        async for record in records:
+            progress["processed"] += 1
+            try:
+                chunk.append(record_to_object(record))
+            except (KeyError, ValueError, TypeError) as e:
+                progress["invalid"] += 1
+                if len(progress["errors"]) < 20:
+                    progress["errors"].append({"record": progress["processed"], "error": str(e)})
+                continue
+            if len(chunk) >= chunk_size:
+                await self._import_chunk(chunk, progress)
+                chunk = []
+                yield dict(progress, done=False)
+        if chunk:
+            await self._import_chunk(chunk, progress)
+        yield dict(progress, done=True)
+
+    async def _import_chunk(self, objects: List[Any], progress: Dict[str, Any]):
+        async with self.lock:
+            for obj in objects:
+                if isinstance(obj, Relationship):
+                    self._index_relationship(obj)
+                    await self._enqueue_write(RELATIONSHIP_UPSERT_SQL, relationship_row(obj))
+                    progress["relationships"] += 1
+                else:
+                    self._index_entity(obj)
+                    await self._enqueue_write(ENTITY_UPSERT_SQL, entity_row(obj))
+                    progress["entities"] += 1
+        await self.flush()
+
+    async def iter_export(self, kind: str = "entities", page_size: int = 1000):
+        """Yields pages of raw rows from SQLite using keyset pagination on ``id``."""
+        if kind not in EXPORT_TABLES:
+            raise ValueError(f"Unknown export kind: {kind}")
+        await self.flush()
+        async for rows in self._iter_rows(kind, EXPORT_TABLES[kind], page_size):
+            yield rows
+
+    async def _iter_rows(self, table: str, columns: Tuple[str, ...], page_size: int):
+        # Keyset pagination: "id" must be the first column.
+        conn = await self._connection()
+        sql = f"SELECT {', '.join(columns)} FROM {table} WHERE id > ? ORDER BY id LIMIT ?"
+        last_id = ""
+        while True:
+            async with conn.execute(sql, (last_id, page_size)) as cursor:
+                rows = await cursor.fetchall()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
 
     async def load_rule(self, rule_path: str) -> str:
         """Dynamically load a rule from a Python file."""
@@ -140,26 +872,57 @@ class AsyncKnowledgeGraphEngine:
         spec.loader.exec_module(module)
         for attr in dir(module):
             obj = getattr(module, attr)
-            if isinstance(obj, type) and issubclass(obj, ReasoningRule) and obj is not ReasoningRule:
+            # Only classes defined in the rule file itself (not imported bases such as DatalogRule).
+            if isinstance(obj, type) and issubclass(obj, ReasoningRule) and obj.__module__ == module.__name__:
                 rule = obj()
+                if isinstance(rule, DatalogRule):
+                    self._register_datalog_rule(rule)
                 self.rules[rule.name] = rule
+                self.rule_cache.clear()
                 self.logger.info(f"Loaded rule: {rule.name}")
                 return rule.name
         raise ValueError("No ReasoningRule found in module")
 
     async def unload_rule(self, rule_name: str) -> bool:
         if rule_name in self.rules:
-            del self.rules[rule_name]
+            if isinstance(self.rules.pop(rule_name), DatalogRule):
+                self.reasoner.remove_rule(rule_name)
+                if not self.reasoner.active:
+                    self.reasoner.clear()
+            self.rule_cache.clear()
             self.logger.info(f"Unloaded rule: {rule_name}")
             return True
         return False
 
+    def _register_datalog_rule(self, rule: DatalogRule):
+        if not self.reasoner.active:
+            # First incremental rule: seed the base facts from the current graph.
+            self.reasoner.load(self.relationship_facts.values())
+        self.reasoner.add_rule(rule.name, rule.head, rule.body)
+
+    async def add_rule(self, rule: ReasoningRule) -> str:
+        """Registers an already constructed rule instance."""
+        async with self.lock:
+            if isinstance(rule, DatalogRule):
+                self._register_datalog_rule(rule)
+            self.rules[rule.name] = rule
+            self.rule_cache.clear()
+        return rule.name
+
+    def inferred_facts(self, relationship_type: Optional[str] = None, source_id: Optional[str] = None,
+                       target_id: Optional[str] = None) -> List[Dict[str, str]]:
+        """Materialized DatalogRule inferences matching the given filters."""
+        facts = self.reasoner.query(relationship_type, source_id, target_id)
+        return [{"type": rel, "source_id": s, "target_id": t} for rel, s, t in facts]
+
     async def list_rules(self) -> List[str]:
         return list(self.rules.keys())
 
     async def reload_rules_and_listeners(self):
         # For demo: reload all rules from a 'rules/' directory
         self.rules.clear()
+        self.rule_cache.clear()
+        self.reasoner.clear()
         rules_dir = os.path.join(os.path.dirname(__file__), 'rules')
         if os.path.isdir(rules_dir):
             for fname in os.listdir(rules_dir):
@@ -169,24 +932,97 @@ class AsyncKnowledgeGraphEngine:
                     except Exception as e:
                         self.logger.error(f"Failed to load rule {fname}: {e}")
 
-    async def execute_reasoning(self, query: str, context: Dict[str, Any] = None, rules: List[str] = None, trace: bool = False) -> Dict[str, Any]:
+    async def execute_reasoning(self, query: str, context: Dict[str, Any] = None, rules: List[str] = None, trace: bool = False,
+                                max_concurrency: Optional[int] = None) -> Dict[str, Any]:
         self.logger.info(f"Reasoning executed for query: {query}")
         context = context or {}
+        selected = [(name, rule) for name, rule in self.rules.items()
+                    if (not rules or name in rules) and rule.applies_to_context(context)]
+        order, deps = self._rule_dag(selected)
+        context_hash = hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_rule_concurrency)
+        tasks: Dict[str, asyncio.Task] = {}
+        for name in order:
+            # Tasks are created in topological order, so every dependency's task already exists.
+            tasks[name] = asyncio.ensure_future(
+                self._run_rule(self.rules[name], context, context_hash, {d: tasks[d] for d in deps[name]}, semaphore))
+        outcomes = await asyncio.gather(*tasks.values())
         trace_log = []
         inferred_facts = []
         confidence_scores = {}
-        for rule_name, rule in self.rules.items():
-            if rules and rule_name not in rules:
-                continue
-            if rule.applies_to_context(context):
-                result = await rule.execute(self, context)
-                inferred_facts.extend(result.get('facts', []))
-                confidence_scores.update(result.get('confidence', {}))
-                if trace:
-                    trace_log.append({"rule": rule_name, "result": result, "timestamp": datetime.now().isoformat()})
+        errors = {}
+        for name, (result, record) in zip(tasks, outcomes):
+            inferred_facts.extend(result.get('facts', []))
+            confidence_scores.update(result.get('confidence', {}))
+            if record.get("error"):
+                errors[name] = record["error"]
+            if trace:
+                trace_log.append({"rule": name, "result": result, "depends_on": sorted(deps[name]), **record})
         return {
             "query": query,
             "inferred_facts": inferred_facts,
             "confidence_scores": confidence_scores,
+            "errors": errors or None,
             "trace": trace_log if trace else None
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def _rule_dag(selected: List[Tuple[str, ReasoningRule]]) -> Tuple[List[str], Dict[str, Set[str]]]:
+        """Orders rules so each runs after every rule producing something it reads (Kahn's algorithm).
+
+        Rules that feed each other in a cycle form one stratum and run one after
+        another in registration order; each sees the members before it upstream.
+        """
+        deps: Dict[str, Set[str]] = {name: set() for name, _ in selected}
+        for name, rule in selected:
+            for other, producer in selected:
+                if other != name and set(rule.reads) & set(producer.produces):
+                    deps[name].add(other)
+        reach = {name: _reachable(name, deps) for name in deps}
+        position = {name: i for i, (name, _) in enumerate(selected)}
+        for name in deps:
+            stratum = {other for other in reach[name] if name in reach[other] and other != name}
+            # Within a stratum a rule waits for every earlier member and for none after it.
+            deps[name] = (deps[name] - stratum) | {other for other in stratum if position[other] < position[name]}
+        remaining = {name: set(d) for name, d in deps.items()}
+        order = []
+        while remaining:
+            ready = [name for name, _ in selected if name in remaining and not remaining[name]]
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for pending in remaining.values():
+                pending.difference_update(ready)
+        return order, deps
+
+    async def _run_rule(self, rule: ReasoningRule, context: Dict[str, Any], context_hash: str,
+                        dep_tasks: Dict[str, asyncio.Task], semaphore: asyncio.Semaphore):
+        upstream = {}
+        for dep_name, task in dep_tasks.items():
+            upstream[dep_name] = (await task)[0]
+        rule_context = {**context, "upstream": upstream} if upstream else context
+        key = (rule.name, context_hash, self.graph_version)
+        record = {"timestamp": datetime.now().isoformat(), "graph_version": self.graph_version, "cached": False}
+        if rule.cacheable and key in self.rule_cache:
+            record["cached"] = True
+            return self.rule_cache.get(key), record
+        timeout = rule.timeout if rule.timeout is not None else self.rule_timeout
+        span = _tracer.start_as_current_span(f"rule:{rule.name}") if _tracer is not None else nullcontext()
+        started = time.perf_counter()
+        async with semaphore:
+            with span:
+                try:
+                    result = await asyncio.wait_for(rule.execute(self, rule_context), timeout)
+                except asyncio.TimeoutError:
+                    record["error"] = f"timed out after {timeout}s"
+                    result = {"facts": [], "confidence": {}}
+                except Exception as e:
+                    record["error"] = str(e)
+                    result = {"facts": [], "confidence": {}}
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        if record.get("error"):
+            self.logger.warning(f"Rule {rule.name} failed: {record['error']}")
+        elif rule.cacheable and key[2] == self.graph_version:
+            # Only memoize when the graph did not change while the rule ran.
+            self.rule_cache[key] = result
+        return result, record
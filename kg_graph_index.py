@@ -0,0 +1,212 @@
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DIRECTIONS = ("out", "in", "both")
+
+
+class AdjacencyIndex:
+    """Forward and reverse adjacency over interned node ids.
+
+    Edge endpoints, type codes and liveness are typed numpy columns indexed by an
+    interned edge number. Traversal reads two CSR snapshots (``out`` keyed by
+    source, ``in`` keyed by target) plus small per-node delta lists holding edges
+    added since the last snapshot. Once the delta outgrows ``rebuild_ratio`` of the
+    snapshot the CSR arrays are rebuilt with a single argsort, so individual
+    inserts stay O(1) while lookups stay contiguous slices. Removed edges only
+    clear their liveness bit; once dead slots pass ``compact_ratio`` of all
+    slots the columns are compacted and the edges renumbered.
+    """
+
+    def __init__(self, rebuild_ratio: float = 0.25, min_rebuild: int = 1024, compact_ratio: float = 0.5):
+        self.rebuild_ratio = rebuild_ratio
+        self.min_rebuild = min_rebuild
+        self.compact_ratio = compact_ratio
+        self.node_index: Dict[str, int] = {}
+        self.nodes: List[str] = []
+        self.edge_index: Dict[str, int] = {}
+        self.edges: List[str] = []
+        self._src = np.empty(0, dtype=np.int64)
+        self._dst = np.empty(0, dtype=np.int64)
+        self._type = np.empty(0, dtype=np.int16)
+        self._alive = np.empty(0, dtype=bool)
+        self._dead = 0
+        self._csr: Dict[str, Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]] = {"out": None, "in": None}
+        self._csr_edges = 0
+        self._delta: Dict[str, Dict[int, List[Tuple[int, int]]]] = {"out": defaultdict(list), "in": defaultdict(list)}
+        self.version = 0
+
+    def __len__(self):
+        return int(self._alive[:len(self.edges)].sum())
+
+    # --- Interning ---
+    def intern(self, node_id: str) -> int:
+        idx = self.node_index.get(node_id)
+        if idx is None:
+            idx = len(self.nodes)
+            self.node_index[node_id] = idx
+            self.nodes.append(node_id)
+        return idx
+
+    def _grow(self, needed: int):
+        capacity = len(self._src)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 1024)
+        for name in ("_src", "_dst", "_type", "_alive"):
+            old = getattr(self, name)
+            grown = np.zeros(new_capacity, dtype=old.dtype)
+            grown[:capacity] = old
+            setattr(self, name, grown)
+
+    # --- Mutation ---
+    def add_edge(self, edge_id: str, source_id: str, target_id: str, type_code: int = 0):
+        self.remove_edge(edge_id)
+        src, dst = self.intern(source_id), self.intern(target_id)
+        edge = len(self.edges)
+        self._grow(edge + 1)
+        self.edges.append(edge_id)
+        self.edge_index[edge_id] = edge
+        self._src[edge], self._dst[edge], self._type[edge], self._alive[edge] = src, dst, type_code, True
+        self._delta["out"][src].append((dst, edge))
+        self._delta["in"][dst].append((src, edge))
+        self.version += 1
+        delta = len(self.edges) - self._csr_edges
+        if delta > max(self.min_rebuild, self.rebuild_ratio * self._csr_edges):
+            self.rebuild()
+
+    def remove_edge(self, edge_id: str):
+        edge = self.edge_index.pop(edge_id, None)
+        if edge is not None:
+            self._alive[edge] = False
+            self._dead += 1
+            self.version += 1
+            if self._dead > max(self.min_rebuild, self.compact_ratio * len(self.edges)):
+                self.compact()
+
+    def compact(self):
+        """Drops dead edge slots, renumbers the live edges and rebuilds the CSR snapshots."""
+        alive = np.flatnonzero(self._alive[:len(self.edges)])
+        self.edges = [self.edges[e] for e in alive.tolist()]
+        self.edge_index = {edge_id: edge for edge, edge_id in enumerate(self.edges)}
+        capacity = max(len(alive) * 2, 1024)
+        for name in ("_src", "_dst", "_type", "_alive"):
+            old = getattr(self, name)
+            compacted = np.zeros(capacity, dtype=old.dtype)
+            compacted[:len(alive)] = old[alive]
+            setattr(self, name, compacted)
+        self._dead = 0
+        self.rebuild()
+
+    def rebuild(self):
+        n_edges = len(self.edges)
+        alive = np.flatnonzero(self._alive[:n_edges])
+        n_nodes = len(self.nodes)
+        for direction, keys, values in (("out", self._src, self._dst), ("in", self._dst, self._src)):
+            order = alive[np.argsort(keys[alive], kind="stable")]
+            counts = np.bincount(keys[order], minlength=n_nodes)
+            indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+            np.cumsum(counts, out=indptr[1:])
+            self._csr[direction] = (indptr, values[order].copy(), order)
+            self._delta[direction] = defaultdict(list)
+        self._csr_edges = n_edges
+
+    # --- Lookup ---
+    def neighbors_of(self, node: int, direction: str = "out", type_codes: Optional[Sequence[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (neighbour node ints, edge ints) for one interned node."""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}")
+        neighbor_parts, edge_parts = [], []
+        for d in (("out", "in") if direction == "both" else (direction,)):
+            csr = self._csr[d]
+            if csr is not None and node + 1 < len(csr[0]):
+                lo, hi = csr[0][node], csr[0][node + 1]
+                neighbor_parts.append(csr[1][lo:hi])
+                edge_parts.append(csr[2][lo:hi])
+            delta = self._delta[d].get(node)
+            if delta:
+                neighbor_parts.append(np.fromiter((n for n, _ in delta), dtype=np.int64, count=len(delta)))
+                edge_parts.append(np.fromiter((e for _, e in delta), dtype=np.int64, count=len(delta)))
+        if not edge_parts:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        neighbors, edges = np.concatenate(neighbor_parts), np.concatenate(edge_parts)
+        mask = self._alive[edges]
+        if type_codes is not None:
+            mask &= np.isin(self._type[edges], np.asarray(type_codes, dtype=self._type.dtype))
+        return neighbors[mask], edges[mask]
+
+    def neighbors(self, node_id: str, direction: str = "out", type_codes: Optional[Sequence[int]] = None) -> List[Tuple[str, str]]:
+        node = self.node_index.get(node_id)
+        if node is None:
+            return []
+        neighbors, edges = self.neighbors_of(node, direction, type_codes)
+        return [(self.nodes[n], self.edges[e]) for n, e in zip(neighbors.tolist(), edges.tolist())]
+
+    def k_hop(self, node_id: str, k: int = 2, direction: str = "out", type_codes: Optional[Sequence[int]] = None,
+              max_nodes: int = 100000) -> Dict[str, int]:
+        """Breadth-first neighbourhood: maps each reached node id to its hop distance (start = 0)."""
+        start = self.node_index.get(node_id)
+        if start is None:
+            return {}
+        depth = {start: 0}
+        frontier = [start]
+        for hop in range(1, k + 1):
+            next_frontier = []
+            for node in frontier:
+                neighbors, _ = self.neighbors_of(node, direction, type_codes)
+                for n in neighbors.tolist():
+                    if n not in depth:
+                        depth[n] = hop
+                        next_frontier.append(n)
+                        if len(depth) >= max_nodes:
+                            return {self.nodes[n]: d for n, d in depth.items()}
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return {self.nodes[n]: d for n, d in depth.items()}
+
+    def shortest_path(self, source_id: str, target_id: str, direction: str = "out",
+                      type_codes: Optional[Sequence[int]] = None, max_depth: int = 6) -> Optional[Tuple[List[str], List[str]]]:
+        """Unweighted BFS path; returns (node ids, edge ids) or None when unreachable within max_depth."""
+        source, target = self.node_index.get(source_id), self.node_index.get(target_id)
+        if source is None or target is None:
+            return None
+        parents: Dict[int, Tuple[int, int]] = {source: (-1, -1)}
+        queue = deque([(source, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            if node == target:
+                break
+            if depth >= max_depth:
+                continue
+            neighbors, edges = self.neighbors_of(node, direction, type_codes)
+            for n, e in zip(neighbors.tolist(), edges.tolist()):
+                if n not in parents:
+                    parents[n] = (node, e)
+                    queue.append((n, depth + 1))
+        if target not in parents:
+            return None
+        nodes, edges = [], []
+        node = target
+        while node != -1:
+            nodes.append(self.nodes[node])
+            parent, edge = parents[node]
+            if edge != -1:
+                edges.append(self.edges[edge])
+            node = parent
+        return nodes[::-1], edges[::-1]
+
+    def subgraph_edges(self, node_ids: Iterable[str], type_codes: Optional[Sequence[int]] = None) -> List[str]:
+        """Edge ids whose endpoints both lie in ``node_ids``."""
+        members = {self.node_index[n] for n in node_ids if n in self.node_index}
+        if not members:
+            return []
+        member_array = np.fromiter(members, dtype=np.int64, count=len(members))
+        result = []
+        for node in members:
+            neighbors, edges = self.neighbors_of(node, "out", type_codes)
+            inside = np.isin(neighbors, member_array)
+            result.extend(self.edges[e] for e in edges[inside].tolist())
+        return result
@@ -0,0 +1,257 @@
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# A fact or pattern is (relation, source, target); pattern terms starting with "?" are variables.
+Fact = Tuple[str, str, str]
+Atom = Tuple[str, str, str]
+Binding = Dict[str, str]
+
+
+def is_var(term: str) -> bool:
+    return isinstance(term, str) and term.startswith("?")
+
+
+def substitute(atom: Atom, binding: Binding) -> Atom:
+    rel, s, t = atom
+    return rel, binding.get(s, s), binding.get(t, t)
+
+
+def unify(atom: Atom, fact: Fact, binding: Optional[Binding] = None) -> Optional[Binding]:
+    """Extends ``binding`` so that ``atom`` matches ``fact``; None when they cannot match."""
+    if atom[0] != fact[0]:
+        return None
+    result = dict(binding or {})
+    for term, value in zip(atom[1:], fact[1:]):
+        if is_var(term):
+            bound = result.get(term)
+            if bound is None:
+                result[term] = value
+            elif bound != value:
+                return None
+        elif term != value:
+            return None
+    return result
+
+
+class FactStore:
+    """Set of binary facts indexed by relation, (relation, source) and (relation, target)."""
+
+    def __init__(self):
+        self.facts: Set[Fact] = set()
+        self.by_rel: Dict[str, Set[Fact]] = defaultdict(set)
+        self.out: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        self.inc: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+
+    def __contains__(self, fact: Fact) -> bool:
+        return fact in self.facts
+
+    def __len__(self):
+        return len(self.facts)
+
+    def add(self, fact: Fact):
+        if fact not in self.facts:
+            rel, s, t = fact
+            self.facts.add(fact)
+            self.by_rel[rel].add(fact)
+            self.out[(rel, s)].add(t)
+            self.inc[(rel, t)].add(s)
+
+    def remove(self, fact: Fact):
+        if fact in self.facts:
+            rel, s, t = fact
+            self.facts.discard(fact)
+            for index, key, value in ((self.by_rel, rel, fact), (self.out, (rel, s), t), (self.inc, (rel, t), s)):
+                bucket = index.get(key)
+                if bucket is not None:
+                    bucket.discard(value)
+                    if not bucket:
+                        del index[key]
+
+    def match(self, atom: Atom, binding: Binding) -> Iterator[Binding]:
+        rel, s, t = substitute(atom, binding)
+        if not is_var(s) and not is_var(t):
+            candidates = [(rel, s, t)] if (rel, s, t) in self.facts else []
+        elif not is_var(s):
+            candidates = [(rel, s, target) for target in self.out.get((rel, s), ())]
+        elif not is_var(t):
+            candidates = [(rel, source, t) for source in self.inc.get((rel, t), ())]
+        else:
+            candidates = list(self.by_rel.get(rel, ()))
+        for fact in candidates:
+            extended = unify((rel, s, t), fact, binding)
+            if extended is not None:
+                yield extended
+
+
+class DatalogSpec:
+    def __init__(self, name: str, head: Atom, body: List[Atom]):
+        if not body:
+            raise ValueError(f"Rule {name} needs at least one body atom")
+        body_vars = {term for atom in body for term in atom[1:] if is_var(term)}
+        unbound = {term for term in head[1:] if is_var(term)} - body_vars
+        if unbound:
+            raise ValueError(f"Rule {name}: head variables {sorted(unbound)} do not appear in the body")
+        self.name = name
+        self.head = tuple(head)
+        self.body = [tuple(atom) for atom in body]
+
+
+class IncrementalReasoner:
+    """Materializes Datalog-style rules over binary facts and maintains them incrementally.
+
+    Insertions use semi-naive evaluation: each round only joins rule bodies in
+    which at least one atom matches the previous round's new facts. Retractions
+    use DRed (delete and rederive): facts that may depend on the removed ones are
+    over-deleted, then any that still have a one-step derivation from what
+    remains are rederived and propagated again. Base facts are reference-counted,
+    so several relationships asserting the same fact retract cleanly.
+    """
+
+    def __init__(self):
+        self.rules: Dict[str, DatalogSpec] = {}
+        self.base: Counter = Counter()
+        self.derived: Set[Fact] = set()
+        self.store = FactStore()
+        self.stats = {"inserted": 0, "retracted": 0, "derived": 0, "overdeleted": 0, "rederived": 0}
+
+    @property
+    def active(self) -> bool:
+        return bool(self.rules)
+
+    # --- Rules ---
+    def add_rule(self, name: str, head: Atom, body: List[Atom]):
+        spec = DatalogSpec(name, head, body)
+        self.rules[name] = spec
+        # Seed the new rule with every known fact; existing rules are already at fixpoint.
+        self._propagate(set(self.store.facts), [spec])
+
+    def remove_rule(self, name: str) -> bool:
+        if self.rules.pop(name, None) is None:
+            return False
+        self.recompute()
+        return True
+
+    def clear(self):
+        self.rules.clear()
+        self.base.clear()
+        self.derived.clear()
+        self.store = FactStore()
+
+    def recompute(self):
+        """Rebuilds the materialization from base facts (used after rule removal)."""
+        self.derived.clear()
+        self.store = FactStore()
+        for fact in self.base:
+            self.store.add(fact)
+        self._propagate(set(self.base))
+
+    # --- Base fact maintenance ---
+    def load(self, facts: Iterable[Fact]):
+        delta = set()
+        for fact in facts:
+            self.base[fact] += 1
+            if fact not in self.store:
+                self.store.add(fact)
+                delta.add(fact)
+        self._propagate(delta)
+
+    def insert(self, fact: Fact):
+        self.stats["inserted"] += 1
+        self.base[fact] += 1
+        if self.base[fact] == 1 and fact not in self.store:
+            self.store.add(fact)
+            self._propagate({fact})
+
+    def retract(self, fact: Fact):
+        if self.base.get(fact, 0) <= 0:
+            return
+        self.stats["retracted"] += 1
+        self.base[fact] -= 1
+        if self.base[fact] == 0:
+            del self.base[fact]
+            self._delete_rederive({fact})
+
+    # --- Queries ---
+    def query(self, rel: Optional[str] = None, source: Optional[str] = None, target: Optional[str] = None,
+              inferred_only: bool = True) -> List[Fact]:
+        if rel is None:
+            facts = self.derived if inferred_only else self.store.facts
+            return sorted(f for f in facts if (source is None or f[1] == source) and (target is None or f[2] == target))
+        pattern = (rel, source or "?s", target or "?t")
+        facts = [substitute(pattern, b) for b in self.store.match(pattern, {})]
+        return sorted(f for f in facts if not inferred_only or f in self.derived)
+
+    # --- Evaluation ---
+    def _join(self, body: List[Atom], skip: int, binding: Binding) -> Iterator[Binding]:
+        atoms = [atom for i, atom in enumerate(body) if i != skip]
+        yield from self._join_atoms(atoms, binding)
+
+    def _join_atoms(self, atoms: List[Atom], binding: Binding) -> Iterator[Binding]:
+        if not atoms:
+            yield binding
+            return
+        # Join the atom with the most bound terms first to keep intermediate results small.
+        best = max(range(len(atoms)), key=lambda i: sum(not is_var(t) or t in binding for t in atoms[i][1:]))
+        rest = atoms[:best] + atoms[best + 1:]
+        for extended in self.store.match(atoms[best], binding):
+            yield from self._join_atoms(rest, extended)
+
+    def _consequences(self, delta: Set[Fact], rules: Iterable[DatalogSpec]) -> Iterator[Tuple[DatalogSpec, Fact]]:
+        """Head facts of every rule instance that uses at least one fact from ``delta``."""
+        for spec in rules:
+            for i, atom in enumerate(spec.body):
+                for fact in delta:
+                    binding = unify(atom, fact)
+                    if binding is None:
+                        continue
+                    for full in self._join(spec.body, i, binding):
+                        yield spec, substitute(spec.head, full)
+
+    def _propagate(self, delta: Set[Fact], rules: Optional[Iterable[DatalogSpec]] = None):
+        rules = list(rules if rules is not None else self.rules.values())
+        while delta and rules:
+            produced = set()
+            for _, head in self._consequences(delta, rules):
+                if head not in self.derived:
+                    self.derived.add(head)
+                    self.stats["derived"] += 1
+                    if head not in self.store:
+                        produced.add(head)
+            for fact in produced:
+                self.store.add(fact)
+            delta = produced
+            # Later rounds must consider every rule, not only the seeding one.
+            rules = list(self.rules.values())
+
+    def _derivable(self, fact: Fact) -> bool:
+        for spec in self.rules.values():
+            binding = unify(spec.head, fact)
+            if binding is not None and next(self._join(spec.body, -1, binding), None) is not None:
+                return True
+        return False
+
+    def _delete_rederive(self, removed: Set[Fact]):
+        # 1. Over-delete: everything with a derivation through a removed fact, against the old state.
+        overdeleted: Set[Fact] = set()
+        frontier = set(removed)
+        while frontier:
+            next_frontier = set()
+            for _, head in self._consequences(frontier, self.rules.values()):
+                if head in self.derived and head not in overdeleted:
+                    overdeleted.add(head)
+                    next_frontier.add(head)
+            frontier = next_frontier
+        self.stats["overdeleted"] += len(overdeleted)
+        candidates = removed | overdeleted
+        self.derived -= candidates
+        for fact in candidates:
+            if fact not in self.base:
+                self.store.remove(fact)
+        # 2. Rederive: candidates with an alternative derivation from what remains come back.
+        rederived = {fact for fact in candidates if fact not in self.store and self._derivable(fact)}
+        rederived |= {fact for fact in overdeleted if fact in self.store and self._derivable(fact)}
+        for fact in rederived:
+            self.derived.add(fact)
+            self.store.add(fact)
+        self.stats["rederived"] += len(rederived)
+        self._propagate(rederived)
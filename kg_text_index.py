@@ -0,0 +1,133 @@
+import heapq
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+MATCH_MODES = ("substring", "prefix", "fuzzy")
+
+
+def normalize(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of normalized text, padded so short strings and word edges still produce grams."""
+    padded = f"  {normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _query_grams(text: str) -> Set[str]:
+    # Substring queries must not require the padding grams of the query's own edges.
+    text = normalize(text)
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """In-memory trigram inverted index for prefix, substring and fuzzy lookups.
+
+    Postings map each trigram to the set of document ids containing it. Substring
+    and prefix queries intersect the postings of the query's trigrams (smallest
+    first) and verify the survivors against the stored text; fuzzy queries rank
+    documents by trigram Dice similarity. Updates are incremental, like BM25Index.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.postings: Dict[str, Set[Hashable]] = defaultdict(set)
+        self.texts: Dict[Hashable, str] = {}
+        self.doc_grams: Dict[Hashable, Set[str]] = {}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, doc_id: Hashable, text: Optional[str]):
+        normalized = normalize(text or "")
+        grams = trigrams(normalized)
+        with self.lock:
+            self._remove(doc_id)
+            for gram in grams:
+                self.postings[gram].add(doc_id)
+            self.texts[doc_id] = normalized
+            self.doc_grams[doc_id] = grams
+
+    def add_batch(self, items: Iterable[Tuple[Hashable, Optional[str]]]):
+        for doc_id, text in items:
+            self.add(doc_id, text)
+
+    def remove(self, doc_id: Hashable):
+        with self.lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: Hashable):
+        grams = self.doc_grams.pop(doc_id, None)
+        if grams is None:
+            return
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self.postings[gram]
+        self.texts.pop(doc_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.postings.clear()
+            self.texts.clear()
+            self.doc_grams.clear()
+
+    # --- Queries ---
+    def _candidates(self, grams: Set[str], restrict: Optional[Set[Hashable]]) -> Iterable[Hashable]:
+        if not grams:
+            # Query shorter than a trigram: verify against every stored text.
+            return restrict if restrict is not None else self.texts.keys()
+        postings = sorted((self.postings.get(g, set()) for g in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        if restrict is not None:
+            candidates &= restrict
+        return candidates
+
+    def search(self, query: str, mode: str = "substring", restrict: Optional[Set[Hashable]] = None,
+               limit: Optional[int] = None, min_similarity: float = 0.3) -> List[Tuple[Hashable, float]]:
+        """Returns (doc_id, score) pairs, best first; ``restrict`` limits results to a candidate id set.
+
+        Exact modes score 1.0 and order by (text, id) so pages are stable; fuzzy
+        mode orders by similarity, then id.
+        """
+        if mode not in MATCH_MODES:
+            raise ValueError(f"mode must be one of {MATCH_MODES}")
+        needle = normalize(query)
+        with self.lock:
+            if mode == "fuzzy":
+                return self._fuzzy(needle, restrict, limit, min_similarity)
+            if mode == "prefix":
+                # The "  x" padding gram anchors prefix queries to the start of the text.
+                grams = {g for g in trigrams(needle) if not g.endswith(" ")}
+                matches = [d for d in self._candidates(grams, restrict) if self.texts.get(d, "").startswith(needle)]
+            else:
+                matches = [d for d in self._candidates(_query_grams(needle), restrict) if needle in self.texts.get(d, "")]
+            key = lambda d: (self.texts[d], str(d))
+            ordered = heapq.nsmallest(limit, matches, key=key) if limit is not None else sorted(matches, key=key)
+        return [(doc_id, 1.0) for doc_id in ordered]
+
+    def _fuzzy(self, needle: str, restrict, limit, min_similarity) -> List[Tuple[Hashable, float]]:
+        grams = trigrams(needle)
+        if not grams:
+            return []
+        shared: Counter = Counter()
+        for gram in grams:
+            for doc_id in self.postings.get(gram, ()):
+                shared[doc_id] += 1
+        scored = []
+        for doc_id, overlap in shared.items():
+            if restrict is not None and doc_id not in restrict:
+                continue
+            score = 2.0 * overlap / (len(grams) + len(self.doc_grams[doc_id]))
+            if score >= min_similarity:
+                scored.append((doc_id, score))
+        key = lambda item: (-item[1], str(item[0]))
+        return heapq.nsmallest(limit, scored, key=key) if limit is not None else sorted(scored, key=key)
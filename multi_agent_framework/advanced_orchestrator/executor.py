@@ -0,0 +1,404 @@
+import asyncio
+import concurrent.futures
+import inspect
+import pickle
+import threading
+import time
+from collections import Counter, deque
+
+from core.graph_store import CompactGraph
+from core.run_store import dump_output
+from core.step_cache import step_key
+
+
+class _Attempt:
+    """One attempt at a step: the original call plus a hedged duplicate, if any."""
+
+    def __init__(self, step, inputs, timeout, hedge_after, cancel):
+        self.step = step
+        self.inputs = inputs
+        self.started = None  # time.monotonic() when its first call began running in a worker
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.cancel = cancel  # threading.Event passed to runners that accept ``cancel``
+        self.futures = set()
+        self.primary = None
+        self.hedged = False
+
+    def begin(self):
+        if self.started is None:
+            self.started = time.monotonic()
+
+    def due(self, seconds, now):
+        """When ``seconds`` into the attempt elapse; an attempt still queued counts from ``now``."""
+        return (self.started if self.started is not None else now) + seconds
+
+
+class _RunState:
+    def __init__(self, completed, force=False):
+        self.completed = set(completed)
+        self.running = {}  # step_id -> _Attempt
+        self.abandoned = set()  # timed-out or losing hedged calls whose worker is still busy
+        self.blocked = False  # ready steps were held back by max_workers
+        self.failed = set()
+        self.groups = Counter()
+        self.force = force
+        self.cached = set()
+        self.keys = {}  # step_id -> cache key of a dispatched cacheable step
+        self.refs = {}  # step_id -> artifact ref of its output
+
+    def inflight(self):
+        self.abandoned = {future for future in self.abandoned if not future.done()}
+        return sum(len(attempt.futures) for attempt in self.running.values()) + len(self.abandoned)
+
+
+class WorkflowExecutor:
+    """Runs WorkflowEngine workflows, dispatching every ready step at once.
+
+    ``runner(step, inputs)`` executes one step: ``step`` is its definition and
+    ``inputs`` maps each ``depends_on`` id to that step's recorded output. Outputs
+    (or the error of a raising runner) are written back with ``record_step_output``,
+    so engine retries, memory-based conditions and run history work as before.
+
+    Modes: ``thread`` and ``process`` run the runner on a pool of ``max_workers``
+    (process mode needs a picklable, module-level runner); ``async`` awaits coroutine
+    runners on the event loop and sends plain functions to the default executor.
+    ``limits`` caps concurrently running steps per group, where a step's group is
+    its ``concurrency_group`` or, failing that, its ``agent``.
+
+    Unapproved HITL steps and steps whose condition is false are not started; a
+    later ``run`` resumes from the steps the engine already records as successful.
+
+    With a ``cache`` (a ``StepCache``), steps marked ``cache: true`` are memoized
+    on (agent, version, params, input artifact refs): a hit records the stored
+    output without calling the runner and shows as ``cached`` in the summary.
+    The version is the step's ``version`` or else ``versions(agent)``; ``force``
+    on ``run`` skips lookups but still refreshes the cache.
+
+    An attempt running past its deadline (``engine.get_timeout``) is cancelled
+    and recorded as a ``TimeoutError`` failure, so the engine's retries and
+    backoff apply. The deadline counts from when the call starts in a worker
+    (from dispatch in process mode), not from when it was queued. Async tasks
+    are cancelled outright; pool futures that have not started are dropped, and
+    runners accepting a ``cancel`` keyword (thread/async modes) get a
+    ``threading.Event`` to stop cooperatively, otherwise their late result is
+    discarded. Abandoned pool calls still running keep counting against
+    ``max_workers`` until they return, so later steps wait for a free worker
+    rather than queueing behind them. Steps marked ``hedge: true`` (or
+    ``hedge: <percentile>``) must be idempotent: once an attempt outlives that
+    percentile (default ``hedge_percentile``) of its group's recent successful
+    latencies, a duplicate is started and the first success wins.
+    """
+
+    MODES = ("thread", "process", "async")
+
+    def __init__(self, engine, runner, mode="thread", max_workers=8, limits=None, cache=None, versions=None,
+                 hedge_percentile=0.95, hedge_min_samples=20, latency_window=256):
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}, not {mode!r}")
+        self.engine = engine
+        self.runner = runner
+        self.mode = mode
+        self.max_workers = max_workers
+        self.limits = dict(limits or {})
+        self.cache = cache
+        self.versions = versions
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency_window = latency_window
+        self.stats = {"timeouts": 0, "hedges": 0, "hedge_wins": 0}
+        self._latencies = {}  # group -> deque of recent successful attempt latencies (s)
+        try:
+            self._cancellable = mode != 'process' and 'cancel' in inspect.signature(runner).parameters
+        except (TypeError, ValueError):
+            self._cancellable = False
+
+    # --- Scheduling ---
+    @staticmethod
+    def _steps(workflow):
+        if isinstance(workflow, CompactGraph):
+            return {step_id: workflow.nodes[step_id] for step_id in workflow.nodes}
+        steps = {}
+        for step in workflow:
+            steps[step['id']] = step
+            for loop_step in step.get('loop', {}).get('steps', []):
+                steps[loop_step['id']] = loop_step
+        return steps
+
+    @staticmethod
+    def _group(step):
+        return step.get('concurrency_group', step.get('agent'))
+
+    def _start(self, workflow_id, force=False):
+        if self.engine.get_workflow(workflow_id) is None:
+            raise KeyError(f"Unknown workflow {workflow_id!r}")
+        status = self.engine.get_run_status(workflow_id)
+        return _RunState((step_id for step_id, s in status.items() if s == 'success'), force)
+
+    # --- Memoization ---
+    def _cache_key(self, state, step, inputs):
+        if self.cache is None or not step.get('cache') or step.get('hitl'):
+            return None
+        agent = step.get('agent')
+        version = step.get('version', self.versions(agent) if self.versions else None)
+        try:
+            refs = {dep: state.refs[dep] if state.refs.get(dep) else dump_output(output)[1]
+                    for dep, output in inputs.items()}
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+        state.refs.update(refs)
+        return step_key(agent, version, step.get('params', {}), refs)
+
+    def _replay(self, workflow_id, state, step_id, key):
+        """Records a cached output for ``step_id``; False on a miss."""
+        hit, output, ref = self.cache.get(key)
+        if not hit:
+            return False
+        self.engine.record_step_output(workflow_id, step_id, output)
+        state.completed.add(step_id)
+        state.cached.add(step_id)
+        state.refs[step_id] = ref
+        return True
+
+    def _dispatchable(self, workflow_id, state):
+        """Claims ready steps within the worker and group limits; yields (step_id, attempt).
+
+        Cache hits are recorded on the spot, and the steps they unblock are
+        considered in the same call.
+        """
+        replayed = True
+        while replayed:
+            replayed = False
+            state.blocked = False
+            # No completed set or memory: the engine answers from its incremental per-run state.
+            for step_id in self.engine.next_steps(workflow_id):
+                if isinstance(step_id, dict):
+                    # Loop restarts hand back the first loop step's definition.
+                    step_id = step_id['id']
+                if state.inflight() >= self.max_workers:
+                    state.blocked = True
+                    break
+                step = self.engine.get_step(workflow_id, step_id)
+                if step_id in state.running or step_id in state.failed or step is None:
+                    continue
+                group = self._group(step)
+                if group in self.limits and state.groups[group] >= self.limits[group]:
+                    continue
+                inputs = self.engine.get_outputs(workflow_id, step.get('depends_on', []))
+                key = self._cache_key(state, step, inputs)
+                if key is not None:
+                    if not state.force and self._replay(workflow_id, state, step_id, key):
+                        replayed = True
+                        continue
+                    state.keys[step_id] = key
+                state.groups[group] += 1
+                attempt = state.running[step_id] = _Attempt(
+                    step, inputs, self.engine.get_timeout(workflow_id, step_id),
+                    self._hedge_after(step), threading.Event() if self._cancellable else None)
+                yield step_id, attempt
+
+    # --- Deadlines and hedging ---
+    def _hedge_after(self, step):
+        """Latency after which a duplicate of ``step`` starts; None if not hedged or too few samples."""
+        hedge = step.get('hedge')
+        samples = self._latencies.get(self._group(step))
+        if not hedge or not samples or len(samples) < self.hedge_min_samples:
+            return None
+        percentile = self.hedge_percentile if hedge is True else hedge
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+    def _wake_at(self, workflow_id, state):
+        """Next deadline, hedge or retry time to wake for; None waits for a completion."""
+        now = time.monotonic()
+        times = [attempt.due(attempt.timeout, now) for attempt in state.running.values() if attempt.timeout]
+        times += [attempt.due(attempt.hedge_after, now) for attempt in state.running.values()
+                  if attempt.hedge_after is not None and not attempt.hedged]
+        retry_at = self.engine.next_retry_at(workflow_id)
+        if retry_at is not None:
+            times.append(retry_at)
+        return min(times, default=None)
+
+    def _abandon(self, state, attempt, running):
+        if attempt.cancel is not None:
+            attempt.cancel.set()
+        for future in attempt.futures:
+            future.cancel()
+            if not future.done():
+                state.abandoned.add(future)
+            running.pop(future, None)
+        attempt.futures.clear()
+
+    def _overdue(self, workflow_id, state, running):
+        """Fails attempts past their deadline; returns (step_id, attempt) pairs due a hedged duplicate."""
+        now = time.monotonic()
+        hedges = []
+        for step_id, attempt in list(state.running.items()):
+            if attempt.started is None:
+                continue
+            if attempt.timeout and now >= attempt.due(attempt.timeout, now):
+                self._abandon(state, attempt, running)
+                self.stats["timeouts"] += 1
+                self._settle(workflow_id, state, step_id, None,
+                             TimeoutError(f"Step {step_id!r} exceeded its {attempt.timeout}s deadline"))
+            elif (attempt.hedge_after is not None and not attempt.hedged
+                  and now >= attempt.due(attempt.hedge_after, now)
+                  and state.inflight() + len(hedges) < self.max_workers):
+                attempt.hedged = True
+                self.stats["hedges"] += 1
+                hedges.append((step_id, attempt))
+        return hedges
+
+    def _completed(self, workflow_id, state, step_id, future, running):
+        attempt = state.running[step_id]
+        attempt.futures.discard(future)
+        try:
+            output, error = future.result(), None
+        except (Exception, asyncio.CancelledError) as e:
+            output, error = None, e
+        if error is not None and attempt.futures:
+            return  # the hedged twin may still succeed
+        if error is None:
+            if future is not attempt.primary:
+                self.stats["hedge_wins"] += 1
+            self._latencies.setdefault(self._group(attempt.step), deque(maxlen=self.latency_window)).append(
+                time.monotonic() - attempt.started)
+        self._abandon(state, attempt, running)
+        self._settle(workflow_id, state, step_id, output, error)
+
+    def _settle(self, workflow_id, state, step_id, output, error):
+        step = state.running.pop(step_id).step
+        state.groups[self._group(step)] -= 1
+        if error is None:
+            status = 'success'
+        else:
+            output, status = {'status': 'error', 'error_type': type(error).__name__, 'message': str(error)}, 'failure'
+        self.engine.record_step_output(workflow_id, step_id, output, status=status)
+        key = state.keys.pop(step_id, None)
+        state.refs.pop(step_id, None)  # a re-run (retry, loop) invalidates the previous output's ref
+        if status == 'success':
+            state.completed.add(step_id)
+            if key is not None:
+                state.refs[step_id] = self.cache.put(key, output, agent=step.get('agent'))
+        elif self.engine.get_run_status(workflow_id).get(step_id) != 'retry':
+            state.failed.add(step_id)
+
+    def _summary(self, workflow_id, state):
+        """Final status per step: success/failure/cached, or why a step never ran."""
+        workflow = self.engine.get_workflow(workflow_id)
+        status = self.engine.get_run_status(workflow_id)
+        approvals = self.engine.get_hitl_approvals(workflow_id)
+        summary = {}
+        for step_id, step in self._steps(workflow).items():
+            if step_id in state.cached:
+                summary[step_id] = 'cached'
+            elif step_id in state.completed or step_id in state.failed:
+                summary[step_id] = status.get(step_id, 'success' if step_id in state.completed else 'failure')
+            elif step.get('hitl') and step_id not in approvals:
+                summary[step_id] = 'awaiting_approval'
+            else:
+                summary[step_id] = 'not_run'
+        return summary
+
+    # --- Execution ---
+    def _kwargs(self, attempt):
+        return {'cancel': attempt.cancel} if attempt.cancel is not None else {}
+
+    def _timed_call(self, attempt, kwargs):
+        attempt.begin()
+        return self.runner(attempt.step, attempt.inputs, **kwargs)
+
+    @staticmethod
+    def _track(running, step_id, attempt, future):
+        if attempt.primary is None:
+            attempt.primary = future
+        attempt.futures.add(future)
+        running[future] = step_id
+
+    def run(self, workflow_id, force=False):
+        """Runs ``workflow_id`` until no step is running, ready or backing off; returns the per-step summary.
+
+        ``force`` re-executes cacheable steps instead of reusing cached outputs.
+        """
+        if self.mode == 'async':
+            return asyncio.run(self.run_async(workflow_id, force))
+        pool_class = (concurrent.futures.ThreadPoolExecutor if self.mode == 'thread'
+                      else concurrent.futures.ProcessPoolExecutor)
+        state = self._start(workflow_id, force)
+        running = {}
+        pool = pool_class(max_workers=self.max_workers)
+
+        def submit(step_id, attempt):
+            if self.mode == 'process':
+                # A child process cannot stamp the attempt; the pool never queues
+                # calls (see inflight), so dispatch is when the call starts.
+                attempt.begin()
+                future = pool.submit(self.runner, attempt.step, attempt.inputs)
+            else:
+                future = pool.submit(self._timed_call, attempt, self._kwargs(attempt))
+            self._track(running, step_id, attempt, future)
+
+        try:
+            while True:
+                for step_id, attempt in self._dispatchable(workflow_id, state):
+                    submit(step_id, attempt)
+                wake_at = self._wake_at(workflow_id, state)
+                # Ready steps held back only by abandoned calls wait for those calls to return.
+                waiting_on = set(running) | (state.abandoned if state.blocked else set())
+                if not waiting_on and wake_at is None:
+                    break
+                timeout = None if wake_at is None else max(0.0, wake_at - time.monotonic())
+                if waiting_on:
+                    done, _ = concurrent.futures.wait(waiting_on, timeout=timeout,
+                                                      return_when=concurrent.futures.FIRST_COMPLETED)
+                else:
+                    done = ()
+                    time.sleep(timeout)
+                for future in done:
+                    if future in running:
+                        self._completed(workflow_id, state, running.pop(future), future, running)
+                for step_id, attempt in self._overdue(workflow_id, state, running):
+                    submit(step_id, attempt)
+        finally:
+            # Abandoned (timed-out or losing hedged) calls must not hold up the caller.
+            pool.shutdown(wait=False, cancel_futures=True)
+        return self._summary(workflow_id, state)
+
+    async def _call(self, attempt, kwargs):
+        if inspect.iscoroutinefunction(self.runner):
+            attempt.begin()
+            return await self.runner(attempt.step, attempt.inputs, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(None, self._timed_call, attempt, kwargs)
+
+    async def run_async(self, workflow_id, force=False):
+        state = self._start(workflow_id, force)
+        running = {}
+
+        def submit(step_id, attempt):
+            self._track(running, step_id, attempt,
+                        asyncio.ensure_future(self._call(attempt, self._kwargs(attempt))))
+
+        try:
+            while True:
+                for step_id, attempt in self._dispatchable(workflow_id, state):
+                    submit(step_id, attempt)
+                wake_at = self._wake_at(workflow_id, state)
+                waiting_on = set(running) | (state.abandoned if state.blocked else set())
+                if not waiting_on and wake_at is None:
+                    break
+                timeout = None if wake_at is None else max(0.0, wake_at - time.monotonic())
+                if waiting_on:
+                    done, _ = await asyncio.wait(waiting_on, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    done = ()
+                    await asyncio.sleep(timeout)
+                for task in done:
+                    if task in running:
+                        self._completed(workflow_id, state, running.pop(task), task, running)
+                for step_id, attempt in self._overdue(workflow_id, state, running):
+                    submit(step_id, attempt)
+        finally:
+            for task in running:
+                task.cancel()
+        return self._summary(workflow_id, state)
+
@@ -1,10 +1,13 @@
 from advanced_orchestrator.registry import AgentRegistry
 from advanced_orchestrator.workflow import WorkflowEngine
+from advanced_orchestrator.executor import WorkflowExecutor
 from multi_agent_framework.distributed.message_broker import MessageBroker
 from advanced_orchestrator.monitoring import Monitoring
 from advanced_orchestrator.api import app
 from advanced_orchestrator.plugin_loader import PluginLoader
 from core.event_store import EventStore
+from core.run_store import WorkflowRunStore
+from core.step_cache import StepCache
 import threading
 import uvicorn
 import time
@@ -18,7 +21,16 @@ class AdvancedOrchestrator:
     def __init__(self):
         self.event_store = EventStore()
         self.registry = AgentRegistry(event_store=self.event_store)
-        self.workflow_engine = WorkflowEngine(event_store=self.event_store)
+        config_path = os.path.join(os.path.dirname(__file__),
+                                   '../config/config.yaml')
+        with open(config_path, 'r') as f:
+            self.config = yaml.safe_load(f)
+        checkpoints = self.config.get('workflow_checkpoints')
+        self.run_store = WorkflowRunStore(**checkpoints) if checkpoints else None
+        self.workflow_engine = WorkflowEngine(event_store=self.event_store,
+                                              checkpoint_store=self.run_store)
+        # Runs interrupted by a restart; their incomplete steps resume in run().
+        self.resumable_workflows = self.workflow_engine.recover()
         self.message_broker = MessageBroker()
         self.monitoring = Monitoring()
         # Inject dependencies into API
@@ -27,14 +39,16 @@ class AdvancedOrchestrator:
         app.MESSAGE_BROKER = self.message_broker
         self.message_broker.declare_exchange('agent_exchange', 'direct')
         # Plugin loader
-        config_path = os.path.join(os.path.dirname(__file__),
-                                   '../config/config.yaml')
-        with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
         self.plugin_loader = PluginLoader(
             os.path.join(os.path.dirname(__file__), '../config/plugins'),
             self.registry)
         self.plugin_loader.load_plugins(self.config)
+        step_cache = self.config.get('step_cache')
+        self.step_cache = StepCache(**step_cache) if step_cache else None
+        self.workflow_executor = WorkflowExecutor(
+            self.workflow_engine, self._run_workflow_step,
+            cache=self.step_cache, versions=self.plugin_loader.agent_version,
+            **self.config.get('workflow_executor', {}))
         # Stubs for advanced features
         self.human_in_the_loop_queue = []  # For HITL steps
         self.edge_agents = {}  # For edge/federated agent support
@@ -76,6 +90,22 @@ class AdvancedOrchestrator:
                 print("[SelfOptimizationRLAgent Suggestions]", result_rl)
             time.sleep(5)
 
+    def _run_workflow_step(self, step, inputs):
+        agent = step.get('agent')
+        if agent not in self.plugin_loader.agent_pools:
+            raise LookupError(f"No agent pool for {agent!r} (step {step['id']})")
+        return self.plugin_loader.assign_task(
+            agent,
+            {'type': 'workflow_step', 'step_id': step['id'],
+             'params': step.get('params', {}), 'inputs': inputs})
+
+    def run_workflow(self, workflow_id, force=False):
+        """Run every ready step of a submitted workflow concurrently; returns per-step status.
+
+        ``force`` re-executes memoized (``cache: true``) steps instead of reusing their outputs.
+        """
+        return self.workflow_executor.run(workflow_id, force=force)
+
     def automated_reasoning_pipeline(self, workflow_id, question,
                                      feedback=None):
         try:
@@ -156,6 +186,8 @@ class AdvancedOrchestrator:
     def run(self):
         self.start_api()
         threading.Thread(target=self.monitor_agents, daemon=True).start()
+        for workflow_id in self.resumable_workflows:
+            threading.Thread(target=self.run_workflow, args=(workflow_id,), daemon=True).start()
         # Main event loop for orchestrator
         while True:
             time.sleep(1)
@@ -30,6 +30,7 @@ class PluginLoader:
         self.plugins_dir = plugins_dir
         self.registry = registry
         self.agent_pools = {}
+        self.agent_versions = {}
 
     def load_plugins(self, config):
         for plugin in config.get('plugins', []):
@@ -45,6 +46,11 @@ class PluginLoader:
             pool_size = plugin.get('pool_size', 1)
             self.agent_pools[plugin['name']] = AgentPool(
                 agent_class, pool_size, self.registry)
+            self.agent_versions[plugin['name']] = plugin.get(
+                'version', getattr(agent_class, 'VERSION', None))
+
+    def agent_version(self, plugin_name):
+        return self.agent_versions.get(plugin_name)
 
     def assign_task(self, plugin_name, task, strategy='round_robin'):
         pool = self.agent_pools[plugin_name]
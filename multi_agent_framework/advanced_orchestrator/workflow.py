@@ -1,16 +1,24 @@
-import networkx as nx
+import random
 import threading
 import time
 from core.event_store import EventStore
+from core.graph_store import CompactGraph
 
 class WorkflowEngine:
     """
     Advanced workflow engine for DAGs, branching, and conditional logic.
+
+    A failed step with ``retries: n`` is retried up to n times, each after an
+    exponential backoff with full jitter (step ``backoff`` overrides
+    ``retry_backoff``); ``next_steps`` holds it back until the delay has passed.
     """
 
-    def __init__(self, event_store=None):
+    DEFAULT_BACKOFF = {'base': 0.5, 'factor': 2.0, 'max': 30.0, 'jitter': True}
+
+    def __init__(self, event_store=None, checkpoint_store=None, retry_backoff=None):
         self._workflows = {}
-        self._lock = threading.Lock()
+        # Re-entrant: record_step_output holds the lock while failure handling calls retry_step.
+        self._lock = threading.RLock()
         self.event_store = event_store or EventStore()
         self._read_model = {}
         self._hitl_approvals = {}  # {workflow_id: {step_id}}
@@ -18,54 +26,162 @@ class WorkflowEngine:
         self._feedback_log = {}  # {workflow_id: [feedback_dict]}
         self._run_status = {}  # {workflow_id: {step_id: status}}
         self._run_history = {}  # {workflow_id: [{step_id, status, ...}]}
+        # Incremental scheduling state, updated in O(out-degree) per completed step.
+        self._completed = {}  # {workflow_id: {step_id}} steps recorded as successful
+        self._pending = {}  # {workflow_id: {step_id: unmet dependency count}} (DAG only)
+        self._ready = {}  # {workflow_id: {step_id: True once its condition passed, else None}} (DAG only)
+        # Optional durability: a core.run_store.WorkflowRunStore checkpointing every run update.
+        self.checkpoint_store = checkpoint_store
+        self.retry_backoff = {**self.DEFAULT_BACKOFF, **(retry_backoff or {})}
+        self._failures = {}  # {workflow_id: {step_id: failed attempts this run}}
+        self._retry_due = {}  # {workflow_id: {step_id: time.monotonic() when its retry may start}}
+        self._timeouts = {}  # {workflow_id: {step_id: seconds}} set_timeout overrides of step 'timeout'
 
     def add_workflow(self, workflow_id, steps, dag=False):
         """Add a workflow definition (DAG or chain)."""
         with self._lock:
-            if dag:
-                graph = nx.DiGraph()
-                for step in steps:
-                    graph.add_node(step['id'], **step)
-                for step in steps:
-                    for dep in step.get('depends_on', []):
-                        graph.add_edge(dep, step['id'])
-                self._workflows[workflow_id] = graph
-            else:
-                self._workflows[workflow_id] = steps
+            self._install_workflow(workflow_id, steps, dag)
             self.event_store.append_event(
                 'workflow_added',
                 {'workflow_id': workflow_id, 'steps': steps, 'dag': dag})
-            self._update_read_model(workflow_id)
-            self._hitl_approvals[workflow_id] = set()
-            self._memory[workflow_id] = {}
-            self._feedback_log[workflow_id] = []
-            self._run_status[workflow_id] = {}
-            self._run_history[workflow_id] = []
+            if self.checkpoint_store is not None:
+                self.checkpoint_store.save_workflow(workflow_id, steps, dag)
+
+    def _install_workflow(self, workflow_id, steps, dag):
+        """Build the definition and empty run state; callers hold the lock."""
+        if dag:
+            graph = CompactGraph(multigraph=False)
+            for step in steps:
+                graph.add_node(step['id'], **step)
+            for step in steps:
+                for dep in step.get('depends_on', []):
+                    graph.add_edge(dep, step['id'])
+            self._workflows[workflow_id] = graph
+        else:
+            self._workflows[workflow_id] = steps
+        self._update_read_model(workflow_id)
+        self._hitl_approvals[workflow_id] = set()
+        self._memory[workflow_id] = {}
+        self._feedback_log[workflow_id] = []
+        self._run_status[workflow_id] = {}
+        self._run_history[workflow_id] = []
+        self._failures[workflow_id] = {}
+        self._retry_due[workflow_id] = {}
+        self._timeouts[workflow_id] = {}
+        self._reset_schedule(workflow_id, ())
+
+    def recover(self):
+        """Reload checkpointed runs; returns the ids of workflows that can make progress.
+
+        Steps recorded as successful keep their outputs and are not run again;
+        failure counts are restored, so retries resume with what is left of each
+        step's budget.
+        A run is returned when next_steps has a step for it that is not a final
+        failure: one in flight at the crash, marked for retry, or simply ready.
+        Runs left with only exhausted retries, false conditions or HITL steps
+        awaiting approval are reloaded but not returned.
+        """
+        if self.checkpoint_store is None:
+            return []
+        resumable = []
+        for workflow_id, run in self.checkpoint_store.load().items():
+            with self._lock:
+                self._install_workflow(workflow_id, run['steps'], run['dag'])
+                self._memory[workflow_id] = run['memory']
+                self._run_status[workflow_id] = run['status']
+                self._run_history[workflow_id] = run['history']
+                self._hitl_approvals[workflow_id] = run['approvals']
+                self._failures[workflow_id] = run['failures']
+                self._reset_schedule(workflow_id, [s for s, status in run['status'].items() if status == 'success'])
+            ready = (step['id'] if isinstance(step, dict) else step for step in self.next_steps(workflow_id))
+            if any(run['status'].get(step_id) != 'failure' for step_id in ready):
+                resumable.append(workflow_id)
+        return resumable
+
+    def _reset_schedule(self, workflow_id, completed):
+        """Rebuild dependency counters and the ready set from scratch (O(V+E))."""
+        workflow = self._workflows[workflow_id]
+        self._completed[workflow_id] = set(completed)
+        if not isinstance(workflow, CompactGraph):
+            return
+        done = self._completed[workflow_id]
+        pending = {n: sum(1 for dep in workflow.predecessors(n) if dep not in done) for n in workflow.nodes}
+        self._pending[workflow_id] = pending
+        self._ready[workflow_id] = {n: None for n, unmet in pending.items() if unmet == 0 and n not in done}
+
+    def _mark_completed(self, workflow_id, step_id):
+        completed = self._completed[workflow_id]
+        if step_id in completed:
+            return
+        completed.add(step_id)
+        workflow = self._workflows[workflow_id]
+        if not isinstance(workflow, CompactGraph) or step_id not in workflow:
+            return
+        ready, pending = self._ready[workflow_id], self._pending[workflow_id]
+        ready.pop(step_id, None)
+        for successor in workflow.successors(step_id):
+            pending[successor] -= 1
+            if pending[successor] == 0 and successor not in completed:
+                ready[successor] = None
+
+    def _sync_completed(self, workflow_id, completed_steps):
+        """Fold a caller-supplied completed set into the tracked state; rebuild only if it shrank."""
+        if completed_steps is None:
+            return
+        if not self._completed[workflow_id].issubset(completed_steps):
+            self._reset_schedule(workflow_id, completed_steps)
+            return
+        for step_id in completed_steps:
+            self._mark_completed(workflow_id, step_id)
 
     def get_workflow(self, workflow_id):
         with self._lock:
             return self._workflows.get(workflow_id)
 
-    def next_steps(self, workflow_id, completed_steps, memory=None):
-        """Return next steps ready to run, considering branching/conditions."""
+    def get_step(self, workflow_id, step_id):
+        """Definition of ``step_id`` (including loop steps of chain workflows), or None."""
+        workflow = self.get_workflow(workflow_id)
+        if isinstance(workflow, CompactGraph):
+            return workflow.nodes[step_id] if step_id in workflow.nodes else None
+        for step in workflow or ():
+            if step['id'] == step_id:
+                return step
+            for loop_step in step.get('loop', {}).get('steps', []):
+                if loop_step['id'] == step_id:
+                    return loop_step
+        return None
+
+    def next_steps(self, workflow_id, completed_steps=None, memory=None):
+        """Return next steps ready to run, considering branching/conditions.
+
+        ``completed_steps=None`` uses the steps recorded as successful through
+        ``record_step_output`` (and, if ``memory`` is also None, their recorded
+        outputs); DAG readiness then comes from dependency counters kept per run
+        instead of a scan of every node and predecessor. A step's condition is
+        evaluated once it becomes ready and is not re-evaluated after it passes.
+        """
         workflow = self.get_workflow(workflow_id)
-        if isinstance(workflow, nx.DiGraph):
-            ready = [
-                n for n in workflow.nodes
-                if all(dep in completed_steps
-                       for dep in workflow.predecessors(n)) and
-                n not in completed_steps
-            ]
-            # Filter by HITL and conditions
-            ready = [
-                n for n in ready
-                if not self._is_hitl_step(workflow, n) or
-                n in self._hitl_approvals[workflow_id]
-            ]
-            ready = [
-                n for n in ready
-                if self._check_conditions(workflow, n, memory)
-            ]
+        if completed_steps is None and memory is None:
+            memory = self._memory[workflow_id]
+        if isinstance(workflow, CompactGraph):
+            with self._lock:
+                self._sync_completed(workflow_id, completed_steps)
+                completed_steps = self._completed[workflow_id]
+                candidates = self._ready[workflow_id]
+                approvals = self._hitl_approvals[workflow_id]
+                backing_off, now = self._retry_due[workflow_id], time.monotonic()
+                ready = []
+                for n, passed in candidates.items():
+                    if backing_off and backing_off.get(n, 0) > now:
+                        continue
+                    # Filter by HITL and conditions
+                    if self._is_hitl_step(workflow, n) and n not in approvals:
+                        continue
+                    if not passed:
+                        if not self._check_conditions(workflow, n, memory):
+                            continue
+                        candidates[n] = True
+                    ready.append(n)
 
             # Handle loops
             for step_id in ready:
@@ -75,8 +191,12 @@ class WorkflowEngine:
 
             return ready
         else:
+            if completed_steps is None:
+                completed_steps = self._completed[workflow_id]
             for step in workflow:
                 if step['id'] not in completed_steps:
+                    if self._retry_due[workflow_id].get(step['id'], 0) > time.monotonic():
+                        return []
                     if self._is_hitl_step(
                             workflow, step
                     ) and step['id'] not in self._hitl_approvals[workflow_id]:
@@ -118,31 +238,43 @@ class WorkflowEngine:
             self.event_store.append_event(
                 'hitl_approved',
                 {'workflow_id': workflow_id, 'step_id': step_id})
+            if self.checkpoint_store is not None:
+                self.checkpoint_store.record_approval(workflow_id, step_id)
+
+    def get_hitl_approvals(self, workflow_id):
+        """Ids of the HITL steps approved so far."""
+        with self._lock:
+            return set(self._hitl_approvals.get(workflow_id, ()))
 
     def record_step_output(self, workflow_id, step_id, output,
                            status='success'):
         """Record step output, status, and add to run history."""
         with self._lock:
+            timestamp = time.time()
             self._memory[workflow_id][step_id] = output
             self._run_status[workflow_id][step_id] = status
+            self._retry_due[workflow_id].pop(step_id, None)
             self._run_history[workflow_id].append({
                 'step_id': step_id,
                 'status': status,
                 'output': output,
-                'timestamp': time.time()
+                'timestamp': timestamp
             })
+            if self.checkpoint_store is not None:
+                self.checkpoint_store.record_step(workflow_id, step_id, status, output, timestamp)
 
-            if status == 'failure':
+            if status == 'success':
+                self._mark_completed(workflow_id, step_id)
+            elif status == 'failure':
                 self._handle_failure(workflow_id, step_id)
 
     def _handle_failure(self, workflow_id, step_id):
-        workflow = self.get_workflow(workflow_id)
-        step = workflow.nodes[step_id]
-
-        retries = step.get('retries', 0)
-        if retries > 0:
-            self.retry_step(workflow_id, step_id)
-            step['retries'] -= 1
+        step = self.get_step(workflow_id, step_id)
+        if step is None:
+            return
+        failures = self._failures[workflow_id][step_id] = self._failures[workflow_id].get(step_id, 0) + 1
+        if failures <= step.get('retries', 0):
+            self.retry_step(workflow_id, step_id, delay=self.backoff_delay(step, failures))
         elif 'on_failure' in step:
             # This is a simplification. A more robust implementation would
             # dynamically add the on_failure step to the workflow.
@@ -152,6 +284,12 @@ class WorkflowEngine:
         with self._lock:
             return dict(self._memory[workflow_id])
 
+    def get_outputs(self, workflow_id, step_ids):
+        """Recorded outputs of ``step_ids`` only (None for steps without one)."""
+        with self._lock:
+            memory = self._memory[workflow_id]
+            return {step_id: memory.get(step_id) for step_id in step_ids}
+
     def log_feedback(self, workflow_id, step_id, feedback):
         with self._lock:
             self._feedback_log[workflow_id].append({
@@ -173,24 +311,53 @@ class WorkflowEngine:
         with self._lock:
             return list(self._run_history[workflow_id])
 
-    def retry_step(self, workflow_id, step_id):
-        """Mark a step for retry."""
+    def backoff_delay(self, step, failures):
+        """Seconds to wait before retrying ``step`` after its ``failures``-th failure."""
+        backoff = {**self.retry_backoff, **step.get('backoff', {})}
+        delay = min(backoff['max'], backoff['base'] * backoff['factor'] ** (failures - 1))
+        # Full jitter: spreads retries of steps that failed together (e.g. on a shared outage).
+        return random.uniform(0, delay) if backoff['jitter'] else delay
+
+    def next_retry_at(self, workflow_id):
+        """Earliest time.monotonic() at which a backed-off step becomes ready again, or None."""
+        with self._lock:
+            now = time.monotonic()
+            return min((due for due in self._retry_due[workflow_id].values() if due > now), default=None)
+
+    def retry_step(self, workflow_id, step_id, delay=0.0):
+        """Mark a step for retry, not before ``delay`` seconds from now."""
         with self._lock:
             self._run_status[workflow_id][step_id] = 'retry'
+            if delay > 0:
+                self._retry_due[workflow_id][step_id] = time.monotonic() + delay
+            if self.checkpoint_store is not None:
+                self.checkpoint_store.record_status(workflow_id, step_id, 'retry')
 
     def set_timeout(self, workflow_id, step_id, timeout_sec):
-        """Set a timeout for a step (stub for async/worker support)."""
-        pass
+        """Override the step's ``timeout``; None removes the override."""
+        with self._lock:
+            if timeout_sec is None:
+                self._timeouts[workflow_id].pop(step_id, None)
+            else:
+                self._timeouts[workflow_id][step_id] = timeout_sec
+
+    def get_timeout(self, workflow_id, step_id):
+        """Deadline in seconds for one attempt of the step, or None for no deadline."""
+        with self._lock:
+            if step_id in self._timeouts[workflow_id]:
+                return self._timeouts[workflow_id][step_id]
+        step = self.get_step(workflow_id, step_id)
+        return step.get('timeout') if step else None
 
     def _is_hitl_step(self, wf, step):
-        # For DAG, wf is nx.DiGraph; for chain, step is dict
-        if isinstance(wf, nx.DiGraph):
+        # For DAG, wf is a CompactGraph; for chain, step is dict
+        if isinstance(wf, CompactGraph):
             return wf.nodes[step].get('hitl', False)
         return step.get('hitl', False)
 
     def _check_conditions(self, wf, step, memory):
         """Check if step should run based on conditions and memory."""
-        if isinstance(wf, nx.DiGraph):
+        if isinstance(wf, CompactGraph):
             cond = wf.nodes[step].get('condition')
         else:
             cond = step.get('condition')
@@ -226,3 +393,4 @@ class WorkflowEngine:
 
     def _update_read_model(self, workflow_id):
         self._read_model[workflow_id] = self._workflows[workflow_id]
+
@@ -1,12 +1,18 @@
 from agents.base import BaseAgent
 import os
 
+try:
+    from utils.llm_cache import get_default_cache
+except ImportError:  # cache lives in the top-level utils package
+    get_default_cache = None
+
 class LLMReasoningAgent(BaseAgent):
     def __init__(self, agent_id, registry, model='gpt-3.5-turbo'):
         super().__init__(agent_id, registry)
         self.skills = ['llm_reasoning']
         self.model = model
         self.api_key = os.environ.get('OPENAI_API_KEY')
+        self.llm_cache = get_default_cache() if get_default_cache else None
 
     def _process(self, task):
         question = task.get('question')
@@ -29,6 +35,11 @@ class LLMReasoningAgent(BaseAgent):
         return prompt
 
     def _call_llm(self, prompt):
+        if self.llm_cache is None:
+            return self._complete(prompt)
+        return tuple(self.llm_cache.cached_call(prompt, self._complete, {'model': self.model}))
+
+    def _complete(self, prompt):
         # For demo: stub, replace with OpenAI/HF API call
         # In production, use openai.ChatCompletion.create or transformers
         # pipeline
@@ -1,3 +1,5 @@
+import queue
+
 from .base import Agent
 
 class ProcessingAgent(Agent):
@@ -5,13 +7,34 @@ class ProcessingAgent(Agent):
         super().__init__(name, inbox, outboxes, config)
         self.kg = kg
         self.vector_store = vector_store
+        self.batch_size = config.get("nlp_batch_size", 64)
+        # Non-text messages drained while collecting a text batch, handled right after it.
+        self.deferred = []
+
+    def _drain_texts(self, first):
+        """Collects ``first`` plus any text chunks already waiting in the inbox, up to one batch."""
+        texts = [first]
+        while len(texts) < self.batch_size:
+            try:
+                msg = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+            if msg.get("type") == "text":
+                texts.append(msg["content"])
+            else:
+                self.deferred.append(msg)
+        return texts
 
     def process(self, msg):
         if msg["type"] == "text":
-            text = msg["content"]
-            self.kg.extract_from_text(text)
-            self.vector_store.add_texts([text])
-            self.send({"type": "processed", "content": text}, "distribution")
+            texts = self._drain_texts(msg["content"])
+            stats = self.kg.extract_from_texts(texts)
+            self.logger.info(f"Processed {stats['docs']} chunks ({stats['docs_per_sec']:.1f} docs/s)")
+            self.vector_store.add_texts(texts)
+            for text in texts:
+                self.send({"type": "processed", "content": text}, "distribution")
         elif msg["type"] == "query":
             results = self.vector_store.search(msg["content"])
-            self.send({"type": "search_results", "results": results}, "distribution")
\ No newline at end of file
+            self.send({"type": "search_results", "results": results}, "distribution")
+        while self.deferred:
+            self.process(self.deferred.pop(0))
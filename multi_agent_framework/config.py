@@ -1,6 +1,9 @@
 CONFIG = {
     "vector_dim": 384,
     "kg_path": "data/kg.pkl",
+    "kg_journal_dir": "data/kg_journal",
+    "kg_checkpoint_every": 100000,
     "vector_index_path": "data/vs",
+    "nlp_batch_size": 64,
     "log_level": "INFO"
 }
\ No newline at end of file
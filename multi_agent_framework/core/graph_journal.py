@@ -0,0 +1,216 @@
+import glob
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+
+import numpy as np
+
+logger = logging.getLogger("GraphJournal")
+
+_LOG_RE = re.compile(r"log-(\d+)\.jsonl$")
+_SNAP_RE = re.compile(r"snap-(\d+)$")
+
+
+def _encode_strings(values):
+    """Packs strings into one UTF-8 byte blob plus an offsets array (offsets[i]:offsets[i+1])."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _decode_string(blob, offsets, i):
+    return bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+
+def _encode_attrs(attrs):
+    return json.dumps(attrs, separators=(",", ":"), default=str) if attrs else ""
+
+
+class GraphJournal:
+    """Append-only change log plus compacted binary snapshots for a CompactGraph (or networkx MultiDiGraph).
+
+    Layout of ``directory``:
+      log-<gen>.jsonl  one JSON op per line ({"op": "node"|"edge", ...}); ``gen`` increases
+                       at every checkpoint, so older logs are frozen.
+      snap-<gen>/      graph state up to the end of log-<gen>: integer-interned node table
+                       and edge arrays (src, dst, key) as .npy files, with string/attribute
+                       data packed into byte blobs + offsets. Files are memory-mapped on load.
+
+    A checkpoint rotates the log and extracts the arrays while the caller holds the
+    graph lock, then writes them with the lock released, so readers only wait for the
+    in-memory extraction, never for disk I/O. Logs and snapshots made obsolete by a
+    completed snapshot are deleted afterwards; a crash mid-checkpoint leaves the
+    previous snapshot and logs intact. A line torn by a crash mid-append is cut
+    off during replay, before anything else is appended to that log.
+    """
+
+    def __init__(self, directory, fsync=False):
+        self.directory = directory
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self.generation = max([self._gen(p, _LOG_RE) for p in glob.glob(os.path.join(directory, "log-*.jsonl"))] +
+                              [self._gen(p, _SNAP_RE) + 1 for p in glob.glob(os.path.join(directory, "snap-*"))] + [0])
+        self._log = open(self._log_path(self.generation), "a", encoding="utf-8")
+        self.ops_since_checkpoint = 0
+        self._checkpoint_lock = threading.Lock()
+
+    @staticmethod
+    def _gen(path, pattern):
+        match = pattern.search(path)
+        return int(match.group(1)) if match else -1
+
+    def _log_path(self, gen):
+        return os.path.join(self.directory, f"log-{gen:08d}.jsonl")
+
+    def _snap_path(self, gen):
+        return os.path.join(self.directory, f"snap-{gen:08d}")
+
+    # --- Change log ---
+    def log_nodes(self, nodes):
+        for node, attrs in nodes:
+            self._log.write(json.dumps({"op": "node", "id": node, "attrs": attrs}, default=str) + "\n")
+        self.ops_since_checkpoint += len(nodes)
+
+    def log_edges(self, edges):
+        for src, dst, key, attrs in edges:
+            self._log.write(json.dumps({"op": "edge", "src": src, "dst": dst, "key": key, "attrs": attrs}, default=str) + "\n")
+        self.ops_since_checkpoint += len(edges)
+
+    def commit(self):
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+    def close(self):
+        self.commit()
+        self._log.close()
+
+    # --- Checkpoint ---
+    def begin_checkpoint(self, graph):
+        """Rotates the log and extracts snapshot arrays; call with the graph lock held."""
+        self.commit()
+        self._log.close()
+        gen = self.generation
+        self.generation += 1
+        self._log = open(self._log_path(self.generation), "a", encoding="utf-8")
+        self.ops_since_checkpoint = 0
+        index = {}
+        names, node_attrs = [], []
+        for node, attrs in graph.nodes(data=True):
+            index[node] = len(names)
+            names.append(str(node))
+            node_attrs.append(_encode_attrs(attrs))
+        n_edges = graph.number_of_edges()
+        src = np.empty(n_edges, dtype=np.int32)
+        dst = np.empty(n_edges, dtype=np.int32)
+        key_idx = np.empty(n_edges, dtype=np.int32)
+        key_index, keys, edge_attrs = {}, [], []
+        for i, (u, v, key, attrs) in enumerate(graph.edges(keys=True, data=True)):
+            src[i], dst[i] = index[u], index[v]
+            k = key_index.get(key)
+            if k is None:
+                k = key_index[key] = len(keys)
+                keys.append(str(key))
+            key_idx[i] = k
+            edge_attrs.append(_encode_attrs(attrs))
+        return gen, {
+            "src": src, "dst": dst, "key_idx": key_idx,
+            "names": names, "node_attrs": node_attrs, "keys": keys, "edge_attrs": edge_attrs,
+        }
+
+    def write_checkpoint(self, gen, arrays):
+        """Writes the snapshot atomically (tmp dir + rename) and prunes what it supersedes."""
+        with self._checkpoint_lock:
+            final = self._snap_path(gen)
+            tmp = final + ".tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            for name in ("src", "dst", "key_idx"):
+                np.save(os.path.join(tmp, f"{name}.npy"), arrays[name])
+            for name in ("names", "node_attrs", "keys", "edge_attrs"):
+                blob, offsets = _encode_strings(arrays[name])
+                np.save(os.path.join(tmp, f"{name}.blob.npy"), blob)
+                np.save(os.path.join(tmp, f"{name}.offsets.npy"), offsets)
+            os.replace(tmp, final)
+            for path in glob.glob(os.path.join(self.directory, "log-*.jsonl")):
+                if self._gen(path, _LOG_RE) <= gen:
+                    os.remove(path)
+            for path in glob.glob(os.path.join(self.directory, "snap-*")):
+                if not path.endswith(".tmp") and self._gen(path, _SNAP_RE) < gen:
+                    shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Checkpoint {gen}: {len(arrays['names'])} nodes, {len(arrays['src'])} edges")
+
+    # --- Recovery ---
+    def replay(self, graph, chunk_size=100000):
+        """Loads the newest complete snapshot into ``graph`` and replays newer logs."""
+        snaps = [p for p in glob.glob(os.path.join(self.directory, "snap-*")) if not p.endswith(".tmp")]
+        snap_gen = max((self._gen(p, _SNAP_RE) for p in snaps), default=-1)
+        if snap_gen >= 0:
+            self._load_snapshot(graph, self._snap_path(snap_gen), chunk_size)
+        logs = sorted((self._gen(p, _LOG_RE), p) for p in glob.glob(os.path.join(self.directory, "log-*.jsonl")))
+        replayed = 0
+        for gen, path in logs:
+            if gen > snap_gen:
+                replayed += self._replay_log(graph, path)
+        logger.info(f"Recovered graph from snapshot {snap_gen} plus {replayed} logged ops")
+        return graph
+
+    def _replay_log(self, graph, path):
+        """Applies one log's ops; a torn tail is cut off so later appends start on a clean line."""
+        replayed = complete = 0
+        with open(path, "rb") as f:
+            for line in f:
+                # Only newline-terminated ops were committed; anything else is a crash mid-append.
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    break
+                if op["op"] == "node":
+                    graph.add_node(op["id"], **(op["attrs"] or {}))
+                else:
+                    graph.add_edge(op["src"], op["dst"], key=op["key"], **(op["attrs"] or {}))
+                complete += len(line)
+                replayed += 1
+        if complete < os.path.getsize(path):
+            logger.warning(f"Truncating torn tail of {path} at byte {complete}")
+            with open(path, "r+b") as f:
+                f.truncate(complete)
+                if self.fsync:
+                    os.fsync(f.fileno())
+        return replayed
+
+    @staticmethod
+    def _load_snapshot(graph, path, chunk_size):
+        def load(name):
+            try:
+                return np.load(os.path.join(path, name), mmap_mode="r")
+            except ValueError:
+                # Zero-length arrays cannot be memory-mapped on every platform.
+                return np.load(os.path.join(path, name))
+
+        names = (load("names.blob.npy"), load("names.offsets.npy"))
+        node_attrs = (load("node_attrs.blob.npy"), load("node_attrs.offsets.npy"))
+        keys_blob, keys_offsets = load("keys.blob.npy"), load("keys.offsets.npy")
+        edge_attrs = (load("edge_attrs.blob.npy"), load("edge_attrs.offsets.npy"))
+        n_nodes = len(names[1]) - 1
+        node_ids = [_decode_string(*names, i) for i in range(n_nodes)]
+        for i, node in enumerate(node_ids):
+            raw = _decode_string(*node_attrs, i)
+            graph.add_node(node, **(json.loads(raw) if raw else {}))
+        keys = [_decode_string(keys_blob, keys_offsets, i) for i in range(len(keys_offsets) - 1)]
+        src, dst, key_idx = load("src.npy"), load("dst.npy"), load("key_idx.npy")
+        # Edges stream from the memory-mapped arrays in chunks, so only one chunk is materialized at a time.
+        for start in range(0, len(src), chunk_size):
+            end = min(start + chunk_size, len(src))
+            batch = []
+            for j, (u, v, k) in enumerate(zip(src[start:end].tolist(), dst[start:end].tolist(), key_idx[start:end].tolist())):
+                raw = _decode_string(*edge_attrs, start + j)
+                batch.append((node_ids[u], node_ids[v], keys[k], json.loads(raw) if raw else {}))
+            graph.add_edges_from(batch)
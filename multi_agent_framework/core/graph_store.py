@@ -0,0 +1,471 @@
+import sys
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+_DTYPES = ((bool, np.bool_), (int, np.int64), (float, np.float64))
+
+
+class GraphError(KeyError):
+    """Raised for missing nodes/edges (where networkx raises NetworkXError)."""
+
+
+def _column_dtype(value):
+    for py_type, dtype in _DTYPES:
+        if type(value) is py_type:
+            return dtype
+    return None
+
+
+class NodeView:
+    """``G.nodes`` stand-in: iterable, sized, ``n in G.nodes``, ``G.nodes[n]`` and ``G.nodes(data=...)``."""
+
+    def __init__(self, graph: "CompactGraph"):
+        self._graph = graph
+
+    def __iter__(self):
+        return iter(self._graph._node_ids)
+
+    def __len__(self):
+        return len(self._graph._node_ids)
+
+    def __contains__(self, node):
+        return node in self._graph._node_index
+
+    def __getitem__(self, node) -> Dict[str, Any]:
+        return self._graph._node_data(node)
+
+    def __call__(self, data=False, default=None):
+        graph = self._graph
+        if data is False:
+            return iter(graph._node_ids)
+        if data is True:
+            # Nodes without attributes get a throwaway dict instead of allocating one per node.
+            return ((n, attrs if attrs is not None else {}) for n, attrs in zip(graph._node_ids, graph._node_attrs))
+        return ((n, (attrs or {}).get(data, default)) for n, attrs in zip(graph._node_ids, graph._node_attrs))
+
+    def data(self, data=True, default=None):
+        return self(data, default)
+
+
+class CompactGraph:
+    """Array-backed directed (multi)graph with a networkx-compatible API for existing callers.
+
+    Storage:
+      * node table: interned ids -> dense ints, attribute dicts only for nodes that have them;
+      * merged edges: COO columns ``src``/``dst``/``key`` (int32) sorted by (src, dst, key),
+        a CSR ``indptr`` over ``src`` and a ``dst``-ordered copy of ``src`` for predecessors;
+      * edge attributes: one typed column (+ presence mask) per scalar attribute name,
+        typed by its first value, and a sparse object column for anything else;
+      * a small write buffer of recent edges, merged into the arrays by ``compact()``
+        once it holds ``buffer_limit`` edges (or 1/16 of the merged edges, if more).
+
+    Adding an existing (u, v, key) edge updates its attributes, as in networkx; a
+    ``multigraph=False`` graph behaves like ``nx.DiGraph`` (one edge per pair).
+    Edge data dicts returned for merged edges are copies.
+    """
+
+    def __init__(self, multigraph: bool = True, buffer_limit: int = 4096):
+        self.multigraph = multigraph
+        self.buffer_limit = buffer_limit
+        self._node_index: Dict[Hashable, int] = {}
+        self._node_ids: List[Hashable] = []
+        self._node_attrs: List[Optional[Dict[str, Any]]] = []
+        self._key_index: Dict[Hashable, int] = {}
+        self._keys: List[Hashable] = []
+        self._src = np.empty(0, dtype=np.int32)
+        self._dst = np.empty(0, dtype=np.int32)
+        self._key = np.empty(0, dtype=np.int32)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._pred = np.empty(0, dtype=np.int32)
+        self._n_indexed = 0
+        self._in_indptr = np.zeros(1, dtype=np.int64)
+        self._columns: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._objects: Dict[int, Dict[str, Any]] = {}
+        self._buf: List[Tuple[int, int, int, Dict[str, Any]]] = []
+        self._buf_out: Dict[int, List[int]] = {}
+        self._buf_in: Dict[int, List[int]] = {}
+        self.nodes = NodeView(self)
+
+    @classmethod
+    def from_networkx(cls, graph, buffer_limit: int = 4096) -> "CompactGraph":
+        compact = cls(multigraph=graph.is_multigraph(), buffer_limit=buffer_limit)
+        compact.add_nodes_from(graph.nodes(data=True))
+        if compact.multigraph:
+            compact.add_edges_from(graph.edges(keys=True, data=True))
+        else:
+            compact.add_edges_from(graph.edges(data=True))
+        compact.compact()
+        return compact
+
+    def to_networkx(self):
+        import networkx as nx
+        graph = nx.MultiDiGraph() if self.multigraph else nx.DiGraph()
+        graph.add_nodes_from(self.nodes(data=True))
+        graph.add_edges_from(self.edges(keys=True, data=True) if self.multigraph else self.edges(data=True))
+        return graph
+
+    def is_multigraph(self):
+        return self.multigraph
+
+    def is_directed(self):
+        return True
+
+    # --- Nodes ---
+    def _node(self, node) -> int:
+        idx = self._node_index.get(node)
+        if idx is None:
+            if isinstance(node, str):
+                node = sys.intern(node)
+            idx = len(self._node_ids)
+            self._node_index[node] = idx
+            self._node_ids.append(node)
+            self._node_attrs.append(None)
+        return idx
+
+    def _lookup(self, node) -> int:
+        idx = self._node_index.get(node)
+        if idx is None:
+            raise GraphError(f"The node {node} is not in the graph.")
+        return idx
+
+    def _node_data(self, node) -> Dict[str, Any]:
+        idx = self._lookup(node)
+        attrs = self._node_attrs[idx]
+        if attrs is None:
+            attrs = self._node_attrs[idx] = {}
+        return attrs
+
+    def add_node(self, node, **attr):
+        idx = self._node(node)
+        if attr:
+            if self._node_attrs[idx] is None:
+                self._node_attrs[idx] = {}
+            self._node_attrs[idx].update(attr)
+
+    def add_nodes_from(self, nodes: Iterable, **attr):
+        for item in nodes:
+            if isinstance(item, tuple) and len(item) == 2 and isinstance(item[1], dict):
+                self.add_node(item[0], **attr, **item[1])
+            else:
+                self.add_node(item, **attr)
+
+    def has_node(self, node) -> bool:
+        return node in self._node_index
+
+    def number_of_nodes(self) -> int:
+        return len(self._node_ids)
+
+    def __contains__(self, node):
+        return node in self._node_index
+
+    def __len__(self):
+        return len(self._node_ids)
+
+    def __iter__(self):
+        return iter(self._node_ids)
+
+    # --- Edges ---
+    def _key_code(self, key) -> int:
+        code = self._key_index.get(key)
+        if code is None:
+            code = self._key_index[key] = len(self._keys)
+            self._keys.append(key)
+        return code
+
+    def _find_merged(self, s: int, d: int, k: int) -> int:
+        if s >= self._n_indexed:
+            return -1
+        lo, hi = self._indptr[s:s + 2].tolist()
+        if lo == hi:
+            return -1
+        row = self._dst[lo:hi]
+        a, b = row.searchsorted(d, side="left"), row.searchsorted(d, side="right")
+        for offset, key in enumerate(self._key[lo + a:lo + b].tolist()):
+            if key == k:
+                return lo + a + offset
+        return -1
+
+    def _find_buffered(self, s: int, d: int, k: int) -> int:
+        for pos in self._buf_out.get(s, ()):
+            _, bd, bk, _ = self._buf[pos]
+            if bd == d and bk == k:
+                return pos
+        return -1
+
+    def _pair_keys(self, s: int, d: int) -> List[int]:
+        keys = []
+        if s < self._n_indexed:
+            lo, hi = self._indptr[s:s + 2].tolist()
+            row = self._dst[lo:hi]
+            a, b = row.searchsorted(d, side="left"), row.searchsorted(d, side="right")
+            keys.extend(self._key[lo + a:lo + b].tolist())
+        keys.extend(self._buf[pos][2] for pos in self._buf_out.get(s, ()) if self._buf[pos][1] == d)
+        return keys
+
+    def add_edge(self, u, v, key=None, **attr):
+        s, d = self._node(u), self._node(v)
+        if not self.multigraph:
+            key = None
+        elif key is None:
+            used = {self._keys[k] for k in self._pair_keys(s, d)}
+            key = len(used)
+            while key in used:
+                key += 1
+        k = self._key_code(key)
+        pos = self._find_merged(s, d, k)
+        if pos >= 0:
+            self._update_merged(pos, attr)
+            return key
+        pos = self._find_buffered(s, d, k)
+        if pos >= 0:
+            self._buf[pos][3].update(attr)
+            return key
+        self._buf.append((s, d, k, dict(attr)))
+        self._buf_out.setdefault(s, []).append(len(self._buf) - 1)
+        self._buf_in.setdefault(d, []).append(len(self._buf) - 1)
+        # The buffer may grow to 1/16 of the merged edges, so bulk loads merge O(log E) times.
+        if len(self._buf) >= max(self.buffer_limit, len(self._src) >> 4):
+            self.compact()
+        return key
+
+    def add_edges_from(self, edges: Iterable[tuple], **attr):
+        for edge in edges:
+            key, data = None, {}
+            if len(edge) == 4:
+                u, v, key, data = edge
+            elif len(edge) == 3:
+                u, v, extra = edge
+                if isinstance(extra, dict):
+                    data = extra
+                else:
+                    key = extra
+            else:
+                u, v = edge
+            self.add_edge(u, v, key=key, **attr, **(data or {}))
+
+    def _update_merged(self, pos: int, attr: Dict[str, Any]):
+        leftover = {}
+        for name, value in attr.items():
+            column = self._columns.get(name)
+            dtype = _column_dtype(value)
+            if column is not None and dtype is not None and column[0].dtype == dtype:
+                column[0][pos] = value
+                column[1][pos] = True
+                self._objects.get(pos, {}).pop(name, None)
+            else:
+                if column is not None:
+                    column[1][pos] = False
+                leftover[name] = value
+        if leftover:
+            self._objects.setdefault(pos, {}).update(leftover)
+
+    def compact(self):
+        """Merges the write buffer into the sorted edge arrays and rebuilds both CSR indexes."""
+        if not self._buf:
+            return
+        n_old, n_new = len(self._src), len(self._buf)
+        total = n_old + n_new
+        src = np.concatenate([self._src, np.fromiter((b[0] for b in self._buf), dtype=np.int32, count=n_new)])
+        dst = np.concatenate([self._dst, np.fromiter((b[1] for b in self._buf), dtype=np.int32, count=n_new)])
+        key = np.concatenate([self._key, np.fromiter((b[2] for b in self._buf), dtype=np.int32, count=n_new)])
+        order = np.lexsort((key, dst, src))
+        # Attribute columns: extend to the new length, fill buffered values, then permute with the edges.
+        columns = {name: (np.concatenate([values, np.zeros(n_new, dtype=values.dtype)]),
+                          np.concatenate([present, np.zeros(n_new, dtype=bool)]))
+                   for name, (values, present) in self._columns.items()}
+        objects = dict(self._objects)
+        for i, (_, _, _, attrs) in enumerate(self._buf):
+            pos = n_old + i
+            for name, value in attrs.items():
+                dtype = _column_dtype(value)
+                if dtype is not None and name not in columns:
+                    columns[name] = (np.zeros(total, dtype=dtype), np.zeros(total, dtype=bool))
+                if dtype is None or columns[name][0].dtype != dtype:
+                    # Values that do not match the column's type keep their Python type in the object column.
+                    objects.setdefault(pos, {})[name] = value
+                    continue
+                values, present = columns[name]
+                values[pos] = value
+                present[pos] = True
+        inverse = np.empty(total, dtype=np.int64)
+        inverse[order] = np.arange(total)
+        self._src, self._dst, self._key = src[order], dst[order], key[order]
+        self._columns = {name: (values[order], present[order]) for name, (values, present) in columns.items()}
+        self._objects = {int(inverse[pos]): attrs for pos, attrs in objects.items()}
+        n_nodes = len(self._node_ids)
+        self._indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self._src, minlength=n_nodes), out=self._indptr[1:])
+        self._pred = self._src[np.argsort(self._dst, kind="stable")]
+        self._n_indexed = n_nodes
+        self._in_indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self._dst, minlength=n_nodes), out=self._in_indptr[1:])
+        self._buf, self._buf_out, self._buf_in = [], {}, {}
+
+    def _merged_data(self, pos: int) -> Dict[str, Any]:
+        data = {name: values[pos].item() for name, (values, present) in self._columns.items() if present[pos]}
+        data.update(self._objects.get(pos, {}))
+        return data
+
+    # --- Read API ---
+    def successors(self, node) -> Iterator:
+        s = self._node_index.get(node)
+        if s is None:
+            raise GraphError(f"The node {node} is not in the graph.")
+        targets = self._dst[slice(*self._indptr[s:s + 2].tolist())].tolist() if s < self._n_indexed else []
+        if self._buf_out:
+            targets.extend(self._buf[pos][1] for pos in self._buf_out.get(s, ()))
+        ids = self._node_ids
+        return iter([ids[t] for t in dict.fromkeys(targets)])
+
+    neighbors = successors
+
+    def predecessors(self, node) -> Iterator:
+        d = self._node_index.get(node)
+        if d is None:
+            raise GraphError(f"The node {node} is not in the graph.")
+        sources = self._pred[slice(*self._in_indptr[d:d + 2].tolist())].tolist() if d < self._n_indexed else []
+        if self._buf_in:
+            sources.extend(self._buf[pos][0] for pos in self._buf_in.get(d, ()))
+        ids = self._node_ids
+        return iter([ids[s] for s in dict.fromkeys(sources)])
+
+    def expand(self, nodes: Iterable, reverse: bool = False) -> List:
+        """Distinct successors (predecessors if ``reverse``) of all ``nodes`` in one vectorized CSR gather.
+
+        This is the fast path for frontier expansion (k-hop, reachability); unknown nodes are skipped.
+        """
+        self.compact()
+        index = self._node_index
+        idx = np.fromiter((index[n] for n in nodes if n in index), dtype=np.int64)
+        idx = idx[idx < self._n_indexed]
+        indptr, targets = (self._in_indptr, self._pred) if reverse else (self._indptr, self._dst)
+        starts, lengths = indptr[idx], indptr[idx + 1] - indptr[idx]
+        # Row i contributes positions starts[i] .. starts[i] + lengths[i] - 1.
+        positions = np.arange(int(lengths.sum())) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        ids = self._node_ids
+        return [ids[t] for t in np.unique(targets[positions]).tolist()]
+
+    def out_degree(self, node) -> int:
+        s = self._lookup(node)
+        merged = int(self._indptr[s + 1] - self._indptr[s]) if s < self._n_indexed else 0
+        return merged + len(self._buf_out.get(s, ()))
+
+    def in_degree(self, node) -> int:
+        d = self._lookup(node)
+        merged = int(self._in_indptr[d + 1] - self._in_indptr[d]) if d < self._n_indexed else 0
+        return merged + len(self._buf_in.get(d, ()))
+
+    def degree(self, node=None):
+        """In + out degree of ``node``, or an iterator of (node, degree) over all nodes."""
+        if node is not None:
+            return self.in_degree(node) + self.out_degree(node)
+        self.compact()
+        degrees = np.zeros(len(self._node_ids), dtype=np.int64)
+        degrees[:self._n_indexed] = np.diff(self._indptr) + np.diff(self._in_indptr)
+        return zip(self._node_ids, degrees.tolist())
+
+    def has_edge(self, u, v, key=None) -> bool:
+        s, d = self._node_index.get(u), self._node_index.get(v)
+        if s is None or d is None:
+            return False
+        if key is None or not self.multigraph:
+            return bool(self._pair_keys(s, d))
+        k = self._key_index.get(key)
+        return k is not None and (self._find_merged(s, d, k) >= 0 or self._find_buffered(s, d, k) >= 0)
+
+    def get_edge_data(self, u, v, key=None, default=None):
+        s, d = self._node_index.get(u), self._node_index.get(v)
+        if s is None or d is None:
+            return default
+        found = {}
+        for k in self._pair_keys(s, d):
+            pos = self._find_merged(s, d, k)
+            found[self._keys[k]] = self._merged_data(pos) if pos >= 0 else self._buf[self._find_buffered(s, d, k)][3]
+        if not found:
+            return default
+        if not self.multigraph:
+            return next(iter(found.values()))
+        if key is not None:
+            return found.get(key, default)
+        return found
+
+    def edges(self, keys=False, data=False, default=None):
+        """Iterates (u, v[, key][, data]) over all edges; merges the buffer first."""
+        self.compact()
+        ids, key_names = self._node_ids, self._keys
+        for pos, (s, d, k) in enumerate(zip(self._src.tolist(), self._dst.tolist(), self._key.tolist())):
+            edge = (ids[s], ids[d])
+            if keys and self.multigraph:
+                edge += (key_names[k],)
+            if data is True:
+                edge += (self._merged_data(pos),)
+            elif data is not False:
+                edge += (self._merged_data(pos).get(data, default),)
+            yield edge
+
+    def number_of_edges(self, u=None, v=None) -> int:
+        if u is None:
+            return len(self._src) + len(self._buf)
+        s, d = self._node_index.get(u), self._node_index.get(v)
+        if s is None or d is None:
+            return 0
+        return len(self._pair_keys(s, d))
+
+    def nbytes(self) -> int:
+        """Bytes held by the edge arrays and indexes (excludes node ids and attribute dicts)."""
+        arrays = [self._src, self._dst, self._key, self._indptr, self._pred, self._in_indptr]
+        arrays += [a for pair in self._columns.values() for a in pair]
+        return sum(a.nbytes for a in arrays)
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+    import tracemalloc
+
+    parser = argparse.ArgumentParser(description="Memory per edge and neighbour latency: CompactGraph vs networkx.")
+    parser.add_argument("--nodes", type=int, default=50000)
+    parser.add_argument("--edges", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--frontier", type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    names = [f"entity-{i}" for i in range(args.nodes)]
+    relations = ["nsubj", "dobj", "prep", "ROOT"]
+    edges = [(rng.choice(names), rng.choice(names), rng.choice(relations), {}) for _ in range(args.edges)]
+    probes = [rng.choice(names) for _ in range(args.queries)]
+    frontier = rng.sample(names, args.frontier)
+
+    def measure(label, factory):
+        tracemalloc.start()
+        start = time.perf_counter()
+        graph = factory()
+        graph.add_edges_from(edges)
+        if isinstance(graph, CompactGraph):
+            graph.compact()
+        build = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        start = time.perf_counter()
+        for node in probes:
+            if node in graph:
+                list(graph.neighbors(node))
+        single = (time.perf_counter() - start) / len(probes) * 1e6
+        start = time.perf_counter()
+        if isinstance(graph, CompactGraph):
+            hop2 = graph.expand(graph.expand(frontier))
+        else:
+            hop1 = {m for n in frontier if n in graph for m in graph.neighbors(n)}
+            hop2 = {m for n in hop1 for m in graph.neighbors(n)}
+        expand = (time.perf_counter() - start) * 1e3
+        print(f"{label:>12}: {memory / args.edges:7.1f} B/edge  build {build:6.2f}s  "
+              f"neighbors {single:5.2f} us/query  2-hop from {len(frontier)} nodes {expand:7.2f} ms ({len(hop2)} reached)")
+
+    measure("CompactGraph", CompactGraph)
+    try:
+        import networkx as nx
+        measure("networkx", nx.MultiDiGraph)
+    except ImportError:
+        print("networkx not installed; skipping baseline")
@@ -1,33 +1,164 @@
-import networkx as nx
+import logging
+import threading
+import time
+
 import spacy
 import pickle
 
+from .graph_journal import GraphJournal
+from .graph_store import CompactGraph
+
+# Extraction only reads doc.ents (ner) and token.dep_/token.head (parser).
+UNUSED_PIPES = ("tagger", "attribute_ruler", "lemmatizer", "senter", "textcat")
+
+logger = logging.getLogger("KnowledgeGraph")
+
 class KnowledgeGraph:
-    def __init__(self):
-        self.graph = nx.MultiDiGraph()
-        self.nlp = spacy.load("en_core_web_sm")
+    def __init__(self, model="en_core_web_sm", batch_size=64, n_process=1,
+                 journal_dir=None, checkpoint_every=100000):
+        self.graph = CompactGraph()
+        self.nlp = spacy.load(model)
+        for name in UNUSED_PIPES:
+            if name in self.nlp.pipe_names:
+                self.nlp.disable_pipe(name)
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.lock = threading.Lock()
+        self.extraction_stats = {"docs": 0, "entities": 0, "relations": 0, "seconds": 0.0}
+        # Optional durability: every update is appended to a change log, compacted by checkpoints.
+        self.checkpoint_every = checkpoint_every
+        self.journal = None
+        self._checkpoint_thread = None
+        if journal_dir:
+            self.open_journal(journal_dir)
+
+    def open_journal(self, journal_dir, fsync=False):
+        """Recovers the graph from ``journal_dir`` and logs all further updates there."""
+        journal = GraphJournal(journal_dir, fsync=fsync)
+        graph = journal.replay(CompactGraph())
+        with self.lock:
+            self.graph = graph
+            self.journal = journal
 
     def add_entity(self, entity, attrs=None):
-        self.graph.add_node(entity, **(attrs or {}))
+        self._apply([(entity, attrs or {})], [])
 
     def add_relation(self, src, dst, relation, attrs=None):
-        self.graph.add_edge(src, dst, key=relation, **(attrs or {}))
+        self._apply([], [(src, dst, relation, attrs or {})])
 
-    def extract_from_text(self, text):
-        doc = self.nlp(text)
+    @staticmethod
+    def _collect(doc, nodes, edges):
         for ent in doc.ents:
-            self.add_entity(ent.text, {"label": ent.label_})
+            nodes.append((ent.text, {"label": ent.label_}))
         for token in doc:
             if token.dep_ == "ROOT" and token.head != token:
-                self.add_relation(token.head.text, token.text, token.dep_)
+                edges.append((token.head.text, token.text, token.dep_, {}))
+
+    def _apply(self, nodes, edges):
+        due = False
+        with self.lock:
+            self.graph.add_nodes_from(nodes)
+            self.graph.add_edges_from(edges)
+            if self.journal is not None:
+                self.journal.log_nodes(nodes)
+                self.journal.log_edges(edges)
+                self.journal.commit()
+                due = self.journal.ops_since_checkpoint >= self.checkpoint_every
+        if due:
+            self.checkpoint(background=True)
+
+    def checkpoint(self, background=False):
+        """Compacts the change log into a binary snapshot; reads only block during array extraction."""
+        if self.journal is None:
+            return
+        if background:
+            if self._checkpoint_thread is not None and self._checkpoint_thread.is_alive():
+                return
+            self._checkpoint_thread = threading.Thread(target=self.checkpoint, name="kg-checkpoint", daemon=True)
+            self._checkpoint_thread.start()
+            return
+        with self.lock:
+            gen, arrays = self.journal.begin_checkpoint(self.graph)
+        self.journal.write_checkpoint(gen, arrays)
+
+    def close(self):
+        if self._checkpoint_thread is not None:
+            self._checkpoint_thread.join()
+        if self.journal is not None:
+            self.checkpoint()
+            self.journal.close()
+
+    def extract_from_texts(self, texts, batch_size=None, n_process=None):
+        """Runs the trimmed pipeline over an iterable of texts with nlp.pipe.
+
+        ``texts`` may be a generator (e.g. draining an ingestion queue); graph
+        updates are applied in bulk once per batch. Returns this call's counts
+        and its throughput in documents per second.
+        """
+        batch_size = batch_size or self.batch_size
+        start = time.perf_counter()
+        docs = entities = relations = 0
+        nodes, edges = [], []
+        for doc in self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process or self.n_process):
+            self._collect(doc, nodes, edges)
+            docs += 1
+            if docs % batch_size == 0:
+                entities, relations = entities + len(nodes), relations + len(edges)
+                self._apply(nodes, edges)
+                nodes, edges = [], []
+        if nodes or edges:
+            entities, relations = entities + len(nodes), relations + len(edges)
+            self._apply(nodes, edges)
+        self.extraction_stats["entities"] += entities
+        self.extraction_stats["relations"] += relations
+        elapsed = time.perf_counter() - start
+        self.extraction_stats["docs"] += docs
+        self.extraction_stats["seconds"] += elapsed
+        result = {"docs": docs, "entities": entities, "relations": relations, "seconds": elapsed,
+                  "docs_per_sec": docs / elapsed if elapsed > 0 else 0.0}
+        logger.info(f"Extracted {docs} docs in {elapsed:.2f}s ({result['docs_per_sec']:.1f} docs/s)")
+        return result
+
+    def extract_from_text(self, text):
+        return self.extract_from_texts([text])
 
     def query(self, entity):
-        return list(self.graph.neighbors(entity))
+        with self.lock:
+            return list(self.graph.neighbors(entity))
 
     def save(self, path):
-        with open(path, "wb") as f:
-            pickle.dump(self.graph, f)
+        with self.lock:
+            with open(path, "wb") as f:
+                pickle.dump(self.graph, f)
 
     def load(self, path):
         with open(path, "rb") as f:
-            self.graph = pickle.load(f)
\ No newline at end of file
+            graph = pickle.load(f)
+        if not isinstance(graph, CompactGraph):
+            # Pickles written before the compact store hold a networkx MultiDiGraph.
+            graph = CompactGraph.from_networkx(graph)
+        with self.lock:
+            self.graph = graph
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare per-document nlp() against batched nlp.pipe extraction.")
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--n-process", type=int, default=1)
+    args = parser.parse_args()
+    sample = ("Apple is looking at buying a U.K. startup for $1 billion. "
+              "Sundar Pichai announced that Google will open an office in Berlin. ") * 8
+    texts = [f"{sample} Document {i}." for i in range(args.docs)]
+
+    full = spacy.load("en_core_web_sm")
+    start = time.perf_counter()
+    for text in texts:
+        full(text)
+    baseline = args.docs / (time.perf_counter() - start)
+
+    kg = KnowledgeGraph(batch_size=args.batch_size, n_process=args.n_process)
+    stats = kg.extract_from_texts(iter(texts))
+    print(f"nlp() per document: {baseline:8.1f} docs/s")
+    print(f"nlp.pipe batched:   {stats['docs_per_sec']:8.1f} docs/s ({kg.graph.number_of_nodes()} nodes, {kg.graph.number_of_edges()} edges)")
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger("WorkflowRunStore")
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS workflows (
+        workflow_id TEXT PRIMARY KEY, steps TEXT NOT NULL, dag INTEGER NOT NULL, updated_at REAL)""",
+    """CREATE TABLE IF NOT EXISTS step_status (
+        workflow_id TEXT, step_id TEXT, status TEXT, output_ref TEXT, updated_at REAL,
+        failures INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (workflow_id, step_id))""",
+    """CREATE TABLE IF NOT EXISTS run_history (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT, workflow_id TEXT, step_id TEXT, status TEXT,
+        output_ref TEXT, timestamp REAL)""",
+    "CREATE INDEX IF NOT EXISTS idx_run_history_workflow ON run_history (workflow_id, seq)",
+    """CREATE TABLE IF NOT EXISTS hitl_approvals (
+        workflow_id TEXT, step_id TEXT, PRIMARY KEY (workflow_id, step_id))""",
+    "CREATE TABLE IF NOT EXISTS outputs (ref TEXT PRIMARY KEY, data BLOB NOT NULL)",
+)
+
+_OPS = {
+    # (Re)submitting a workflow starts a fresh run, as WorkflowEngine.add_workflow does in memory.
+    "reset": ("DELETE FROM step_status WHERE workflow_id = ?",
+              "DELETE FROM run_history WHERE workflow_id = ?",
+              "DELETE FROM hitl_approvals WHERE workflow_id = ?"),
+    # Output blobs no longer referenced by any run.
+    "gc": ("""DELETE FROM outputs
+              WHERE ref NOT IN (SELECT output_ref FROM step_status WHERE output_ref IS NOT NULL)
+                AND ref NOT IN (SELECT output_ref FROM run_history WHERE output_ref IS NOT NULL)""",),
+    "workflow": ("INSERT OR REPLACE INTO workflows (workflow_id, steps, dag, updated_at) VALUES (?, ?, ?, ?)",),
+    "output": ("INSERT OR IGNORE INTO outputs (ref, data) VALUES (?, ?)",),
+    # Failed attempts are counted per step so a restart does not refill the retry budget.
+    "step": ("""INSERT INTO step_status (workflow_id, step_id, status, output_ref, updated_at, failures)
+               VALUES (?1, ?2, ?3, ?4, ?5, ?3 = 'failure')
+               ON CONFLICT (workflow_id, step_id) DO UPDATE SET
+                   status = excluded.status, updated_at = excluded.updated_at, output_ref = excluded.output_ref,
+                   failures = step_status.failures + excluded.failures""",),
+    "status": ("""INSERT INTO step_status (workflow_id, step_id, status, output_ref, updated_at) VALUES (?, ?, ?, NULL, ?)
+                 ON CONFLICT (workflow_id, step_id) DO UPDATE SET
+                     status = excluded.status, updated_at = excluded.updated_at""",),
+    "history": ("INSERT INTO run_history (workflow_id, step_id, status, output_ref, timestamp) VALUES (?, ?, ?, ?, ?)",),
+    "approval": ("INSERT OR IGNORE INTO hitl_approvals (workflow_id, step_id) VALUES (?, ?)",),
+}
+
+
+def dump_output(output):
+    """Pickles a step output; returns (data, ref) where ref is the SHA-256 of the data."""
+    data = pickle.dumps(output, protocol=pickle.HIGHEST_PROTOCOL)
+    return data, hashlib.sha256(data).hexdigest()
+
+
+class WorkflowRunStore:
+    """SQLite checkpoints of WorkflowEngine runs: definitions, step status, history and HITL approvals.
+
+    Step outputs are pickled once into ``outputs`` keyed by their SHA-256 and
+    referenced from status/history rows, so repeated outputs are stored once.
+    Outputs that cannot be pickled are recorded without a ref. Resubmitting a
+    workflow resets its run and deletes blobs nothing references any more.
+    Writes are queued and group-committed by a writer thread every
+    ``flush_interval`` seconds (or ``batch_size`` ops), so short steps never wait
+    on disk. A crash can lose the last interval; those steps simply run again on
+    recovery.
+    """
+
+    def __init__(self, path, flush_interval=0.5, batch_size=512):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        if "failures" not in {row[1] for row in self._conn.execute("PRAGMA table_info(step_status)")}:
+            # Checkpoints written before failure counts were kept.
+            self._conn.execute("ALTER TABLE step_status ADD COLUMN failures INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+        self._conn_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self.stats = {"ops": 0, "commits": 0}
+        self._writer = threading.Thread(target=self._write_loop, name="workflow-checkpoints", daemon=True)
+        self._writer.start()
+
+    # --- Writes (queued) ---
+    # Multi-op writes are queued as one item so their ops stay contiguous; otherwise a
+    # "gc" queued by another thread could land between an output blob and its row.
+    def save_workflow(self, workflow_id, steps, dag):
+        self._queue.put([("reset", (workflow_id,)), ("gc", ()),
+                         ("workflow", (workflow_id, json.dumps(steps, default=str), int(dag), time.time()))])
+
+    def record_step(self, workflow_id, step_id, status, output, timestamp):
+        try:
+            data, ref = dump_output(output)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            logger.warning(f"Checkpointing step {step_id!r} of {workflow_id!r} without its unpicklable output")
+            data = ref = None
+        ops = [("output", (ref, data))] if ref is not None else []
+        ops += [("step", (workflow_id, step_id, status, ref, timestamp)),
+                ("history", (workflow_id, step_id, status, ref, timestamp))]
+        self._queue.put(ops)
+
+    def record_status(self, workflow_id, step_id, status):
+        """Status change without a new output (e.g. marked for retry)."""
+        self._queue.put(("status", (workflow_id, step_id, status, time.time())))
+
+    def record_approval(self, workflow_id, step_id):
+        self._queue.put(("approval", (workflow_id, step_id)))
+
+    def flush(self):
+        """Blocks until everything queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(("close", None))
+            self._writer.join()
+        self._conn.close()
+
+    def _write_loop(self):
+        while True:
+            batch = self._expand(self._queue.get())
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][0] not in ("flush", "close"):
+                try:
+                    batch.extend(self._expand(self._queue.get(timeout=max(0.0, deadline - time.monotonic()))))
+                except queue.Empty:
+                    break
+            ops = [(kind, args) for kind, args in batch if kind in _OPS]
+            if ops:
+                try:
+                    with self._conn_lock, self._conn:
+                        for kind, args in ops:
+                            for statement in _OPS[kind]:
+                                self._conn.execute(statement, args)
+                    self.stats["ops"] += len(ops)
+                    self.stats["commits"] += 1
+                except sqlite3.Error:
+                    logger.exception(f"Failed to checkpoint {len(ops)} workflow ops")
+            for kind, args in batch:
+                if kind == "flush":
+                    args.set()
+                elif kind == "close":
+                    return
+
+    @staticmethod
+    def _expand(item):
+        return item if isinstance(item, list) else [item]
+
+    # --- Recovery ---
+    def load(self):
+        """All checkpointed runs: {workflow_id: {steps, dag, status, memory, history, approvals, failures}}."""
+        self.flush()
+        with self._conn_lock:
+            runs = {workflow_id: {"steps": json.loads(steps), "dag": bool(dag), "status": {}, "memory": {},
+                                  "history": [], "approvals": set(), "failures": {}}
+                    for workflow_id, steps, dag in self._conn.execute("SELECT workflow_id, steps, dag FROM workflows")}
+            outputs = {}
+
+            def output(ref):
+                if ref not in outputs:
+                    row = self._conn.execute("SELECT data FROM outputs WHERE ref = ?", (ref,)).fetchone()
+                    outputs[ref] = pickle.loads(row[0]) if row else None
+                return outputs[ref]
+
+            for workflow_id, step_id, status, ref, failures in self._conn.execute(
+                    "SELECT workflow_id, step_id, status, output_ref, failures FROM step_status"):
+                if workflow_id in runs:
+                    runs[workflow_id]["status"][step_id] = status
+                    if failures:
+                        runs[workflow_id]["failures"][step_id] = failures
+                    if ref is not None:
+                        runs[workflow_id]["memory"][step_id] = output(ref)
+            for workflow_id, step_id, status, ref, timestamp in self._conn.execute(
+                    "SELECT workflow_id, step_id, status, output_ref, timestamp FROM run_history ORDER BY seq"):
+                if workflow_id in runs:
+                    runs[workflow_id]["history"].append({"step_id": step_id, "status": status,
+                                                         "output": output(ref), "timestamp": timestamp})
+            for workflow_id, step_id in self._conn.execute("SELECT workflow_id, step_id FROM hitl_approvals"):
+                if workflow_id in runs:
+                    runs[workflow_id]["approvals"].add(step_id)
+        return runs
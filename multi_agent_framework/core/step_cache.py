@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from core.run_store import dump_output
+
+logger = logging.getLogger("StepCache")
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS step_cache (
+        key TEXT PRIMARY KEY, agent TEXT, ref TEXT NOT NULL, data BLOB NOT NULL, size INTEGER NOT NULL,
+        created_at REAL NOT NULL, last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)""",
+    "CREATE INDEX IF NOT EXISTS idx_step_cache_last_used ON step_cache (last_used)",
+)
+
+
+def step_key(agent, version, params, input_refs):
+    """Content address of a step run: SHA-256 over (agent id, agent version, params, input artifact refs)."""
+    payload = json.dumps([agent, version, params, sorted(input_refs.items())], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class StepCache:
+    """Memoized workflow step outputs keyed by ``step_key``.
+
+    Entries are evicted least-recently-used once there are more than
+    ``max_entries`` or their pickled outputs exceed ``max_bytes``; entries older
+    than ``ttl`` seconds (if set) are treated as misses and dropped. ``stats``
+    counts hits, misses, stores and evictions.
+    """
+
+    def __init__(self, path=":memory:", max_entries=10000, max_bytes=1 << 30, ttl=None):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def get(self, key):
+        """Returns (hit, output, ref); output and ref are None on a miss."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT data, ref, created_at FROM step_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[2] > self.ttl:
+                self._conn.execute("DELETE FROM step_cache WHERE key = ?", (key,))
+                self.stats["evictions"] += 1
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return False, None, None
+            self._conn.execute("UPDATE step_cache SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.stats["hits"] += 1
+        return True, pickle.loads(row[0]), row[1]
+
+    def put(self, key, output, agent=None):
+        """Stores ``output`` under ``key``; returns its artifact ref (None if it cannot be pickled)."""
+        try:
+            data, ref = dump_output(output)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            logger.warning(f"Not caching unpicklable output of agent {agent!r}")
+            return None
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO step_cache (key, agent, ref, data, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (key, agent, ref, data, len(data), now, now))
+            self.stats["stores"] += 1
+            self._evict()
+        return ref
+
+    def _evict(self):
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM step_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM step_cache ORDER BY last_used"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count, total = count - 1, total - size
+        self._conn.executemany("DELETE FROM step_cache WHERE key = ?", victims)
+        self.stats["evictions"] += len(victims)
+
+    def invalidate(self, agent=None):
+        """Drops every entry, or only those produced by ``agent``; returns how many were removed."""
+        with self._lock, self._conn:
+            if agent is None:
+                return self._conn.execute("DELETE FROM step_cache").rowcount
+            return self._conn.execute("DELETE FROM step_cache WHERE agent = ?", (agent,)).rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM step_cache").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -1,33 +1,124 @@
-from neo4j import GraphDatabase
+import threading
+
+try:
+    from neo4j import GraphDatabase
+except ImportError:
+    GraphDatabase = None
+
+SCHEMA = (
+    "CREATE CONSTRAINT entity_name IF NOT EXISTS FOR (e:Entity) REQUIRE e.name IS UNIQUE",
+)
+
+MERGE_ENTITIES = (
+    "UNWIND $rows AS row "
+    "MERGE (e:Entity {name: row.name}) "
+    "SET e.label = row.label"
+)
+
+# Endpoints are looked up through the uniqueness constraint's index on :Entity(name).
+MERGE_RELATIONS = (
+    "UNWIND $rows AS row "
+    "MATCH (a:Entity {name: row.src}) "
+    "MATCH (b:Entity {name: row.dst}) "
+    "MERGE (a)-[r:REL {type: row.rel}]->(b)"
+)
 
 
 class Neo4jKnowledgeGraph:
+    """Buffers entity/relation writes and flushes them as UNWIND batches over one reused session.
+
+    Writes are sent once ``batch_size`` rows are buffered, on ``flush()``, before
+    ``query()`` and on ``close()``. Entities are always flushed before relations, so a
+    relation can refer to an entity added in the same batch. Pass ``driver`` to use an
+    existing driver (or a stand-in) instead of connecting to ``uri``.
+    """
+
+    def __init__(self, uri=None, user=None, password=None, batch_size=1000, database=None, driver=None):
+        if driver is None:
+            if GraphDatabase is None:
+                raise ImportError("neo4j is required: pip install neo4j")
+            driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.driver = driver
+        self.batch_size = batch_size
+        self.database = database
+        self._session = None
+        self._entities = []
+        self._relations = []
+        self._lock = threading.RLock()
+        self.stats = {"batches": 0, "entities": 0, "relations": 0}
+
+    def __enter__(self):
+        return self
 
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = self.driver.session(database=self.database) if self.database else self.driver.session()
+            for statement in SCHEMA:
+                self._session.run(statement).consume()
+        return self._session
 
     def close(self):
-        self.driver.close()
+        with self._lock:
+            try:
+                self.flush()
+            finally:
+                if self._session is not None:
+                    self._session.close()
+                    self._session = None
+                self.driver.close()
 
     def add_entity(self, entity, label):
-        with self.driver.session() as session:
-            session.run(
-                "MERGE (e:Entity {name: $name, label: $label})",
-                name=entity,
-                label=label)
+        with self._lock:
+            self._entities.append({"name": entity, "label": label})
+            self._flush_if_full()
 
     def add_relation(self, src, dst, relation):
-        with self.driver.session() as session:
-            session.run(
-                "MATCH (a:Entity {name: $src}), (b:Entity {name: $dst}) "
-                "MERGE (a)-[r:REL {type: $rel}]->(b)",
-                src=src,
-                dst=dst,
-                rel=relation)
+        with self._lock:
+            self._relations.append({"src": src, "dst": dst, "rel": relation})
+            self._flush_if_full()
+
+    def add_entities(self, entities):
+        """Buffers (name, label) pairs."""
+        with self._lock:
+            self._entities.extend({"name": name, "label": label} for name, label in entities)
+            self._flush_if_full()
+
+    def add_relations(self, relations):
+        """Buffers (src, dst, relation) triples."""
+        with self._lock:
+            self._relations.extend({"src": src, "dst": dst, "rel": rel} for src, dst, rel in relations)
+            self._flush_if_full()
+
+    def _flush_if_full(self):
+        if len(self._entities) + len(self._relations) >= self.batch_size:
+            self.flush()
+
+    @staticmethod
+    def _write_rows(tx, statement, rows):
+        tx.run(statement, rows=rows).consume()
+
+    def flush(self):
+        """Writes all buffered rows, ``batch_size`` rows per managed write transaction."""
+        with self._lock:
+            if not self._entities and not self._relations:
+                return
+            session = self._get_session()
+            for statement, rows, counter in ((MERGE_ENTITIES, self._entities, "entities"),
+                                             (MERGE_RELATIONS, self._relations, "relations")):
+                for start in range(0, len(rows), self.batch_size):
+                    chunk = rows[start:start + self.batch_size]
+                    session.execute_write(self._write_rows, statement, chunk)
+                    self.stats["batches"] += 1
+                    self.stats[counter] += len(chunk)
+            self._entities, self._relations = [], []
 
     def query(self, entity):
-        with self.driver.session() as session:
-            result = session.run(
+        with self._lock:
+            self.flush()
+            result = self._get_session().run(
                 "MATCH (e:Entity {name: $name})-->(n) RETURN n.name, n.label",
                 name=entity)
-            return [(record["n.name"], record["n.label"]) for record in result]
\ No newline at end of file
+            return [(record["n.name"], record["n.label"]) for record in result]
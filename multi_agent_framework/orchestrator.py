@@ -61,7 +61,8 @@ def launch_agents():
         "maintenance": maintenance_inbox
     }
 
-    kg = KnowledgeGraph()
+    # Recovers from the last snapshot + change log; every update is journaled from here on.
+    kg = KnowledgeGraph(journal_dir=CONFIG["kg_journal_dir"], checkpoint_every=CONFIG["kg_checkpoint_every"])
     vs = VectorStore(dim=CONFIG["vector_dim"])
 
     ingestion_agent = IngestionAgent("ingestion", ingestion_inbox, outboxes, CONFIG)
@@ -107,7 +108,7 @@ def main():
             agent.stop()
         for agent in agent_dict.values():
             agent.join()
-        kg.save(CONFIG["kg_path"])
+        kg.close()
         vs.save(CONFIG["vector_index_path"])
 
 if __name__ == "__main__":
@@ -0,0 +1,29 @@
+from typing import Any, Dict
+
+from kg_engine_async import ReasoningRule, RelationshipType
+
+
+class DependencyClosureRule(ReasoningRule):
+    """Infers transitive DEPENDS_ON facts for ``context["entity_id"]`` via the adjacency index."""
+
+    name = "dependency_closure"
+    reads = ("DEPENDS_ON",)
+    produces = ("transitive:DEPENDS_ON",)
+
+    def applies_to_context(self, query_context: Dict[str, Any]) -> bool:
+        return bool(query_context.get("entity_id"))
+
+    async def execute(self, engine, query_context: Dict[str, Any]) -> Dict[str, Any]:
+        entity_id = query_context["entity_id"]
+        max_depth = int(query_context.get("max_depth", 3))
+        reached = await engine.k_hop(entity_id, k=max_depth, direction="out",
+                                     relationship_types=[RelationshipType.DEPENDS_ON])
+        facts, confidence = [], {}
+        for target_id, depth in reached.items():
+            if depth < 2:
+                continue
+            fact = f"{entity_id} DEPENDS_ON {target_id}"
+            facts.append({"source_id": entity_id, "target_id": target_id, "type": RelationshipType.DEPENDS_ON.value, "hops": depth})
+            # Each extra hop weakens the inferred dependency.
+            confidence[fact] = round(0.9 ** (depth - 1), 4)
+        return {"facts": facts, "confidence": confidence}
@@ -0,0 +1,9 @@
+from kg_engine_async import DatalogRule
+
+
+class TransitivePartOfRule(DatalogRule):
+    """PART_OF is transitive: a wheel part of a car part of a fleet is part of the fleet."""
+
+    name = "transitive_part_of"
+    head = ("PART_OF", "?a", "?c")
+    body = [("PART_OF", "?a", "?b"), ("PART_OF", "?b", "?c")]
@@ -0,0 +1,82 @@
+"""Read latency under heavy write load: reads behind the engine lock vs lock-free versioned reads.
+
+Writers stream write-behind upserts through a small queue, so they regularly block on
+backpressure while holding the engine lock. "locked" wraps every read in that lock (the
+previous read path); "lock-free" uses engine.read.
+
+Usage: python scripts/benchmark_kg_reads.py [--seconds 5] [--writers 4] [--readers 16]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from kg_engine_async import AsyncKnowledgeGraphEngine, Entity, EntityType
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(db_path, locked, seconds, writers, readers, seed_entities):
+    engine = AsyncKnowledgeGraphEngine(db_path, write_queue_size=256, write_batch_size=128)
+    await engine._connection()
+    ids = [f"seed-{i}" for i in range(seed_entities)]
+    for entity_id in ids:
+        await engine.add_entity(Entity(id=entity_id, type=EntityType.CONCEPT, name=f"Seed {entity_id}"))
+    await engine.flush()
+    stop = asyncio.Event()
+    latencies, writes = [], [0]
+
+    async def writer(n):
+        i = 0
+        while not stop.is_set():
+            await engine.add_entity(Entity(id=f"w{n}-{i}", type=EntityType.TASK, name=f"Write {n} {i}"))
+            writes[0] += 1
+            i += 1
+
+    async def reader():
+        rng = random.Random()
+        while not stop.is_set():
+            entity_id = rng.choice(ids)
+            start = time.perf_counter()
+            if locked:
+                async with engine.lock:
+                    await engine.get_entity(entity_id)
+                    await engine.search_entities(name_pattern="seed 1", limit=10)
+            else:
+                await engine.read(lambda view: (view.entity(entity_id), view.search_entities(name_pattern="seed 1", limit=10)))
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0)
+
+    tasks = [asyncio.ensure_future(writer(n)) for n in range(writers)] + [asyncio.ensure_future(reader()) for _ in range(readers)]
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    await engine.close()
+    return latencies, writes[0]
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, locked in (("locked", True), ("lock-free", False)):
+            latencies, writes = await run(os.path.join(tmp, f"{label}.db"), locked, args.seconds,
+                                          args.writers, args.readers, args.seed_entities)
+            ms = [x * 1000 for x in latencies]
+            print(f"{label:>10}: {len(ms) / args.seconds:8.0f} reads/s  p50 {statistics.median(ms):7.3f} ms  "
+                  f"p99 {percentile(ms, 99):7.3f} ms  max {max(ms):7.3f} ms  | {writes / args.seconds:8.0f} writes/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--seed-entities", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,92 @@
+"""Compare multi-hop traversal in the SQLite knowledge store against a get_relationships query per node.
+
+k-hop expansion runs as one recursive CTE; weighted paths run database_helpers' Dijkstra.
+
+Usage: python scripts/benchmark_kg_traversal.py [--entities 20000] [--degree 4] [--depth 3] [--path-depth 5] [--queries 50]
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import database_helpers as db
+
+
+def python_k_hop(db_path, entity_id, max_depth):
+    # The N+1 pattern: one indexed query per frontier node, issued from Python.
+    seen, frontier = {entity_id: 0}, [entity_id]
+    for depth in range(1, max_depth + 1):
+        next_frontier = []
+        for node in frontier:
+            for rel in db.get_relationships(db_path, source_id=node):
+                if rel["target_id"] not in seen:
+                    seen[rel["target_id"]] = depth
+                    next_frontier.append(rel["target_id"])
+        frontier = next_frontier
+    del seen[entity_id]
+    return seen
+
+
+def python_shortest_path(db_path, source_id, target_id, max_depth):
+    heap, best = [(0.0, 0, source_id, [source_id])], {}
+    while heap:
+        cost, depth, node, path = heapq.heappop(heap)
+        if node == target_id:
+            return path, cost
+        # Skip only if this node was already expanded both cheaper and in fewer hops.
+        if depth >= max_depth or any(c <= cost and d <= depth for c, d in best.get(node, ())):
+            continue
+        best.setdefault(node, []).append((cost, depth))
+        for rel in db.get_relationships(db_path, source_id=node):
+            if rel["strength"] > 0 and rel["target_id"] not in path:
+                heapq.heappush(heap, (cost + 1.0 / rel["strength"], depth + 1, rel["target_id"], path + [rel["target_id"]]))
+    return None
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    results = [fn(*q) for q in queries]
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+def main(args):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "kg.db")
+        db.init_knowledge_graph_db(path)
+        ids = [f"e{i}" for i in range(args.entities)]
+        db.insert_or_replace_entities(path, ((i, "CONCEPT", i, {}, "", "") for i in ids))
+        db.insert_relationships(path, ((src, rng.choice(ids), "RELATES_TO", {}, rng.choice([0.25, 0.5, 1.0, 2.0]), "")
+                                       for src in ids for _ in range(args.degree)))
+        starts = rng.sample(ids, args.queries)
+
+        loop_ms, loop = timed(lambda s: python_k_hop(path, s, args.depth), [(s,) for s in starts])
+        cte_ms, cte = timed(lambda s: dict(db.traverse_k_hop(path, s, args.depth)), [(s,) for s in starts])
+        assert loop == cte
+        print(f"{args.depth}-hop expansion  python loop {loop_ms:8.2f} ms/query   recursive CTE {cte_ms:8.2f} ms/query "
+              f"({sum(map(len, cte)) / len(cte):.0f} entities reached on average)")
+
+        depth = args.path_depth
+        # Targets are drawn from each start's neighbourhood so most pairs are connected.
+        pairs = [(s, rng.choice(sorted(reach) or ids)) for s, reach in
+                 ((s, dict(db.traverse_k_hop(path, s, depth))) for s in starts)]
+        loop_ms, loop = timed(lambda s, t: python_shortest_path(path, s, t, depth), pairs)
+        dijkstra_ms, dijkstra = timed(lambda s, t: db.weighted_shortest_path(path, s, t, depth), pairs)
+        assert [r and round(r[1], 9) for r in loop] == [r and round(r[1], 9) for r in dijkstra]
+        print(f"weighted path      python loop {loop_ms:8.2f} ms/query   dijkstra      {dijkstra_ms:8.2f} ms/query "
+              f"(max {depth} hops, {sum(r is not None for r in dijkstra)}/{len(dijkstra)} connected)")
+        db.close_connections(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, default=20000)
+    parser.add_argument("--degree", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--path-depth", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=50)
+    main(parser.parse_args())
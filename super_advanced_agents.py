@@ -2,6 +2,9 @@ import logging
 import time
 from typing import Any, List, Optional, Dict, Callable
 from faiss_vector_store import FAISSVectorStore
+from utils.llm_cache import LLMResponseCache, get_default_cache
+from generation_server import ContinuousBatchingServer
+from hybrid_scoring import CandidateBatch, HybridScorer
 
 # --- Dependency Checks ---
 try:
@@ -53,13 +56,28 @@ class MultiModalEmbeddingPipeline:
 
 # --- LLM Generator ---
 class LLMGenerator:
-    def __init__(self, model_name="gpt2"):
+    def __init__(self, model_name="gpt2", cache: Optional[LLMResponseCache] = None, use_cache: bool = True, device=None):
         if not HF_AVAILABLE:
             raise ImportError("HuggingFace Transformers is required for LLM generation.")
-        self.generator = pipeline("text-generation", model=model_name)
+        self.model_name = model_name
+        # The model is placed once, here; serve() reuses it on the same device.
+        self.generator = pipeline("text-generation", model=model_name, device=device)
+        self.cache = (cache or get_default_cache()) if use_cache else None
 
     def generate(self, prompt, max_length=100):
-        return self.generator(prompt, max_length=max_length)[0]['generated_text']
+        # Only the continuation is cached: a semantic hit comes from a similar, not identical, prompt.
+        if self.cache is None:
+            return prompt + self._generate(prompt, max_length)
+        params = {"model": self.model_name, "max_length": max_length, "return_full_text": False}
+        return prompt + self.cache.cached_call(prompt, lambda p: self._generate(p, max_length), params)
+
+    def _generate(self, prompt, max_length):
+        return self.generator(prompt, max_length=max_length, return_full_text=False)[0]['generated_text']
+
+    def serve(self, max_concurrency=8, max_queue=0):
+        # Shares the pipeline's model and tokenizer (on the pipeline's device); concurrent requests are decoded in one batch.
+        return ContinuousBatchingServer(self.generator.model, self.generator.tokenizer,
+                                        max_concurrency=max_concurrency, max_queue=max_queue)
 
 # --- Plugin/Tool Agent ---
 class PluginAgent:
@@ -180,28 +198,15 @@ class HybridScoringAgent:
             weights = {"vector": 0.5, "keyword": 0.2, "recency": 0.2, "llm": 0.1}
         query_vector = self.embedding_pipeline.embed(query_text)
         results = self.vector_store.search(query_vector, top_k=top_k*3, return_scores=True)
-        now = time.time()
-        scored = []
-        for meta, vec_score, uid in results:
-            if not meta:
-                continue
-            keyword_score = 1.0 if keyword and keyword.lower() in meta.get("text", "").lower() else 0.0
-            recency_score = 1.0 / (1.0 + (now - meta.get("timestamp", now)))
-            llm_score = 0.0
-            if self.llm_generator:
-                prompt = f"How relevant is the following memory to the query '{query_text}'? Memory: {meta['text']}\nScore 1-10:"
-                llm_out = self.llm_generator.generate(prompt, max_length=20)
-                try:
-                    llm_score = float(''.join(filter(str.isdigit, llm_out))) / 10.0
-                except Exception:
-                    llm_score = 0.0
-            final_score = (weights["vector"] * (1.0 / (1.0 + vec_score)) +
-                           weights["keyword"] * keyword_score +
-                           weights["recency"] * recency_score +
-                           weights["llm"] * llm_score)
-            scored.append((meta, final_score, uid))
-        scored.sort(key=lambda x: -x[1])
-        return scored[:top_k]
+        batch = CandidateBatch(results)
+        context = {
+            "query_text": query_text,
+            "keyword": keyword,
+            "now": time.time(),
+            "llm_generator": self.llm_generator,
+        }
+        indices, scores = HybridScorer(weights).rank(batch, top_k, context)
+        return batch.take(indices, scores)
 
 # --- Distributed Vector Store Stub (for demo) ---
 class DistributedVectorStoreStub:
@@ -217,12 +222,29 @@ class DistributedVectorStoreStub:
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 class AsyncLLMWrapper:
-    def __init__(self, llm_generator):
+    def __init__(self, llm_generator, max_workers=4, server: Optional[ContinuousBatchingServer] = None):
         self.llm_generator = llm_generator
-        self._executor = ThreadPoolExecutor()
+        self.server = server
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
     async def agenerate(self, prompt, max_length=100):
+        if self.server is not None:
+            cache = getattr(self.llm_generator, "cache", None)
+            if cache is None:
+                return prompt + await self._server_generate(prompt, max_length)
+            # Same key and continuation-only entries as LLMGenerator.generate, so both paths share them.
+            params = {"model": self.llm_generator.model_name, "max_length": max_length, "return_full_text": False}
+            return prompt + await cache.acached_call(prompt, lambda p: self._server_generate(p, max_length), params)
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(self._executor, self.llm_generator.generate, prompt, max_length)
+    async def _server_generate(self, prompt, max_length):
+        prompt_len = len(self.server.tokenizer(prompt)["input_ids"])
+        pieces = [piece async for piece in self.server.stream(prompt, max_new_tokens=max(1, max_length - prompt_len))]
+        return "".join(pieces)
+    async def astream(self, prompt, max_new_tokens=50):
+        if self.server is None:
+            self.server = self.llm_generator.serve()
+        async for token in self.server.stream(prompt, max_new_tokens=max_new_tokens):
+            yield token
 
 # --- Demo Block ---
 if __name__ == "__main__":
@@ -234,7 +256,7 @@ if __name__ == "__main__":
         embedder = EmbeddingPipeline()
         multimodal = MultiModalEmbeddingPipeline()
         llm = LLMGenerator()
-        async_llm = AsyncLLMWrapper(llm)
+        async_llm = AsyncLLMWrapper(llm, server=llm.serve(max_concurrency=4))
 
         # --- Memory Expiry/Prioritization ---
         expiry_agent = ExpiryAgent("Expiry", store, embedder)
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+from generation_server import BatchScheduler
+
+VOCAB = "abcdefghijklmnop"
+EOS = VOCAB.index("p")
+
+
+class StubTokenizer:
+    eos_token_id = EOS
+
+    def decode(self, ids, skip_special_tokens=False):
+        return "".join(VOCAB[i] for i in ids if not (skip_special_tokens and i == EOS))
+
+
+class StubScheduler(BatchScheduler):
+    """A "model" that predicts the letter after the last one; prompts containing "!" fail to prefill."""
+
+    def __init__(self, **kwargs):
+        super().__init__(StubTokenizer(), **kwargs)
+        self.batch_sizes = []
+        self.fail_decode = False
+
+    def _prefill_tokens(self, req):
+        if "!" in req.prompt:
+            raise ValueError(f"cannot tokenize {req.prompt!r}")
+        req.input_ids = [VOCAB.index(c) for c in req.prompt]
+        return (req.input_ids[-1] + 1) % len(VOCAB)
+
+    def _decode(self, batch):
+        time.sleep(0.01)
+        if self.fail_decode:
+            raise RuntimeError("decode failed")
+        self.batch_sizes.append(len(batch))
+        return [(req.generated[-1] + 1) % len(VOCAB) for req in batch]
+
+
+def test_requests_join_one_batch_and_a_failed_prefill_fails_only_its_request():
+    server = StubScheduler(max_concurrency=4)
+
+    async def main():
+        return await asyncio.gather(server.generate("ab", max_new_tokens=6),
+                                    server.generate("bad!", max_new_tokens=3),
+                                    server.generate("m", max_new_tokens=10),
+                                    return_exceptions=True)
+
+    try:
+        ok, failed, eos = asyncio.run(asyncio.wait_for(main(), timeout=5))
+    finally:
+        server.stop()
+    assert (ok, eos) == ("abcdefgh", "mno")
+    assert isinstance(failed, ValueError)
+    assert max(server.batch_sizes) == 2 and server.stats["requests"] == 2
+
+
+def test_failed_decode_step_fails_the_batch_and_the_server_keeps_serving():
+    server = StubScheduler()
+
+    async def main():
+        server.fail_decode = True
+        with pytest.raises(RuntimeError):
+            await server.generate("a", max_new_tokens=3)
+        server.fail_decode = False
+        return [piece async for piece in server.stream("h", max_new_tokens=3)]
+
+    try:
+        assert asyncio.run(asyncio.wait_for(main(), timeout=5)) == ["i", "j", "k"]
+    finally:
+        server.stop()
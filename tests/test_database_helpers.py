@@ -0,0 +1,67 @@
+import database_helpers as db
+
+
+def test_bulk_writes_and_streamed_relationships(tmp_path):
+    path = str(tmp_path / "kg.db")
+    db.init_knowledge_graph_db(path)
+    assert db.upsert_entities(path, [(f"e{i}", "CONCEPT", f"n{i}", {}, "t0", "t0") for i in range(3)]) == 3
+    db.get_db_connection(path).execute("UPDATE entities SET access_count = 7 WHERE id = 'e0'")
+    db.upsert_entities(path, [("e0", "CONCEPT", "renamed", {"v": 2}, "t1", "t1")])
+    entity = db.get_entity(path, "e0")
+    assert (entity["name"], entity["created_at"], entity["access_count"]) == ("renamed", "t0", 7)
+    db.insert_relationships(path, [("e0", "e1", "LINKS", {}, 0.5, "t0"), ("e0", "e2", "LINKS", {}, 1.0, "t0")])
+    streamed = db.get_relationships(path, source_id="e0")
+    assert not isinstance(streamed, list)
+    assert sorted(r["target_id"] for r in streamed) == ["e1", "e2"]
+    db.close_connections(path)
+
+
+def test_recursive_traversals(tmp_path):
+    path = str(tmp_path / "kg.db")
+    db.init_knowledge_graph_db(path)
+    db.insert_relationships(path, [
+        ("a", "b", "LINKS", {}, 1.0, "t"), ("b", "c", "LINKS", {}, 1.0, "t"), ("c", "a", "LINKS", {}, 1.0, "t"),
+        ("a", "c", "LINKS", {}, 0.25, "t"), ("c", "d", "OTHER", {}, 1.0, "t"),
+    ])
+    assert sorted(db.traverse_k_hop(path, "a", max_depth=5)) == [("b", 1), ("c", 1), ("d", 2)]
+    assert dict(db.traverse_k_hop(path, "a", max_depth=5, relationship_type="LINKS")) == {"b": 1, "c": 1}
+    assert db.reachable(path, "a", "d", max_depth=1) is None
+    assert db.reachable(path, "d", "a", direction="in") == 2
+    assert db.weighted_shortest_path(path, "a", "c") == (["a", "b", "c"], 2.0)
+    db.close_connections(path)
+
+
+def test_weighted_path_respects_depth_and_prunes_dense_graphs(tmp_path):
+    import random
+    import time
+
+    path = str(tmp_path / "kg.db")
+    db.init_knowledge_graph_db(path)
+    # Cheap a-b-c-d route (cost 3) against a pricey direct edge (cost 4).
+    db.insert_relationships(path, [("a", "b", "LINKS", {}, 1.0, "t"), ("b", "c", "LINKS", {}, 1.0, "t"),
+                                   ("c", "d", "LINKS", {}, 1.0, "t"), ("a", "d", "LINKS", {}, 0.25, "t")])
+    assert db.weighted_shortest_path(path, "a", "d") == (["a", "b", "c", "d"], 3.0)
+    assert db.weighted_shortest_path(path, "a", "d", max_depth=2) == (["a", "d"], 4.0)
+    assert db.weighted_shortest_path(path, "d", "a", direction="in") == (["d", "c", "b", "a"], 3.0)
+
+    rng = random.Random(0)
+    db.insert_relationships(path, [(f"n{rng.randrange(200)}", f"n{rng.randrange(200)}", "LINKS", {},
+                                    rng.uniform(0.1, 1.0), "t") for _ in range(1600)])
+    start = time.perf_counter()
+    assert db.weighted_shortest_path(path, "n0", "unreachable", max_depth=7) is None
+    assert time.perf_counter() - start < 1
+    db.close_connections(path)
+
+
+def test_close_connections_after_close_all(tmp_path):
+    path = str(tmp_path / "kg.db")
+    first = db.get_db_connection(path)
+    db.close_all_connections()
+    db.close_connections(path)
+    db.close_connections()
+    second = db.get_db_connection(path)
+    assert second is not first
+    assert second.execute("SELECT 1").fetchone()[0] == 1
+    db.close_connections(path)
+    assert db.get_db_connection(path) is not second
+    db.close_connections()
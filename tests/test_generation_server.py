@@ -0,0 +1,101 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+from generation_server import ContinuousBatchingServer
+
+VOCAB = "abcdefghijklmnop"
+EOS = VOCAB.index("p")
+
+
+class FakeTokenizer:
+    eos_token_id = EOS
+
+    def __call__(self, text, return_tensors=None):
+        ids = [VOCAB.index(c) for c in text]
+        return {"input_ids": torch.tensor([ids]) if return_tensors == "pt" else ids}
+
+    def decode(self, ids, skip_special_tokens=False):
+        return "".join(VOCAB[i] for i in ids if not (skip_special_tokens and i == EOS))
+
+
+class FakeLM(torch.nn.Module):
+    """Predicts the letter after the last input letter; the KV cache stores the token ids fed so far."""
+
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.anchor = torch.nn.Parameter(torch.zeros(1))
+        self.delay = delay
+        self.batch_sizes = []
+
+    def to(self, *args, **kwargs):
+        raise AssertionError("the server must not move a model it shares")
+
+    def forward(self, input_ids, past_key_values=None, attention_mask=None, position_ids=None, use_cache=True):
+        time.sleep(self.delay)
+        self.batch_sizes.append(input_ids.shape[0])
+        if hasattr(past_key_values, "to_legacy_cache"):
+            past_key_values = past_key_values.to_legacy_cache()
+        kv = input_ids.float()[:, None, :, None]
+        if past_key_values is not None:
+            kv = torch.cat([past_key_values[0][0], kv], dim=2)
+        logits = torch.full((*input_ids.shape, len(VOCAB)), -1e9)
+        logits[torch.arange(input_ids.shape[0]), -1, (input_ids[:, -1] + 1) % len(VOCAB)] = 0.0
+        return SimpleNamespace(logits=logits, past_key_values=((kv, kv),))
+
+
+def test_concurrent_requests_share_decode_steps():
+    model = FakeLM(delay=0.01)
+    server = ContinuousBatchingServer(model, FakeTokenizer(), max_concurrency=4)
+    assert server.device == torch.device("cpu")
+
+    async def main():
+        return await asyncio.gather(server.generate("ab", max_new_tokens=6),
+                                    server.generate("m", max_new_tokens=10),
+                                    server.generate("cdef", max_new_tokens=3))
+
+    try:
+        outputs = asyncio.run(main())
+    finally:
+        server.stop()
+    # "m" stops at the EOS letter, which is not part of the decoded text.
+    assert outputs == ["abcdefgh", "mno", "cdefghi"]
+    assert max(model.batch_sizes) > 1
+    assert server.stats["requests"] == 3 and server.stats["tokens"] == 12
+
+
+def test_stream_yields_text_deltas():
+    server = ContinuousBatchingServer(FakeLM(), FakeTokenizer())
+
+    async def main():
+        return [piece async for piece in server.stream("h", max_new_tokens=3)]
+
+    try:
+        assert asyncio.run(main()) == ["i", "j", "k"]
+    finally:
+        server.stop()
+
+
+def test_server_path_of_async_wrapper_uses_the_llm_cache():
+    pytest.importorskip("faiss")
+    from super_advanced_agents import AsyncLLMWrapper
+    from utils.llm_cache import LLMResponseCache
+
+    model = FakeLM()
+    server = ContinuousBatchingServer(model, FakeTokenizer())
+    llm = SimpleNamespace(model_name="fake", cache=LLMResponseCache())
+    wrapper = AsyncLLMWrapper(llm, server=server)
+
+    async def main():
+        return [await wrapper.agenerate("ab", max_length=5) for _ in range(2)]
+
+    try:
+        assert asyncio.run(main()) == ["abcde", "abcde"]
+    finally:
+        server.stop()
+    assert llm.cache.stats()["exact_hits"] == 1
+    assert len(model.batch_sizes) == 3
@@ -0,0 +1,35 @@
+from kg_graph_index import AdjacencyIndex
+
+
+def _chain(index, n):
+    for i in range(n):
+        index.add_edge(f"r{i}", f"n{i}", f"n{i + 1}", type_code=i % 2)
+
+
+def test_delta_and_snapshot_edges_traverse_alike():
+    index = AdjacencyIndex(min_rebuild=4)
+    _chain(index, 9)
+    assert index._csr["out"] is not None and index._delta["out"]
+    assert index.neighbors("n3") == [("n4", "r3")]
+    assert index.neighbors("n3", "in") == [("n2", "r2")]
+    assert index.k_hop("n0", k=3) == {"n0": 0, "n1": 1, "n2": 2, "n3": 3}
+    assert index.shortest_path("n0", "n9", max_depth=9) == ([f"n{i}" for i in range(10)], [f"r{i}" for i in range(9)])
+    assert index.shortest_path("n0", "n9") is None
+    assert index.neighbors("n3", "out", type_codes=[0]) == []
+    assert sorted(index.subgraph_edges(["n1", "n2", "n3"])) == ["r1", "r2"]
+
+
+def test_removed_edges_are_compacted_past_the_dead_ratio():
+    index = AdjacencyIndex(min_rebuild=4, compact_ratio=0.5)
+    _chain(index, 20)
+    for i in range(0, 20, 2):
+        index.remove_edge(f"r{i}")
+    # 10 of 20 slots dead: not yet past the ratio.
+    assert len(index.edges) == 20
+    index.remove_edge("r1")
+    assert len(index.edges) == len(index) == 9
+    assert index._dead == 0
+    assert index.neighbors("n3") == [("n4", "r3")]
+    assert index.neighbors("n1") == []
+    index.add_edge("r1", "n1", "n2")
+    assert index.k_hop("n1", k=3) == {"n1": 0, "n2": 1}
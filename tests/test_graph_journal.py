@@ -0,0 +1,57 @@
+import glob
+import os
+
+from multi_agent_framework.core.graph_journal import GraphJournal
+from multi_agent_framework.core.graph_store import CompactGraph
+
+
+def _open(directory):
+    journal = GraphJournal(str(directory))
+    return journal, journal.replay(CompactGraph())
+
+
+def _log(journal, nodes=(), edges=()):
+    journal.log_nodes(list(nodes))
+    journal.log_edges(list(edges))
+    journal.commit()
+
+
+def test_torn_tail_is_truncated_so_later_writes_survive(tmp_path):
+    journal, _ = _open(tmp_path)
+    _log(journal, nodes=[("a", {"label": "ORG"})], edges=[("a", "b", "ROOT", {})])
+    journal.close()
+    [log_path] = glob.glob(os.path.join(str(tmp_path), "log-*.jsonl"))
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "node", "id": "tor')
+
+    journal, graph = _open(tmp_path)
+    assert sorted(graph.nodes) == ["a", "b"]
+    _log(journal, nodes=[("c", {})], edges=[("b", "c", "dobj", {})])
+    journal.close()
+
+    journal, graph = _open(tmp_path)
+    journal.close()
+    assert sorted(graph.nodes) == ["a", "b", "c"]
+    assert graph.number_of_edges() == 2
+    with open(log_path, encoding="utf-8") as f:
+        assert "tor" not in f.read()
+
+
+def test_recovery_combines_the_snapshot_with_newer_logs(tmp_path):
+    journal, graph = _open(tmp_path)
+    nodes, edges = [("a", {"label": "ORG"}), ("b", {})], [("a", "b", "ROOT", {"weight": 2})]
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from(edges)
+    _log(journal, nodes, edges)
+    gen, arrays = journal.begin_checkpoint(graph)
+    journal.write_checkpoint(gen, arrays)
+    _log(journal, edges=[("b", "c", "dobj", {})])
+    journal.close()
+
+    journal, recovered = _open(tmp_path)
+    journal.close()
+    assert recovered.nodes["a"] == {"label": "ORG"}
+    assert recovered.get_edge_data("a", "b") == {"ROOT": {"weight": 2}}
+    assert sorted(recovered.neighbors("b")) == ["c"]
+    # The checkpoint pruned the log it covers.
+    assert [os.path.basename(p) for p in sorted(glob.glob(os.path.join(str(tmp_path), "log-*.jsonl")))] == ["log-00000001.jsonl"]
@@ -0,0 +1,23 @@
+from multi_agent_framework.core.graph_store import CompactGraph
+
+
+def test_buffered_and_merged_edges_read_alike():
+    graph = CompactGraph(buffer_limit=2)
+    graph.add_node("a", label="ORG")
+    graph.add_edges_from([("a", "b", "ROOT", {"weight": 1}), ("a", "c", "ROOT", {}), ("b", "c", "dobj", {})])
+    graph.add_edge("a", "b", key="ROOT", note="updated")
+    graph.add_edge("c", "a", key="nsubj")
+    assert sorted(graph.neighbors("a")) == ["b", "c"]
+    assert sorted(graph.predecessors("c")) == ["a", "b"]
+    assert graph.number_of_edges() == 4
+    assert graph.get_edge_data("a", "b") == {"ROOT": {"weight": 1, "note": "updated"}}
+    assert graph.nodes["a"] == {"label": "ORG"}
+    assert sorted(graph.expand(["a", "b"])) == ["b", "c"]
+
+
+def test_digraph_mode_collapses_parallel_edges():
+    graph = CompactGraph(multigraph=False)
+    graph.add_edge("x", "y")
+    graph.add_edge("x", "y", retries=2)
+    assert list(graph.edges(data=True)) == [("x", "y", {"retries": 2})]
+    assert dict(graph.degree()) == {"x": 1, "y": 1}
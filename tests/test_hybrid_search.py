@@ -0,0 +1,87 @@
+import importlib
+
+import numpy as np
+import pytest
+
+from hybrid_scoring import CandidateBatch, HybridScorer, register_column, top_k_indices
+
+
+def _candidates():
+    return [({"text": "The Louvre museum", "priority": 3, "timestamp": 90.0}, 0.5, "louvre"),
+            ({"text": "Eiffel Tower", "priority": 1, "timestamp": 100.0}, 0.1, "eiffel"),
+            (None, 0.0, "deleted"),
+            ({"text": "louvre pyramid", "priority": 2, "timestamp": 10.0}, 2.0, "pyramid")]
+
+
+def test_scorer_weights_columns_and_skips_deleted():
+    batch = CandidateBatch(_candidates())
+    assert batch.uids == ["louvre", "eiffel", "pyramid"]
+    scorer = HybridScorer({"vector": 1.0, "keyword": 1.0, "recency": 0.0})
+    assert scorer.names == ["vector", "keyword"]
+    scores = scorer.score(batch, {"keyword": "LOUVRE"})
+    np.testing.assert_allclose(scores, [1 / 1.5 + 1, 1 / 1.1, 1 / 3 + 1])
+    indices, scores = scorer.rank(batch, 2, {"keyword": "louvre"})
+    assert [batch.uids[i] for i in indices] == ["louvre", "pyramid"]
+    indices, _ = scorer.rank(batch, 5, {"keyword": "louvre"}, mask=batch.equals("priority", 1))
+    assert [batch.uids[i] for i in indices] == ["eiffel"]
+
+
+def test_registered_column_and_top_k_ties_keep_order():
+    register_column("test_priority_raw")(lambda batch, context: batch.field("priority"))
+    batch = CandidateBatch(_candidates())
+    indices, _ = HybridScorer({"test_priority_raw": 1.0}).rank(batch, 2)
+    assert [batch.uids[i] for i in indices] == ["louvre", "pyramid"]
+    assert list(top_k_indices(np.array([1.0, 3.0, 3.0, 2.0]), 3)) == [1, 2, 3]
+    assert list(top_k_indices(np.array([1.0, 3.0]), 0)) == []
+
+
+def test_bm25_is_incremental():
+    from bm25_index import BM25Index
+
+    index = BM25Index()
+    index.add(0, "the louvre museum in paris")
+    index.add(1, "a museum of modern art")
+    index.add(2, "paris paris paris")
+    assert [doc for doc, _ in index.search("louvre museum")] == [0, 1]
+    assert index.search("paris", top_k=1)[0][0] == 2
+    index.remove(0)
+    index.add(2, "rome")
+    assert index.search("louvre") == [] and index.search("paris") == []
+    assert len(index) == 2 and index.total_len == 6
+
+
+def test_rank_fusion():
+    from hybrid_scoring import fuse_results
+
+    a, b, c = {"text": "a"}, {"text": "b"}, {"text": "c"}
+    vector = [(a, 0.1, "a"), (b, 0.2, "b")]
+    keyword = [(c, 7.0, "c"), (b, 5.0, "b")]
+    assert [uid for _, _, uid in fuse_results(vector, keyword)] == ["b", "a", "c"]
+    # Weighted fusion: vector 1/(1+d) plus BM25 normalised by the best hit.
+    fused = fuse_results(vector, keyword, method="weighted", weights={"vector": 1.0, "keyword": 1.0})
+    assert [uid for _, _, uid in fused] == ["b", "c", "a"]
+    np.testing.assert_allclose([score for _, score, _ in fused], [1 / 1.2 + 5 / 7, 1.0, 1 / 1.1])
+
+
+@pytest.mark.parametrize("module", ["llm_agent", "async_llm_agent"])
+def test_fused_hybrid_search_keeps_keyword_as_filter(module):
+    pytest.importorskip("faiss")
+    from faiss_vector_store import FAISSVectorStore
+    LLMAgent = importlib.import_module(module).LLMAgent
+
+    class Embedder:
+        def embed(self, text):
+            return np.array([text.count("museum"), text.count("tower")], dtype=np.float32)
+
+    store = FAISSVectorStore(dim=2)
+    agent = LLMAgent("test", store, Embedder())
+    agent.add_text_memory("museum museum Orsay", uid="orsay")
+    agent.add_text_memory("The Louvre museum", uid="louvre")
+    agent.add_text_memory("Louvre tower tower tower", uid="tower", memory_type="note")
+    try:
+        assert [uid for _, _, uid in agent.hybrid_search("museum museum", keyword="louvre")] == ["louvre", "tower"]
+        assert [uid for _, _, uid in agent.hybrid_search("museum", keyword="louvre", memory_type="note")] == ["tower"]
+        # FAISS pads short result lists with -1; those must not alias the last row.
+        assert [uid for _, _, uid in store.search([0, 0], top_k=5, return_scores=True)] == ["louvre", "orsay", "tower"]
+    finally:
+        agent.close()
@@ -0,0 +1,270 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+from kg_engine_async import AsyncKnowledgeGraphEngine, Entity, EntityType, ReasoningRule
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def entity(i, name=None, **properties):
+    return Entity(id=f"e{i}", type=EntityType.CONCEPT, name=name or f"Entity {i}", properties=properties)
+
+
+def journal_mode(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("PRAGMA journal_mode").fetchone()[0]
+
+
+def test_engine_reuses_one_wal_connection(tmp_path):
+    db_path = str(tmp_path / "kg.db")
+
+    async def main():
+        engine = AsyncKnowledgeGraphEngine(db_path)
+        first = await engine._connection()
+        for i in range(3):
+            await engine.add_entity(entity(i), durable=True)
+        assert await engine._connection() is first
+        await engine.close()
+
+    run(main())
+    assert journal_mode(db_path) == "wal"
+
+
+def test_pragmas_override_the_defaults(tmp_path):
+    db_path = str(tmp_path / "kg.db")
+
+    async def main():
+        engine = AsyncKnowledgeGraphEngine(db_path, pragmas={"journal_mode": "DELETE"})
+        await engine.add_entity(entity(1), durable=True)
+        await engine.close()
+
+    run(main())
+    assert journal_mode(db_path) == "delete"
+
+
+def row_count(db_path, table="entities"):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_write_behind_is_visible_at_once_and_group_committed(tmp_path):
+    db_path = str(tmp_path / "kg.db")
+
+    async def main():
+        engine = AsyncKnowledgeGraphEngine(db_path, flush_interval=1.0)
+        for i in range(50):
+            await engine.add_entity(entity(i))
+        # Readers see the write before it reaches SQLite.
+        assert (await engine.get_entity("e7")).name == "Entity 7"
+        await engine.flush()
+        assert row_count(db_path) == 50
+        await engine.close()
+        return engine.write_stats
+
+    stats = run(main())
+    assert stats["queued"] == stats["committed"] == 50
+    assert stats["batches"] <= 2 and stats["failed"] == 0
+
+
+def test_durable_write_is_committed_when_it_returns(tmp_path):
+    db_path = str(tmp_path / "kg.db")
+
+    async def main():
+        engine = AsyncKnowledgeGraphEngine(db_path, flush_interval=5.0)
+        await engine.add_entity(entity(1), durable=True)
+        assert row_count(db_path) == 1
+        await engine.close()
+
+    run(main())
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+def test_ndjson_import_reports_progress_and_round_trips_through_export(tmp_path):
+    from kg_engine_async import row_to_record
+    lines = [json.dumps({"id": f"e{i}", "type": "CONCEPT", "name": f"Entity {i}", "properties": {"i": i}}) for i in range(5)]
+    lines.insert(2, "{not json")
+    lines.append(json.dumps({"id": "r1", "source_id": "e0", "target_id": "e1", "type": "RELATED_TO"}))
+
+    async def main():
+        engine = AsyncKnowledgeGraphEngine(str(tmp_path / "kg.db"))
+        progress = [p async for p in engine.import_records(_aiter(lines), chunk_size=2)]
+        exported = [row_to_record("entities", row) async for page in engine.iter_export("entities", page_size=2) for row in page]
+        relationships = [row async for page in engine.iter_export("relationships") for row in page]
+        await engine.close()
+        return progress, exported, relationships
+
+    progress, exported, relationships = run(main())
+    assert [p["done"] for p in progress] == [False, False, False, True]
+    final = progress[-1]
+    assert (final["processed"], final["entities"], final["relationships"], final["invalid"]) == (7, 5, 1, 1)
+    assert final["errors"][0]["record"] == 3
+    assert [r["id"] for r in exported] == [f"e{i}" for i in range(5)]
+    assert exported[3]["properties"] == {"i": 3} and exported[3]["kind"] == "entity"
+    assert len(relationships) == 1
+
+
+def test_search_pages_by_id_and_matches_through_the_trigram_index(tmp_path):
+    async def main():
+        engine = AsyncKnowledgeGraphEngine(str(tmp_path / "kg.db"))
+        for i, name in enumerate(["Paris", "Berlin", "Parish church", "Lyon"]):
+            await engine.add_entity(entity(i, name, country="France" if i != 1 else "Germany"))
+        first, total = await engine.search_entities(limit=2)
+        # Ids added after a page was served are merged into the sorted order.
+        await engine.add_entity(entity(10, "Paris Nord"))
+        await engine.add_entity(Entity(id="e05", type=EntityType.LOCATION, name="Marseille"))
+        everything, new_total = await engine.search_entities()
+        locations, _ = await engine.search_entities(entity_type=EntityType.LOCATION)
+        prefix, _ = await engine.search_entities(name_pattern="pari", match="prefix")
+        fuzzy, _ = await engine.search_entities(name_pattern="Berlim", match="fuzzy")
+        by_property, property_total = await engine.search_entities(name_pattern="germany", search_properties=True)
+        await engine.close()
+        return first, total, everything, new_total, locations, prefix, fuzzy, by_property, property_total
+
+    first, total, everything, new_total, locations, prefix, fuzzy, by_property, property_total = run(main())
+    assert [e.id for e in first] == ["e0", "e1"] and total == 4
+    assert [e.id for e in everything] == ["e0", "e05", "e1", "e10", "e2", "e3"] and new_total == 6
+    assert [e.id for e in locations] == ["e05"]
+    assert [e.name for e in prefix] == ["Paris", "Paris Nord", "Parish church"]
+    assert fuzzy[0].name == "Berlin"
+    assert [e.id for e in by_property] == ["e1"] and property_total == 1
+
+
+def test_retyped_entities_move_between_type_pages(tmp_path):
+    async def main():
+        engine = AsyncKnowledgeGraphEngine(str(tmp_path / "kg.db"))
+        for i in range(3):
+            await engine.add_entity(entity(i))
+        before, _ = await engine.search_entities(entity_type=EntityType.CONCEPT)
+        await engine.add_entity(Entity(id="e1", type=EntityType.PERSON, name="Ada"))
+        concepts, _ = await engine.search_entities(entity_type=EntityType.CONCEPT)
+        people, _ = await engine.search_entities(entity_type=EntityType.PERSON)
+        await engine.close()
+        return before, concepts, people
+
+    before, concepts, people = run(main())
+    assert [e.id for e in before] == ["e0", "e1", "e2"]
+    assert [e.id for e in concepts] == ["e0", "e2"]
+    assert [e.id for e in people] == ["e1"]
+
+
+def test_warm_start_indexes_ids_and_hydrates_bodies_lazily(tmp_path):
+    from kg_engine_async import Relationship, RelationshipType
+    db_path = str(tmp_path / "kg.db")
+
+    async def seed():
+        engine = AsyncKnowledgeGraphEngine(db_path)
+        for i in range(4):
+            await engine.add_entity(entity(i, city="Paris" if i % 2 else "Lyon"))
+        await engine.add_relationship(Relationship(id="r1", source_id="e0", target_id="e1", type=RelationshipType.PART_OF))
+        await engine.close()
+
+    async def restart():
+        engine = AsyncKnowledgeGraphEngine(db_path, max_cached_entities=2)
+        stats = await engine.warm_start(batch_size=3)
+        cached_before = len(engine.entities)
+        neighbors = await engine.neighbors("e0")
+        matches, _ = await engine.search_entities(name_pattern="paris", search_properties=True)
+        everything = await engine.get_entities(["e0", "e1", "e2", "e3"])
+        await engine.close()
+        return stats, cached_before, neighbors, matches, everything, engine.cache_stats
+
+    run(seed())
+    stats, cached_before, neighbors, matches, everything, cache_stats = run(restart())
+    assert (stats["entities"], stats["relationships"]) == (4, 1)
+    assert cached_before == 0
+    assert neighbors == [{"entity_id": "e1", "relationship_id": "r1"}]
+    assert [e.id for e in matches] == ["e1", "e3"]
+    # Four bodies through a two-entry LRU: all still answered, from SQLite.
+    assert sorted(everything) == ["e0", "e1", "e2", "e3"]
+    assert everything["e2"].properties == {"city": "Lyon"}
+    assert cache_stats["hydrated"] >= 4
+
+
+class RecordingRule(ReasoningRule):
+    def __init__(self, name, log, reads=(), produces=(), delay=0.0):
+        self.name, self.log, self.reads, self.produces, self.delay = name, log, tuple(reads), tuple(produces), delay
+
+    def applies_to_context(self, query_context):
+        return True
+
+    async def execute(self, engine, query_context):
+        self.log.append(("start", self.name, sorted(query_context.get("upstream", {}))))
+        await asyncio.sleep(self.delay)
+        self.log.append(("end", self.name))
+        return {"facts": [{"rule": self.name}], "confidence": {}}
+
+
+def test_rule_dag_orders_dependents_and_runs_cycles_as_one_stratum(tmp_path):
+    log = []
+    rules = [RecordingRule("a", log, produces=("X",), delay=0.02), RecordingRule("b", log, produces=("Y",), delay=0.02),
+             RecordingRule("c", log, reads=("X", "Z"), produces=("W",)), RecordingRule("d", log, reads=("W",), produces=("Z",))]
+
+    async def main():
+        engine = AsyncKnowledgeGraphEngine(str(tmp_path / "kg.db"))
+        for rule in rules:
+            await engine.add_rule(rule)
+        result = await engine.execute_reasoning("q", trace=True)
+        await engine.close()
+        return result
+
+    result = run(main())
+    assert result["errors"] is None
+    assert sorted(f["rule"] for f in result["inferred_facts"]) == ["a", "b", "c", "d"]
+    # Independent rules overlap; c waits for a; the c <-> d cycle runs c, then d.
+    assert [entry[:2] for entry in log[:2]] == [("start", "a"), ("start", "b")]
+    assert ("start", "c", ["a"]) in log and ("start", "d", ["c"]) in log
+    assert log.index(("end", "c")) < log.index(("start", "d", ["c"]))
+    depends_on = {entry["rule"]: entry["depends_on"] for entry in result["trace"]}
+    assert depends_on == {"a": [], "b": [], "c": ["a"], "d": ["c"]}
+
+
+def test_dependency_closure_applies_when_the_context_names_an_entity(tmp_path):
+    from kg_engine_async import Relationship, RelationshipType
+    from rules.dependency_closure import DependencyClosureRule
+
+    async def main():
+        engine = AsyncKnowledgeGraphEngine(str(tmp_path / "kg.db"))
+        await engine.add_rule(DependencyClosureRule())
+        for source, target in (("a", "b"), ("b", "c")):
+            await engine.add_relationship(Relationship(id=f"{source}{target}", source_id=source, target_id=target,
+                                                       type=RelationshipType.DEPENDS_ON))
+        without = await engine.execute_reasoning("deps")
+        with_entity = await engine.execute_reasoning("deps", context={"entity_id": "a"})
+        await engine.close()
+        return without, with_entity
+
+    without, with_entity = run(main())
+    assert without["inferred_facts"] == []
+    assert [(f["target_id"], f["hops"]) for f in with_entity["inferred_facts"]] == [("c", 2)]
+
+
+def test_reads_return_one_version_and_rehydrate_evicted_bodies(tmp_path):
+    async def main():
+        engine = AsyncKnowledgeGraphEngine(str(tmp_path / "kg.db"), max_cached_entities=2)
+        for i in range(4):
+            await engine.add_entity(entity(i))
+        names, version = await engine.read(lambda view: sorted(e.name for e in view.entities(["e0", "e1", "e2", "e3"]).values()))
+        stale_version = engine.graph_version
+        await engine.add_entity(entity(9))
+        _, newer = await engine.read(lambda view: view.entity("e9"))
+        # A view never blocks on the writer lock.
+        async with engine.lock:
+            held, _ = await engine.read(lambda view: view.entity("e9").name)
+        await engine.close()
+        return names, version, stale_version, newer, held, dict(engine.cache_stats)
+
+    names, version, stale_version, newer, held, cache_stats = run(main())
+    assert names == [f"Entity {i}" for i in range(4)]
+    assert version == stale_version and newer > version
+    assert held == "Entity 9"
+    assert cache_stats["retries"] >= 1 and cache_stats["hydrated"] >= 2
@@ -0,0 +1,34 @@
+from kg_inference import IncrementalReasoner
+
+
+def _transitive(reasoner):
+    reasoner.add_rule("reach_edge", ("REACHES", "?a", "?b"), [("LINK", "?a", "?b")])
+    reasoner.add_rule("reach_step", ("REACHES", "?a", "?c"), [("REACHES", "?a", "?b"), ("LINK", "?b", "?c")])
+
+
+def test_semi_naive_insert_matches_full_materialization():
+    incremental = IncrementalReasoner()
+    _transitive(incremental)
+    edges = [("LINK", "a", "b"), ("LINK", "b", "c"), ("LINK", "c", "d")]
+    for edge in edges:
+        incremental.insert(edge)
+    batch = IncrementalReasoner()
+    batch.load(edges)
+    _transitive(batch)
+    assert incremental.derived == batch.derived
+    assert ("REACHES", "a", "d") in incremental.derived
+
+
+def test_retraction_rederives_alternative_paths_and_counts_duplicates():
+    reasoner = IncrementalReasoner()
+    _transitive(reasoner)
+    for edge in [("LINK", "a", "b"), ("LINK", "b", "d"), ("LINK", "a", "c"), ("LINK", "c", "d"), ("LINK", "d", "e")]:
+        reasoner.insert(edge)
+    reasoner.insert(("LINK", "a", "b"))
+    reasoner.retract(("LINK", "a", "b"))
+    assert ("REACHES", "a", "b") in reasoner.derived
+    reasoner.retract(("LINK", "a", "b"))
+    assert ("REACHES", "a", "b") not in reasoner.derived
+    assert ("REACHES", "a", "e") in reasoner.derived
+    reasoner.retract(("LINK", "c", "d"))
+    assert reasoner.query("REACHES", source="a") == [("REACHES", "a", "c")]
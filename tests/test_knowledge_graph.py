@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip("spacy")
+from multi_agent_framework.core import knowledge_graph
+from multi_agent_framework.core.knowledge_graph import KnowledgeGraph, UNUSED_PIPES
+
+
+class Span:
+    def __init__(self, text, label_=""):
+        self.text, self.label_ = text, label_
+
+
+class Token(Span):
+    def __init__(self, text, dep_, head=None):
+        super().__init__(text)
+        self.dep_, self.head = dep_, head or self
+
+
+class Doc:
+    """Capitalised words are PERSON entities; the second word is a ROOT headed by the first."""
+
+    def __init__(self, text):
+        words = text.split()
+        self.ents = [Span(w, "PERSON") for w in words if w[0].isupper()]
+        subject = Token(words[0], "nsubj")
+        self.tokens = [subject, Token(words[1], "ROOT", head=subject)]
+
+    def __iter__(self):
+        return iter(self.tokens)
+
+
+class FakeNLP:
+    pipe_names = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"]
+
+    def __init__(self):
+        self.disabled = []
+        self.batches = []
+
+    def disable_pipe(self, name):
+        self.disabled.append(name)
+
+    def pipe(self, texts, batch_size=64, n_process=1):
+        batch = []
+        for text in texts:
+            batch.append(text)
+            if len(batch) == batch_size:
+                self.batches.append(len(batch))
+                yield from (Doc(t) for t in batch)
+                batch = []
+        if batch:
+            self.batches.append(len(batch))
+            yield from (Doc(t) for t in batch)
+
+
+@pytest.fixture
+def nlp(monkeypatch):
+    fake = FakeNLP()
+    monkeypatch.setattr(knowledge_graph.spacy, "load", lambda model: fake)
+    return fake
+
+
+def test_only_pipes_extraction_reads_stay_enabled(nlp):
+    KnowledgeGraph()
+    assert nlp.disabled == [name for name in UNUSED_PIPES if name in FakeNLP.pipe_names]
+    assert not {"ner", "parser", "tok2vec"} & set(nlp.disabled)
+
+
+def test_texts_are_streamed_through_nlp_pipe_in_batches(nlp):
+    kg = KnowledgeGraph(batch_size=2)
+    texts = (f"Alice{i} knows Bob" for i in range(5))
+    stats = kg.extract_from_texts(texts)
+    assert nlp.batches == [2, 2, 1]
+    assert (stats["docs"], stats["entities"], stats["relations"]) == (5, 10, 5)
+    assert kg.graph.nodes["Bob"] == {"label": "PERSON"}
+    assert sorted(kg.query("Alice3")) == ["knows"]
+    kg.extract_from_text("Carol sees Dan")
+    assert kg.extraction_stats["docs"] == 6 and nlp.batches[-1] == 1
@@ -0,0 +1,95 @@
+from utils.llm_cache import LLMResponseCache
+
+
+def test_exact_hit_normalizes_prompt_and_respects_params():
+    cache = LLMResponseCache()
+    calls = []
+
+    def fake_llm(prompt):
+        calls.append(prompt)
+        return f"answer to {prompt}"
+
+    cache.cached_call("What  is\nAI?", fake_llm, {"model": "a"})
+    cache.cached_call(" What is AI? ", fake_llm, {"model": "a"})
+    cache.cached_call("What is AI?", fake_llm, {"model": "b"})
+    assert len(calls) == 2
+    stats = cache.stats()
+    assert stats["exact_hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["tokens_saved"] > 0
+
+
+def test_lru_eviction_and_persistence(tmp_path):
+    path = str(tmp_path / "llm_cache.pkl")
+    cache = LLMResponseCache(max_entries=2, persist_path=path)
+    for prompt in ("one", "two", "three"):
+        cache.put(prompt, prompt.upper())
+    assert cache.get("one") is None
+    cache.save()
+    reloaded = LLMResponseCache(persist_path=path)
+    assert reloaded.get("three") == "THREE"
+
+
+def test_default_cache_builds_embedder_from_config(tmp_path, monkeypatch):
+    from utils import llm_cache
+
+    (tmp_path / "embedder.py").write_text(
+        "class Embedder:\n"
+        "    def __init__(self, scale=1.0):\n"
+        "        self.scale = scale\n"
+        "    def embed(self, text):\n"
+        "        return [self.scale * ('paris' in text.lower()), self.scale * ('rome' in text.lower()), 1.0]\n")
+    config = tmp_path / "config.yaml"
+    config.write_text("llm:\n  cache:\n    similarity_threshold: 0.9\n"
+                      "    embedder: {module: embedder, class: Embedder, config: {scale: 2.0}}\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("LLM_CACHE_CONFIG", str(config))
+    monkeypatch.setenv("LLM_CACHE_MAX_ENTRIES", "7")
+    monkeypatch.setattr(llm_cache, "_default_cache", None)
+    cache = llm_cache.get_default_cache()
+    assert cache.max_entries == 7 and cache.similarity_threshold == 0.9
+    cache.put("Tell me about Paris", "Paris answer")
+    assert cache.get("Paris, tell me about it") == "Paris answer"
+    assert cache.get("Tell me about Rome") is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_unsaved_puts_are_written_at_exit(tmp_path):
+    import weakref
+    from utils.llm_cache import _save_at_exit
+
+    path = str(tmp_path / "cache" / "llm.pkl")
+    cache = LLMResponseCache(persist_path=path, autosave_every=50)
+    cache.put("one", "ONE")
+    _save_at_exit(weakref.ref(cache))
+    assert LLMResponseCache(persist_path=path).get("one") == "ONE"
+
+
+def test_miss_embeds_the_prompt_once():
+    embedded = []
+
+    def embed(text):
+        embedded.append(text)
+        return [1.0, float("rome" in text.lower())]
+
+    cache = LLMResponseCache(embed_fn=embed)
+    cache.cached_call("Tell me about Paris", lambda p: "answer", {"model": "a"})
+    assert embedded == ["Tell me about Paris"]
+    assert cache.cached_call("Tell me about Paris, please", lambda p: "other", {"model": "a"}) == "answer"
+
+
+def test_semantic_hit_continues_the_current_prompt():
+    import pytest
+    pytest.importorskip("faiss")
+    from llm_agent import LLMGenerator
+
+    def fake_pipeline(prompt, max_length, return_full_text):
+        assert return_full_text is False
+        return [{"generated_text": " is a city."}]
+
+    generator = LLMGenerator.__new__(LLMGenerator)
+    generator.model_name, generator.generator = "fake", fake_pipeline
+    generator.cache = LLMResponseCache(embed_fn=lambda text: [1.0, 0.0])
+    assert generator.generate("Paris") == "Paris is a city."
+    assert generator.generate("Lyon") == "Lyon is a city."
+    assert generator.cache.stats()["semantic_hits"] == 1
@@ -0,0 +1,64 @@
+from multi_agent_framework.integrations.neo4j_kg import MERGE_ENTITIES, MERGE_RELATIONS, Neo4jKnowledgeGraph
+
+
+class _Result(list):
+    def consume(self):
+        return None
+
+
+class _Session:
+    def __init__(self, log):
+        self.log = log
+        self.closed = False
+
+    def run(self, statement, parameters=None, **kwargs):
+        self.log.append((statement, kwargs.get("rows", kwargs)))
+        return _Result()
+
+    def execute_write(self, fn, *args):
+        return fn(self, *args)
+
+    def close(self):
+        self.closed = True
+
+
+class _Driver:
+    """Stand-in driver that records every Cypher statement and its parameters."""
+
+    def __init__(self):
+        self.log = []
+        self.sessions = []
+        self.closed = False
+
+    def session(self, **kwargs):
+        self.sessions.append(_Session(self.log))
+        return self.sessions[-1]
+
+    def close(self):
+        self.closed = True
+
+
+def test_writes_are_batched_over_one_session():
+    driver = _Driver()
+    kg = Neo4jKnowledgeGraph(driver=driver, batch_size=3)
+    kg.add_relation("Apple", "Berlin", "LOCATED_IN")
+    kg.add_entity("Apple", "ORG")
+    kg.add_entity("Berlin", "GPE")
+    kg.add_entities([("Google", "ORG"), ("Sundar", "PERSON")])
+    kg.close()
+    statements = [statement for statement, _ in driver.log]
+    assert statements[0].startswith("CREATE CONSTRAINT")
+    # The first flush writes entities before the relation that references them.
+    assert statements[1:] == [MERGE_ENTITIES, MERGE_RELATIONS, MERGE_ENTITIES]
+    assert driver.log[1][1] == [{"name": "Apple", "label": "ORG"}, {"name": "Berlin", "label": "GPE"}]
+    assert len(driver.sessions) == 1 and driver.sessions[0].closed and driver.closed
+    assert kg.stats == {"batches": 3, "entities": 4, "relations": 1}
+
+
+def test_query_flushes_pending_writes():
+    driver = _Driver()
+    kg = Neo4jKnowledgeGraph(driver=driver, batch_size=100)
+    kg.add_entity("Apple", "ORG")
+    assert kg.query("Apple") == []
+    assert [statement for statement, _ in driver.log][1] == MERGE_ENTITIES
+    assert driver.log[-1][1] == {"name": "Apple"}
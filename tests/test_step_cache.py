@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'multi_agent_framework')))
+from core.step_cache import StepCache, step_key
+
+
+def test_step_key_covers_agent_version_params_and_inputs():
+    key = step_key('clean', 1, {'drop_na': True}, {'ingest': 'abc'})
+    assert key == step_key('clean', 1, {'drop_na': True}, {'ingest': 'abc'})
+    assert len({key, step_key('clean', 2, {'drop_na': True}, {'ingest': 'abc'}),
+                step_key('clean', 1, {'drop_na': False}, {'ingest': 'abc'}),
+                step_key('clean', 1, {'drop_na': True}, {'ingest': 'abd'})}) == 4
+
+
+def test_lru_eviction_and_persistence(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = StepCache(path, max_entries=2)
+    cache.put('a', [1])
+    cache.put('b', [2])
+    assert cache.get('a')[:2] == (True, [1])
+    cache.put('c', [3])
+    assert [cache.get(k)[0] for k in 'abc'] == [True, False, True]
+    assert cache.stats == {'hits': 3, 'misses': 1, 'stores': 3, 'evictions': 1}
+    cache.close()
+
+    reopened = StepCache(path, max_entries=2, ttl=0)
+    assert len(reopened) == 2 and reopened.get('a')[0] is False
+    assert reopened.invalidate() == 1
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("redis")
+from agent.token_stream import iter_task_events, stream_key
+
+
+class FakeStreamClient:
+    """Serves canned XREAD replies; an empty reply stands for a read that blocked and timed out."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.blocks = []
+
+    async def xread(self, streams, block=None, count=None):
+        self.blocks.append(block)
+        reply = self.replies.pop(0) if self.replies else []
+        if not reply and block:
+            await asyncio.sleep(block / 1000)
+        return reply
+
+
+def entries(task_id, *events):
+    return [[stream_key(task_id), [(f"{i}-0".encode(), {b"type": t.encode(), b"data": d.encode()})
+                                   for i, (t, d) in enumerate(events, 1)]]]
+
+
+def collect(client, task_id, **kwargs):
+    async def main():
+        return [event async for event in iter_task_events(client, task_id, block_ms=10, **kwargs)]
+    return asyncio.run(main())
+
+
+def test_stream_ends_at_done_event():
+    done = json.dumps({"status": "completed", "result": "ok"})
+    client = FakeStreamClient([[], entries("t", ("token", "he"), ("token", "llo"), ("done", done))])
+    events = collect(client, "t")
+    assert [e["type"] for e in events] == ["heartbeat", "token", "token", "done"]
+    assert [e["data"] for e in events[1:3]] == ["he", "llo"]
+    assert events[-1] == {"type": "done", "status": "completed", "result": "ok"}
+
+
+def test_expired_stream_ends_with_the_final_task_state():
+    states = iter([None, {"status": "completed", "result": "42"}])
+    client = FakeStreamClient([entries("t", ("token", "4"))])
+    events = collect(client, "t", final_state=lambda: next(states))
+    assert [e["type"] for e in events] == ["token", "heartbeat", "heartbeat", "done"]
+    assert events[-1] == {"type": "done", "status": "completed", "result": "42"}
+    # The read after the task finished drains without blocking.
+    assert client.blocks == [10, 10, 10, None]
+
+
+def test_done_published_just_before_finish_is_not_replaced():
+    done = json.dumps({"status": "failed", "result": "boom"})
+    client = FakeStreamClient([[], entries("t", ("done", done))])
+    events = collect(client, "t", final_state=lambda: {"status": "completed", "result": None})
+    assert events[-1] == {"type": "done", "status": "failed", "result": "boom"}
+
+
+def test_stream_without_a_live_task_times_out():
+    client = FakeStreamClient([])
+    events = collect(client, "t", timeout=0.05, final_state=lambda: None)
+    assert events[0]["type"] == "heartbeat"
+    assert events[-1]["type"] == "done" and events[-1]["status"] == "failed"
+
+
+def test_publish_errors_do_not_fail_the_task():
+    import redis
+    from agent.token_stream import TokenPublisher
+
+    class FlakyClient:
+        def __init__(self):
+            self.calls = []
+
+        def xadd(self, key, fields, **kwargs):
+            self.calls.append(fields["type"])
+            if len(self.calls) == 2:
+                raise redis.RedisError("connection reset")
+
+        def expire(self, key, seconds):
+            self.calls.append("expire")
+
+    client = FlakyClient()
+    publisher = TokenPublisher("t1", client=client)
+    for text in ("a", "b", "c"):
+        publisher.token(text)
+    publisher.done("completed", "abc")
+    assert publisher.publish_failed and publisher.time_to_first_token is not None
+    assert client.calls == ["token", "token", "done", "expire"]
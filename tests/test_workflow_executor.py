@@ -0,0 +1,264 @@
+import os
+import sys
+import threading
+import time
+
+# The advanced orchestrator imports its siblings as top-level packages (core, advanced_orchestrator).
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'multi_agent_framework')))
+from advanced_orchestrator.executor import WorkflowExecutor
+from advanced_orchestrator.workflow import WorkflowEngine
+
+
+def test_ready_steps_run_concurrently_within_limits():
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def runner(step, inputs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return sorted(inputs)
+
+    steps = [{'id': 'root'}] + [{'id': f"llm{i}", 'agent': 'llm', 'depends_on': ['root']} for i in range(4)]
+    steps += [{'id': 'join', 'depends_on': [f"llm{i}" for i in range(4)]}, {'id': 'review', 'depends_on': ['join'], 'hitl': True}]
+    engine = WorkflowEngine()
+    engine.add_workflow('wf', steps, dag=True)
+    executor = WorkflowExecutor(engine, runner, max_workers=8, limits={'llm': 2})
+    summary = executor.run('wf')
+    assert peak[0] == 2
+    assert summary['join'] == 'success' and summary['review'] == 'awaiting_approval'
+    assert engine.get_memory('wf')['join'] == [f"llm{i}" for i in range(4)]
+    engine.approve_hitl_step('wf', 'review')
+    assert executor.run('wf')['review'] == 'success'
+
+
+def test_failed_step_blocks_dependents():
+    def runner(step, inputs):
+        raise RuntimeError("boom")
+
+    engine = WorkflowEngine()
+    engine.add_workflow('wf', [{'id': 'a', 'retries': 1}, {'id': 'b', 'depends_on': ['a']}], dag=True)
+    assert WorkflowExecutor(engine, runner).run('wf') == {'a': 'failure', 'b': 'not_run'}
+    assert [h['step_id'] for h in engine.get_run_history('wf')] == ['a', 'a']
+
+
+def test_checkpointed_run_resumes_incomplete_steps(tmp_path):
+    from core.run_store import WorkflowRunStore
+
+    calls = []
+
+    def runner(step, inputs):
+        calls.append(step['id'])
+        return {'step': step['id'], 'inputs': sorted(inputs)}
+
+    steps = [{'id': 'a'}, {'id': 'b', 'depends_on': ['a']}, {'id': 'c', 'depends_on': ['a']},
+             {'id': 'd', 'depends_on': ['b', 'c']}]
+    store = WorkflowRunStore(str(tmp_path / "runs.db"), flush_interval=0.01)
+    engine = WorkflowEngine(checkpoint_store=store)
+    engine.add_workflow('wf', steps, dag=True)
+    # Crash with 'c' in flight: 'a' and 'b' are checkpointed, 'c' never reported back.
+    engine.record_step_output('wf', 'a', runner({'id': 'a'}, {}))
+    engine.record_step_output('wf', 'b', runner({'id': 'b'}, {'a': None}))
+    store.close()
+
+    store = WorkflowRunStore(str(tmp_path / "runs.db"))
+    restarted = WorkflowEngine(checkpoint_store=store)
+    assert restarted.recover() == ['wf']
+    assert restarted.get_memory('wf')['b'] == {'step': 'b', 'inputs': ['a']}
+    calls.clear()
+    summary = WorkflowExecutor(restarted, runner).run('wf')
+    assert calls == ['c', 'd'] and set(summary.values()) == {'success'}
+    store.close()
+
+
+def test_recover_skips_runs_that_cannot_progress(tmp_path):
+    from core.run_store import WorkflowRunStore
+
+    def runner(step, inputs):
+        if step['id'] == 'bad':
+            raise RuntimeError("boom")
+        return 'no'
+
+    store = WorkflowRunStore(str(tmp_path / "runs.db"), flush_interval=0.01)
+    engine = WorkflowEngine(checkpoint_store=store)
+    engine.add_workflow('exhausted', [{'id': 'bad', 'retries': 1}, {'id': 'after', 'depends_on': ['bad']}], dag=True)
+    engine.add_workflow('skipped', [{'id': 'gate'}, {'id': 'then', 'depends_on': ['gate'],
+                                                     'condition': {'step': 'gate', 'equals': 'yes'}}], dag=True)
+    engine.add_workflow('awaiting', [{'id': 'review', 'hitl': True}], dag=True)
+    engine.add_workflow('retrying', [{'id': 'flaky', 'retries': 1}], dag=True)
+    executor = WorkflowExecutor(engine, runner)
+    assert executor.run('exhausted')['bad'] == 'failure'
+    executor.run('skipped')
+    engine.record_step_output('retrying', 'flaky', None, status='failure')
+    store.close()
+
+    store = WorkflowRunStore(str(tmp_path / "runs.db"))
+    restarted = WorkflowEngine(checkpoint_store=store)
+    assert restarted.recover() == ['retrying']
+    assert restarted.get_run_status('exhausted')['bad'] == 'failure'
+    store.close()
+
+
+def test_retry_budget_survives_a_restart(tmp_path):
+    from core.run_store import WorkflowRunStore
+
+    calls = []
+
+    def runner(step, inputs):
+        calls.append(step['id'])
+        raise RuntimeError("always fails")
+
+    steps = [{'id': 'flaky', 'retries': 2, 'backoff': {'base': 0.0, 'jitter': False}}]
+    store = WorkflowRunStore(str(tmp_path / "runs.db"), flush_interval=0.01)
+    engine = WorkflowEngine(checkpoint_store=store)
+    engine.add_workflow('wf', steps, dag=True)
+    # Crash after two of the three allowed attempts.
+    engine.record_step_output('wf', 'flaky', None, status='failure')
+    engine.record_step_output('wf', 'flaky', None, status='failure')
+    store.close()
+
+    store = WorkflowRunStore(str(tmp_path / "runs.db"))
+    restarted = WorkflowEngine(checkpoint_store=store)
+    assert restarted.recover() == ['wf']
+    assert WorkflowExecutor(restarted, runner).run('wf') == {'flaky': 'failure'}
+    assert calls == ['flaky']
+    store.close()
+
+    store = WorkflowRunStore(str(tmp_path / "runs.db"))
+    assert WorkflowEngine(checkpoint_store=store).recover() == []
+    assert store.load()['wf']['failures'] == {'flaky': 3}
+    store.close()
+
+
+def test_unpicklable_outputs_are_checkpointed_without_a_ref(tmp_path):
+    from core.run_store import WorkflowRunStore
+
+    store = WorkflowRunStore(str(tmp_path / "runs.db"), flush_interval=0.01)
+    engine = WorkflowEngine(checkpoint_store=store)
+    engine.add_workflow('wf', [{'id': 'lock'}, {'id': 'next', 'depends_on': ['lock']}], dag=True)
+    summary = WorkflowExecutor(engine, lambda step, inputs: threading.Lock()).run('wf')
+    assert set(summary.values()) == {'success'}
+    run = store.load()['wf']
+    assert run['status'] == {'lock': 'success', 'next': 'success'} and run['memory'] == {}
+    store.close()
+
+
+def test_resubmitting_a_workflow_deletes_unreferenced_outputs(tmp_path):
+    from core.run_store import WorkflowRunStore
+
+    store = WorkflowRunStore(str(tmp_path / "runs.db"), flush_interval=0.01)
+    engine = WorkflowEngine(checkpoint_store=store)
+    steps = [{'id': 'a'}]
+    engine.add_workflow('wf', steps, dag=True)
+    engine.add_workflow('other', steps, dag=True)
+    engine.record_step_output('wf', 'a', 'only wf')
+    engine.record_step_output('other', 'a', 'shared')
+    engine.record_step_output('wf', 'a', 'shared')
+    engine.add_workflow('wf', steps, dag=True)
+    store.flush()
+    with store._conn_lock:
+        blobs = store._conn.execute("SELECT COUNT(*) FROM outputs").fetchone()[0]
+    assert blobs == 1
+    assert store.load()['other']['memory'] == {'a': 'shared'}
+    store.close()
+
+
+def test_cacheable_steps_are_memoized_across_runs():
+    from core.step_cache import StepCache
+
+    calls = []
+
+    def runner(step, inputs):
+        calls.append(step['id'])
+        return {'step': step['id'], 'params': step.get('params'), 'inputs': inputs}
+
+    def steps(source):
+        return [{'id': 'ingest', 'agent': 'ingestion', 'cache': True, 'params': {'source': source}},
+                {'id': 'clean', 'agent': 'cleaning', 'cache': True, 'depends_on': ['ingest']},
+                {'id': 'export', 'agent': 'export', 'depends_on': ['clean']}]
+
+    cache = StepCache()
+    executor_for = lambda engine: WorkflowExecutor(engine, runner, cache=cache, versions={'cleaning': 1}.get)
+    for run, source in enumerate(['a.csv', 'a.csv', 'b.csv']):
+        engine = WorkflowEngine()
+        engine.add_workflow('wf', steps(source), dag=True)
+        summary = executor_for(engine).run('wf')
+        if run == 1:
+            assert summary == {'ingest': 'cached', 'clean': 'cached', 'export': 'success'}
+            assert engine.get_memory('wf')['clean']['inputs']['ingest']['params'] == {'source': 'a.csv'}
+    assert calls == ['ingest', 'clean', 'export', 'export', 'ingest', 'clean', 'export']
+    assert cache.stats['hits'] == 2 and cache.stats['misses'] == 4
+
+    engine = WorkflowEngine()
+    engine.add_workflow('wf', steps('b.csv'), dag=True)
+    assert executor_for(engine).run('wf', force=True)['ingest'] == 'success'
+    assert calls[-3:] == ['ingest', 'clean', 'export']
+
+
+def test_timed_out_step_is_cancelled_and_retried_with_backoff():
+    attempts = []
+
+    def runner(step, inputs, cancel):
+        attempts.append(step['id'])
+        if step['id'] == 'slow' and attempts.count('slow') == 1:
+            cancel.wait(5)
+            return 'too late'
+        return step['id']
+
+    engine = WorkflowEngine()
+    # A chain workflow: retries used to assume DAG node attributes.
+    engine.add_workflow('wf', [{'id': 'slow', 'timeout': 0.05, 'retries': 1, 'backoff': {'base': 0.05, 'jitter': False}},
+                               {'id': 'next'}])
+    start = time.monotonic()
+    summary = WorkflowExecutor(engine, runner).run('wf')
+    assert time.monotonic() - start < 1
+    assert summary == {'slow': 'success', 'next': 'success'} and attempts == ['slow', 'slow', 'next']
+    history = engine.get_run_history('wf')
+    assert history[0]['output']['error_type'] == 'TimeoutError'
+    assert history[1]['timestamp'] - history[0]['timestamp'] >= 0.05
+
+
+def test_abandoned_calls_keep_their_worker_until_they_return():
+    calls = []
+
+    def runner(step, inputs):
+        calls.append(step['id'])
+        if step['id'] == 'hung':
+            time.sleep(0.9)  # no ``cancel`` keyword: a timed-out call keeps its pool thread busy
+        elif calls.count('quick') == 1:
+            raise RuntimeError("flaky")
+        return step['id']
+
+    engine = WorkflowEngine()
+    engine.add_workflow('wf', [
+        {'id': 'hung', 'timeout': 0.1, 'retries': 1, 'backoff': {'base': 0.01, 'jitter': False}},
+        {'id': 'quick', 'timeout': 0.5, 'retries': 1, 'backoff': {'base': 0.25, 'jitter': False}}], dag=True)
+    # Both hung attempts hold the two workers when 'quick' is retried; it must wait for a
+    # worker instead of queueing behind them with its deadline already running.
+    assert WorkflowExecutor(engine, runner, max_workers=2).run('wf') == {'hung': 'failure', 'quick': 'success'}
+    errors = [h['output']['error_type'] for h in engine.get_run_history('wf') if h['status'] == 'failure']
+    assert sorted(errors) == ['RuntimeError', 'TimeoutError', 'TimeoutError']
+
+
+def test_straggler_gets_a_hedged_duplicate():
+    calls = []
+
+    def runner(step, inputs, cancel):
+        calls.append(step['id'])
+        if step['id'] == 'straggler' and calls.count('straggler') == 1:
+            cancel.wait(5)
+            raise RuntimeError("cancelled")
+        time.sleep(0.01)
+        return step['id']
+
+    executor = WorkflowExecutor(None, runner, hedge_min_samples=4)
+    executor.engine = WorkflowEngine()
+    executor.engine.add_workflow('warmup', [{'id': f"w{i}", 'agent': 'llm'} for i in range(4)], dag=True)
+    executor.run('warmup')
+    executor.engine.add_workflow('wf', [{'id': 'straggler', 'agent': 'llm', 'hedge': True}], dag=True)
+    start = time.monotonic()
+    assert executor.run('wf') == {'straggler': 'success'}
+    assert time.monotonic() - start < 1
+    assert executor.stats['hedge_wins'] == 1 and calls.count('straggler') == 2
@@ -0,0 +1,296 @@
+import atexit
+import hashlib
+import importlib
+import json
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    return _WS_RE.sub(" ", str(prompt)).strip()
+
+
+def estimate_tokens(value):
+    # Rough 4-characters-per-token estimate; good enough for "tokens saved" accounting.
+    return max(1, len(str(value)) // 4)
+
+
+class LLMResponseCache:
+    """Two-tier LLM response cache.
+
+    The exact tier is keyed on the normalized prompt plus the generation
+    parameters. The semantic tier (enabled when an ``embed_fn`` is given) serves
+    a cached response when a new prompt's embedding has cosine similarity of at
+    least ``similarity_threshold`` with a cached prompt generated under the same
+    parameters. Both tiers share one size-bounded LRU and expire entries after
+    their own TTL. A semantic hit was generated for a different prompt, so
+    callers should cache text that does not repeat the prompt (e.g. only the
+    continuation of a text-generation pipeline).
+    """
+
+    def __init__(self, max_entries=1024, exact_ttl=24 * 3600, semantic_ttl=3600,
+                 embed_fn=None, similarity_threshold=0.95, persist_path=None, autosave_every=50):
+        self.max_entries = max_entries
+        self.exact_ttl = exact_ttl
+        self.semantic_ttl = semantic_ttl
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        self.persist_path = persist_path
+        self.autosave_every = autosave_every
+        self.lock = threading.Lock()
+        # key -> {"response", "params_key", "created", "tokens", "embedding"}
+        self.entries = OrderedDict()
+        self._matrix = None
+        self._matrix_keys = []
+        self._dirty_puts = 0
+        self.stats_counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "tokens_saved": 0, "evictions": 0}
+        if persist_path and os.path.exists(persist_path):
+            self.load()
+        if persist_path:
+            # Puts since the last autosave are written at interpreter exit.
+            atexit.register(_save_at_exit, weakref.ref(self))
+
+    # --- Keys ---
+    @staticmethod
+    def params_key(params):
+        return json.dumps(params or {}, sort_keys=True, default=str)
+
+    def make_key(self, prompt, params=None):
+        raw = normalize_prompt(prompt) + "\x00" + self.params_key(params)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # --- Lookup ---
+    def get(self, prompt, params=None):
+        return self._lookup(prompt, params)[0]
+
+    def _lookup(self, prompt, params):
+        """(response or None, prompt embedding or None); a miss hands the embedding on to ``put``."""
+        key = self.make_key(prompt, params)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if now - entry["created"] <= self.exact_ttl:
+                    self.entries.move_to_end(key)
+                    return self._record_hit("exact_hits", entry), None
+                self._evict(key)
+        embedding = None
+        if self.embed_fn is not None and NUMPY_AVAILABLE:
+            embedding = self._embed(prompt)
+            with self.lock:
+                hit_key = self._nearest(embedding, self.params_key(params), now)
+                if hit_key is not None:
+                    self.entries.move_to_end(hit_key)
+                    return self._record_hit("semantic_hits", self.entries[hit_key]), embedding
+        with self.lock:
+            self.stats_counters["misses"] += 1
+        return None, embedding
+
+    def _record_hit(self, counter, entry):
+        self.stats_counters[counter] += 1
+        self.stats_counters["tokens_saved"] += entry["tokens"]
+        return entry["response"]
+
+    def _embed(self, prompt):
+        vector = np.asarray(self.embed_fn(normalize_prompt(prompt)), dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _nearest(self, embedding, params_key, now):
+        if self._matrix is None:
+            keys = [k for k, e in self.entries.items() if e["embedding"] is not None]
+            self._matrix_keys = keys
+            self._matrix = np.stack([self.entries[k]["embedding"] for k in keys]) if keys else np.empty((0, 0))
+        if not self._matrix_keys or self._matrix.shape[1] != embedding.shape[0]:
+            return None
+        sims = self._matrix @ embedding
+        for i in np.argsort(-sims):
+            if sims[i] < self.similarity_threshold:
+                return None
+            entry = self.entries.get(self._matrix_keys[i])
+            if entry is None or entry["params_key"] != params_key:
+                continue
+            if now - entry["created"] > self.semantic_ttl:
+                continue
+            return self._matrix_keys[i]
+        return None
+
+    # --- Insert / evict ---
+    def put(self, prompt, response, params=None, tokens=None, embedding=None):
+        """Stores ``response``; ``embedding`` is the prompt's, when a lookup already computed it."""
+        key = self.make_key(prompt, params)
+        if embedding is None and self.embed_fn is not None and NUMPY_AVAILABLE:
+            embedding = self._embed(prompt)
+        with self.lock:
+            if key in self.entries:
+                self._evict(key)
+            self.entries[key] = {
+                "response": response,
+                "params_key": self.params_key(params),
+                "created": time.time(),
+                "tokens": tokens if tokens is not None else estimate_tokens(response),
+                "embedding": embedding,
+            }
+            self._matrix = None
+            while len(self.entries) > self.max_entries:
+                oldest = next(iter(self.entries))
+                self._evict(oldest)
+                self.stats_counters["evictions"] += 1
+            self._dirty_puts += 1
+            autosave = self.persist_path and self._dirty_puts >= self.autosave_every
+        if autosave:
+            self.save()
+
+    def _evict(self, key):
+        self.entries.pop(key, None)
+        self._matrix = None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self._matrix = None
+
+    # --- Call helpers ---
+    def cached_call(self, prompt, fn, params=None):
+        response, embedding = self._lookup(prompt, params)
+        if response is None:
+            response = fn(prompt)
+            self.put(prompt, response, params, embedding=embedding)
+        return response
+
+    async def acached_call(self, prompt, coro_fn, params=None):
+        response, embedding = self._lookup(prompt, params)
+        if response is None:
+            response = await coro_fn(prompt)
+            self.put(prompt, response, params, embedding=embedding)
+        return response
+
+    # --- Persistence ---
+    def save(self, path=None):
+        path = path or self.persist_path
+        if not path:
+            return
+        now = time.time()
+        ttl = max(self.exact_ttl, self.semantic_ttl)
+        with self.lock:
+            live = [(k, e) for k, e in self.entries.items() if now - e["created"] <= ttl]
+            self._dirty_puts = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(live, f)
+        os.replace(tmp_path, path)
+        logging.info(f"[LLMResponseCache] Saved {len(live)} entries to {path}")
+
+    def load(self, path=None):
+        path = path or self.persist_path
+        with open(path, "rb") as f:
+            live = pickle.load(f)
+        with self.lock:
+            self.entries = OrderedDict(live)
+            self._matrix = None
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        logging.info(f"[LLMResponseCache] Loaded {len(self.entries)} entries from {path}")
+
+    # --- Metrics ---
+    def stats(self):
+        with self.lock:
+            counters = dict(self.stats_counters)
+            counters["size"] = len(self.entries)
+        lookups = counters["exact_hits"] + counters["semantic_hits"] + counters["misses"]
+        counters["hit_rate"] = (counters["exact_hits"] + counters["semantic_hits"]) / lookups if lookups else 0.0
+        return counters
+
+
+def _save_at_exit(cache_ref):
+    cache = cache_ref()
+    if cache is not None and cache._dirty_puts:
+        try:
+            cache.save()
+        except Exception:
+            logging.exception("[LLMResponseCache] Failed to save at exit")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+# Environment overrides of the ``llm.cache`` config section.
+_ENV_OVERRIDES = {
+    "max_entries": ("LLM_CACHE_MAX_ENTRIES", int),
+    "exact_ttl": ("LLM_CACHE_TTL", float),
+    "semantic_ttl": ("LLM_CACHE_SEMANTIC_TTL", float),
+    "similarity_threshold": ("LLM_CACHE_SIMILARITY", float),
+    "persist_path": ("LLM_CACHE_PATH", str),
+}
+
+
+def load_cache_config(path=None):
+    """The ``llm.cache`` section of config.yaml (``LLM_CACHE_CONFIG`` overrides the path), env vars applied."""
+    path = path or os.environ.get("LLM_CACHE_CONFIG", "config.yaml")
+    config = {}
+    if yaml is not None and os.path.exists(path):
+        with open(path) as f:
+            config = dict(((yaml.safe_load(f) or {}).get("llm") or {}).get("cache") or {})
+    for key, (env, cast) in _ENV_OVERRIDES.items():
+        if env in os.environ:
+            config[key] = cast(os.environ[env])
+    if "LLM_CACHE_EMBEDDER" in os.environ:
+        module, _, cls = os.environ["LLM_CACHE_EMBEDDER"].partition(":")
+        config["embedder"] = {"module": module, "class": cls}
+    return config
+
+
+def build_embed_fn(spec):
+    """Embedding callable from a plugin-style spec: {module, class, config, method (default "embed")}.
+
+    Returns None (semantic tier off) if the embedder cannot be constructed.
+    """
+    if not spec:
+        return None
+    try:
+        embedder_class = getattr(importlib.import_module(spec["module"]), spec["class"])
+        embedder = embedder_class(**(spec.get("config") or {}))
+    except Exception:
+        logging.warning(f"[LLMResponseCache] Embedder {spec.get('module')}.{spec.get('class')} unavailable; "
+                        "semantic cache tier disabled", exc_info=True)
+        return None
+    return getattr(embedder, spec.get("method", "embed"))
+
+
+def get_default_cache():
+    """Process-wide cache shared by the LLM call sites, configured by ``load_cache_config``."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            config = load_cache_config()
+            _default_cache = LLMResponseCache(
+                max_entries=int(config.get("max_entries", 1024)),
+                exact_ttl=float(config.get("exact_ttl", 24 * 3600)),
+                semantic_ttl=float(config.get("semantic_ttl", 3600)),
+                embed_fn=build_embed_fn(config.get("embedder")),
+                similarity_threshold=float(config.get("similarity_threshold", 0.95)),
+                persist_path=config.get("persist_path"),
+                autosave_every=int(config.get("autosave_every", 50)),
+            )
+        return _default_cache